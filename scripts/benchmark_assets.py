@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Benchmark the icon and mockup asset pipelines and gate on regressions.
+
+Every stage runs in its own spawned process against synthetic fixtures built
+offline (a 1024 icon source with a white canvas, 1290x2796 and 2064x2752
+screenshots), so no network, fonts or marketing assets are needed. A stage
+is run for --warmup untimed rounds and then --repeats timed rounds. Before
+each round its caches are cleared, so every round measures cold work. Wall
+time, CPU time and the peak RSS above the post-setup baseline go to
+.cache/benchmarks/latest.json.
+
+With a saved baseline (--save-baseline), a stage regresses when its fastest
+round (the least noisy statistic on a shared machine) or its peak memory
+grows by more than --threshold and by more than the noise floor. The script
+then exits non-zero. Baselines are per machine, so record one on the
+machine (or CI runner class) that compares against it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import PIL
+from PIL import Image, ImageDraw, ImageFont
+
+import generate_app_icons
+import generate_app_store_mockups
+import gradients
+import mockup_templates
+import mockup_text
+import png_encode
+import screen_ingest
+import tiled
+from asset_io import write_atomic
+from memory_report import in_clean_process, peak_rss_bytes, reset_peak_rss
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = ROOT / ".cache" / "benchmarks"
+DEFAULT_OUTPUT = BENCH_DIR / "latest.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+SCREENSHOT_SIZES = ((1290, 2796), (2064, 2752))
+# Screen area of the portrait mockup phone (1020x2180 body, 50px bezel).
+SCREEN_SIZE = (920, 2080)
+# The 6.9" iPhone portrait canvas the mockup stages render.
+MOCKUP_SIZE = (1290, 2796)
+CAPTIONS = tuple(
+    f"{word} errate Begriffe mit dem Handy an der Stirn: Kategorien, eigene Listen und KI-Wörterlisten ({i})"
+    for i, word in enumerate(("Action", "Party", "Familie", "Quiz", "Pantomime") * 10)
+)
+
+# Regressions smaller than these are treated as noise.
+MIN_DELTA_SECONDS = 0.002
+MIN_DELTA_BYTES = 4 << 20
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], object]
+    # Called before every round so caches do not turn later rounds into lookups.
+    reset: Optional[Callable[[], None]] = None
+
+
+@lru_cache(maxsize=None)
+def fixture_dir() -> Path:
+    path = BENCH_DIR / "fixtures"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@lru_cache(maxsize=None)
+def default_font(size: int) -> ImageFont.ImageFont:
+    # Pillow's bundled font, so text stages need neither downloads nor system fonts.
+    return ImageFont.load_default(size=size)
+
+
+def _texture(size: Tuple[int, int]) -> Image.Image:
+    # Deterministic detail (no RNG) so encodes see the same bytes on every run.
+    return Image.merge(
+        "RGB",
+        (
+            Image.effect_mandelbrot(size, (-2.0, -1.2, 0.8, 1.2), 60),
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+        ),
+    )
+
+
+@lru_cache(maxsize=None)
+def icon_source() -> Image.Image:
+    """Artwork on a bright white canvas, like the icon candidates the blend targets."""
+    img = Image.new("RGB", (1024, 1024), (252, 252, 250))
+    art = _texture((760, 760))
+    mask = Image.new("L", art.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, 759, 759), radius=180, fill=255)
+    img.paste(art, (132, 132), mask)
+    return img
+
+
+@lru_cache(maxsize=None)
+def screenshot(size: Tuple[int, int]) -> Image.Image:
+    """A UI-like screen: gradient, texture header and a column of cards."""
+    w, h = size
+    img = Image.new("RGB", size, (30, 24, 60))
+    img.paste(_texture((w, h // 3)), (0, 0))
+    draw = ImageDraw.Draw(img)
+    font = default_font(max(24, w // 30))
+    card_h = h // 14
+    for i, y in enumerate(range(h // 3 + 40, h - card_h, card_h + 30)):
+        draw.rounded_rectangle((40, y, w - 40, y + card_h), radius=card_h // 3, fill=(255, 120 + i * 7 % 120, 90))
+        draw.text((80, y + card_h // 4), f"Kategorie {i + 1}", font=font, fill=(255, 255, 255))
+    return img
+
+
+@lru_cache(maxsize=None)
+def fixture_path(name: str) -> Path:
+    img = icon_source() if name == "icon" else screenshot(tuple(int(v) for v in name.split("x")))
+    path = fixture_dir() / f"{name}.png"
+    if not path.exists():
+        img.save(path, compress_level=1)
+    return path
+
+
+def _wrap_all(font: ImageFont.ImageFont) -> None:
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    for caption in CAPTIONS:
+        generate_app_store_mockups.wrap_lines(draw, caption, font, 1186)
+
+
+def _fit_all(_: object) -> None:
+    for caption in CAPTIONS:
+        mockup_text.fit_text(caption, default_font, 76, 1290, max_width=1186)
+
+
+def stages() -> List[Stage]:
+    icons = generate_app_icons
+    mockups = generate_app_store_mockups
+    rows = tiled.DEFAULT_STRIP_ROWS
+    result = [
+        Stage("icon.prep_source", lambda: fixture_path("icon"), icons.prep_source),
+        Stage("icon.prep_source[tiled]", lambda: fixture_path("icon"), lambda p: icons.prep_source(p, rows)),
+        Stage("icon.make_gradient", lambda: 1024, icons.make_gradient, gradients.clear_cache),
+        Stage(
+            "icon.blend_edge_canvas",
+            lambda: (icon_source(), icons.make_gradient(1024)),
+            lambda args: icons.blend_edge_canvas(*args),
+        ),
+        Stage(
+            "mockup.gradient_canvas",
+            lambda: None,
+            lambda _: mockups.gradient_canvas(MOCKUP_SIZE, (255, 235, 126), (255, 120, 126)),
+            gradients.clear_cache,
+        ),
+        Stage(
+            "mockup.background",
+            lambda: mockup_templates.configure(None),
+            lambda _: mockup_templates.background(
+                MOCKUP_SIZE,
+                (255, 235, 126),
+                (255, 120, 126),
+                (mockup_templates.Glow((220, 2280), 360, (130, 255, 255, 120)),),
+            ),
+            mockup_templates.clear_cache,
+        ),
+        Stage("mockup.wrap_lines", lambda: default_font(76), _wrap_all, mockup_text.clear_cache),
+        Stage("mockup.fit_text", lambda: None, _fit_all, mockup_text.clear_cache),
+    ]
+    for w, h in SCREENSHOT_SIZES:
+        name = f"{w}x{h}"
+        result.append(
+            Stage(
+                f"mockup.fit_cover[{name}]",
+                lambda s=(w, h): screenshot(s),
+                lambda img: screen_ingest.fit_cover(img, SCREEN_SIZE),
+            )
+        )
+        # From the PNG, decode included, as paste_screen gets it.
+        for suffix, strip_rows in (("", None), (",tiled", rows)):
+            result.append(
+                Stage(
+                    f"mockup.fit_screen[{name}{suffix}]",
+                    lambda n=name: fixture_path(n),
+                    lambda p, r=strip_rows: screen_ingest.fit_screen(Image.open(p), SCREEN_SIZE, r),
+                )
+            )
+        result.append(
+            Stage(
+                f"mockup.load_screen[{name}]",
+                lambda n=name: (screen_ingest.configure(None), fixture_path(n))[1],
+                lambda p: screen_ingest.load_screen(p, SCREEN_SIZE),
+                screen_ingest.clear_cache,
+            )
+        )
+    for strategy in png_encode.STRATEGIES:
+        result.append(Stage(f"png.{strategy}[icon]", icon_source, lambda img, s=strategy: png_encode.encode_png(img, s)))
+        result.append(
+            Stage(
+                f"png.{strategy}[1290x2796]",
+                lambda: screenshot(SCREENSHOT_SIZES[0]),
+                lambda img, s=strategy: png_encode.encode_png(img, s),
+            )
+        )
+    return result
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {"min": min(values), "median": statistics.median(values), "mean": statistics.fmean(values)}
+
+
+def _run_stage(name: str, warmup: int, repeats: int) -> Dict[str, Any]:
+    stage = next(s for s in stages() if s.name == name)
+    arg = stage.setup()
+    # Without a resettable peak (macOS), setup's own peak hides smaller stages.
+    baseline = reset_peak_rss() or peak_rss_bytes()
+    walls: List[float] = []
+    cpus: List[float] = []
+    for i in range(warmup + repeats):
+        if stage.reset is not None:
+            stage.reset()
+        wall, cpu = time.perf_counter(), time.process_time()
+        stage.run(arg)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if i >= warmup:
+            walls.append(wall)
+            cpus.append(cpu)
+    return {
+        "wall_s": _summary(walls),
+        "cpu_s": _summary(cpus),
+        "peak_rss_bytes": peak_rss_bytes() - baseline,
+        "runs_wall_s": walls,
+    }
+
+
+def environment() -> Dict[str, str]:
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = "missing"
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_benchmarks(names: List[str], warmup: int, repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        results[name] = in_clean_process(_run_stage, name, warmup, repeats)
+        wall = results[name]["wall_s"]["median"]
+        print(f"  {name:<36} {wall * 1000:9.1f} ms", file=sys.stderr)
+    return {
+        "version": 1,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "warmup": warmup,
+        "repeats": repeats,
+        "stages": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regression messages for stages slower (fastest round) or larger than baseline * (1 + threshold)."""
+    problems = []
+    for name, cur in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            continue
+        wall, base_wall = cur["wall_s"]["min"], base["wall_s"]["min"]
+        if wall > base_wall * (1 + threshold) and wall - base_wall > MIN_DELTA_SECONDS:
+            problems.append(f"{name}: min wall {base_wall * 1000:.1f} -> {wall * 1000:.1f} ms")
+        mem, base_mem = cur["peak_rss_bytes"], base["peak_rss_bytes"]
+        if mem > base_mem * (1 + threshold) and mem - base_mem > MIN_DELTA_BYTES:
+            problems.append(f"{name}: peak RSS {base_mem / (1 << 20):.1f} -> {mem / (1 << 20):.1f} MiB")
+    return problems
+
+
+def _delta(cur: float, base: Optional[float]) -> str:
+    return "" if not base else f"{(cur - base) / base * 100:+6.1f}%"
+
+
+def format_report(current: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> str:
+    base_stages = baseline["stages"] if baseline else {}
+    lines = [f"  {'stage':<36} {'wall med':>10} {'wall min':>10} {'cpu med':>10} {'peak RSS':>10}  vs baseline"]
+    for name, r in current["stages"].items():
+        base = base_stages.get(name)
+        vs = ""
+        if base:
+            vs = f"wall min {_delta(r['wall_s']['min'], base['wall_s']['min'])}"
+            vs += f"  rss {_delta(r['peak_rss_bytes'], base['peak_rss_bytes']) or '   n/a'}"
+        lines.append(
+            f"  {name:<36} {r['wall_s']['median'] * 1000:7.1f} ms {r['wall_s']['min'] * 1000:7.1f} ms"
+            f" {r['cpu_s']['median'] * 1000:7.1f} ms {r['peak_rss_bytes'] / (1 << 20):6.1f} MiB  {vs}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the asset pipeline stages against a saved baseline.")
+    parser.add_argument("--stage", action="append", metavar="GLOB", help="Run only matching stages (repeatable).")
+    parser.add_argument("--list", action="store_true", help="List stage names and exit.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed rounds per stage (default: 1).")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed rounds per stage (default: 5).")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write the results JSON.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the baseline.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Allowed relative growth of min wall time and peak RSS before failing (default: 0.15).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    names = [s.name for s in stages()]
+    if args.stage:
+        names = [n for n in names if any(fnmatch.fnmatch(n, pattern) for pattern in args.stage)]
+    if args.list:
+        print("\n".join(names))
+        return
+    if not names:
+        sys.exit("No stages selected.")
+
+    current = run_benchmarks(names, args.warmup, args.repeats)
+    write_atomic(args.output, json.dumps(current, indent=2).encode("utf-8"))
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    print(format_report(current, baseline))
+    print(f"Results: {args.output}")
+    if args.save_baseline:
+        write_atomic(args.baseline, json.dumps(current, indent=2).encode("utf-8"))
+        print(f"Baseline saved: {args.baseline}")
+        return
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+    if baseline["environment"] != current["environment"]:
+        print(f"Note: baseline environment differs: {baseline['environment']} vs {current['environment']}")
+    problems = compare(current, baseline, args.threshold)
+    if problems:
+        print("Regressions:")
+        print("\n".join(f"  {p}" for p in problems))
+        sys.exit(f"{len(problems)} regression(s) above {args.threshold:.0%}.")
+    print(f"No regressions above {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
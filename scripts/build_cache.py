@@ -0,0 +1,201 @@
+"""
+Content-addressed build cache for the asset generators.
+
+Stage outputs are stored under .cache/<name>/ as lossless PNGs named by a key
+derived from their inputs (source bytes, parameters, Pillow version). A
+manifest remembers which key produced each exported file together with the
+file's hash, so unchanged targets are skipped and files edited by hand or
+deleted are re-exported.
+
+Caches that keep many entries per stage (replace=False) are bounded with
+trim(): a hit refreshes the file's mtime, and the least recently used
+images are deleted once the directory exceeds its size budget.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import PIL
+from PIL import Image
+
+import stage_trace
+from asset_io import write_atomic
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def digest(*parts: Any) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def files_fingerprint(*paths: Path) -> str:
+    return digest(*(file_sha256(p) for p in paths))
+
+
+def local_imports(entry: Path) -> List[Path]:
+    """entry plus every module next to it that it imports, directly or through another one."""
+    found: Dict[Path, None] = {}
+    pending = [entry.resolve()]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found[path] = None
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"), str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = path.parent / f"{name.split('.')[0]}.py"
+                if candidate.exists():
+                    pending.append(candidate)
+    return sorted(found)
+
+
+def code_fingerprint(entry: Path) -> str:
+    """Fingerprint of entry's source and of every local module it imports."""
+    return files_fingerprint(*local_imports(entry))
+
+
+class BuildCache:
+    def __init__(self, directory: Path, enabled: bool = True) -> None:
+        self.directory = directory
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._manifest: Dict[str, Any] = {"version": MANIFEST_VERSION, "targets": {}}
+        if enabled:
+            self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        path = self.directory / MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self._manifest = data
+
+    def key(self, *parts: Any) -> str:
+        # Every key includes the Pillow version: resamplers and encoders change between releases.
+        return digest(PIL.__version__, *parts)
+
+    def _stage_path(self, stage: str, key: str) -> Path:
+        return self.directory / f"{stage}-{key}.png"
+
+    def load_image(self, stage: str, key: str) -> Optional[Image.Image]:
+        path = self._stage_path(stage, key)
+        if not self.enabled or not path.exists():
+            self.misses += 1
+            stage_trace.instant("cache miss", stage=stage)
+            return None
+        try:
+            with Image.open(path) as img:
+                img.load()
+                # The mtime doubles as the last-use time for trim().
+                os.utime(path)
+                self.hits += 1
+                stage_trace.instant("cache hit", stage=stage)
+                return img.copy()
+        except OSError:
+            self.misses += 1
+            stage_trace.instant("cache miss", stage=stage, corrupt=True)
+            return None
+
+    def store_image(self, stage: str, key: str, img: Image.Image, replace: bool = True) -> None:
+        if not self.enabled:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # By default only the latest output of each stage is kept.
+        for old in self.directory.glob(f"{stage}-*.png") if replace else ():
+            old.unlink(missing_ok=True)
+        # Pool workers may store the same layer at once; write_atomic uses unique temp names.
+        buf = BytesIO()
+        img.save(buf, format="PNG", compress_level=1)
+        write_atomic(self._stage_path(stage, key), buf.getvalue())
+
+    def trim(self, max_bytes: int) -> int:
+        """Delete the least recently used stage images until they fit in max_bytes; returns the number removed."""
+        if not self.enabled or not self.directory.is_dir():
+            return 0
+        entries = []
+        for path in self.directory.glob("*.png"):
+            try:
+                st = path.stat()
+            except OSError:  # Removed by a concurrent trim.
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        stage_trace.instant("cache trim", directory=str(self.directory), removed=removed, bytes=total)
+        return removed
+
+    def is_fresh(self, path: Path, key: str) -> bool:
+        entry = self._manifest["targets"].get(str(path))
+        if not self.enabled or entry is None or entry.get("key") != key:
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+        # Touched but possibly identical (e.g. after a git checkout): compare content.
+        if st.st_size != entry.get("size") or file_sha256(path) != entry.get("sha256"):
+            return False
+        entry["mtime_ns"] = st.st_mtime_ns
+        return True
+
+    def produced(self, path: Path) -> bool:
+        """True if path is an unmodified output recorded by an earlier run."""
+        entry = self._manifest["targets"].get(str(path))
+        return self.enabled and entry is not None and self.is_fresh(path, entry["key"])
+
+    def record(self, path: Path, key: str, stage: Optional[str] = None) -> None:
+        """Remember that key produced path; stage is the key of the stage image it was exported from."""
+        st = path.stat()
+        self._manifest["targets"][str(path)] = {
+            "key": key,
+            "stage": stage,
+            "sha256": file_sha256(path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+
+    def stage_of(self, path: Path) -> Optional[str]:
+        """The stage key recorded for path, if any."""
+        entry = self._manifest["targets"].get(str(path))
+        return entry.get("stage") if entry is not None else None
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        data = json.dumps(self._manifest, indent=2, sort_keys=True).encode("utf-8")
+        write_atomic(self.directory / MANIFEST_NAME, data)
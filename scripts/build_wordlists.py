@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Compile the word lists in lib/data/words.dart into per-category binary assets.
+
+StirnratenData.words is a const map of every category's list, so the app
+carries all ~3,500 strings in its snapshot and heap from start-up on, even
+though a game uses one category. This tool extracts the lists, normalizes
+them with the rules of lib/services/wordlist_normalizer.dart and writes one
+file per category to assets/wordlists, plus an index.json with the counts
+the category grid shows. The app can then load a single category when a
+game starts.
+
+Normalization: leading bullets/numbering are stripped, whitespace is
+collapsed, terms with emoji or a blocked word are dropped, and duplicates
+are removed case-insensitively (first spelling wins). The normalizer matches
+blocked words as substrings, which is fine for AI output but would drop
+curated words such as "Physiotherapeut" or "Spice Girls"; here only
+whole-word matches are dropped and substring hits are listed. The normalizer's
+1-3 word limit and its 100-term cap exist for AI-generated custom lists and
+would cut curated titles ("Der Herr der Ringe"), so the limit is only
+applied with --max-tokens; the report counts what it would drop either way.
+
+Category file format (little-endian):
+
+    magic  b"SRWL"
+    u16    format version (1)
+    u16    reserved (0)
+    u32    n, the number of words
+    u32    offsets[n + 1] into the blob
+    bytes  blob: the UTF-8 words back to back
+
+Word i is blob[offsets[i]:offsets[i + 1]], so a loader can decode words
+lazily. Files are only rewritten when their bytes change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import statistics
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import stage_trace
+from asset_io import write_atomic
+
+ROOT = Path(__file__).resolve().parents[1]
+WORDS_DART = ROOT / "lib" / "data" / "words.dart"
+NORMALIZER_DART = ROOT / "lib" / "services" / "wordlist_normalizer.dart"
+OUT_DIR = ROOT / "assets" / "wordlists"
+
+MAGIC = b"SRWL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+# The limit wordlist_normalizer.dart applies to custom lists.
+CUSTOM_LIST_MAX_TOKENS = 3
+
+# Mirrors of WordlistNormalizer's expressions (Dart's \d is ASCII-only).
+LEADING_BULLET = re.compile(r"^\s*(?:[-*•]+|[0-9]+[.)]\s*)")
+WHITESPACE = re.compile(r"\s+")
+EMOJI = re.compile("[\U0001F300-\U0001FAFF]")
+
+# Rough Dart VM object sizes (64-bit, compressed pointers) for the start-up estimate.
+DART_OBJECT_ALIGNMENT = 16
+DART_STRING_HEADER = 16
+DART_ARRAY_HEADER = 16
+DART_POINTER = 4
+
+_ENUM = re.compile(r"enum\s+StirnratenCategory\s*\{([^}]*)\}")
+_WORDS_MAP = re.compile(r"static\s+const\s+Map<StirnratenCategory,\s*List<String>>\s+words\s*=\s*\{")
+_BLOCKED_SET = re.compile(r"_defaultBlockedTerms\s*=\s*<String>\{([^}]*)\}")
+_TOKEN = re.compile(
+    r"""(?P<space>\s+|//[^\n]*|/\*.*?\*/)
+      |(?P<string>r?(?:"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'))
+      |(?P<name>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)
+      |(?P<punct>[{}\[\]:,<>])""",
+    re.VERBOSE | re.DOTALL,
+)
+_ESCAPE = re.compile(r"\\(u\{[0-9A-Fa-f]+\}|u[0-9A-Fa-f]{4}|x[0-9A-Fa-f]{2}|.)", re.DOTALL)
+_SIMPLE_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f", "v": "\v"}
+
+
+class DartParseError(ValueError):
+    pass
+
+
+@dataclass
+class CategoryReport:
+    name: str
+    source_words: int
+    words: List[str] = field(default_factory=list)
+    duplicates: int = 0
+    emoji: int = 0
+    blocked: int = 0
+    empty: int = 0
+    too_long: int = 0
+    # Terms that contain a blocked word inside another word; they are kept.
+    flagged: List[str] = field(default_factory=list)
+    # Terms whose text changed (bullets, whitespace); they are kept.
+    rewritten: List[Tuple[str, str]] = field(default_factory=list)
+    asset_bytes: int = 0
+    changed: bool = False
+
+
+def _unescape(body: str) -> str:
+    def one(m: re.Match) -> str:
+        esc = m.group(1)
+        if esc.startswith("u{"):
+            return chr(int(esc[2:-1], 16))
+        if esc[0] in "ux" and len(esc) > 1:
+            return chr(int(esc[1:], 16))
+        return _SIMPLE_ESCAPES.get(esc, esc)
+
+    return _ESCAPE.sub(one, body)
+
+
+def _string_value(token: str, where: str) -> str:
+    if token.startswith("r"):
+        return token[2:-1]
+    body = token[1:-1]
+    if re.search(r"(?<!\\)(?:\\\\)*\$", body):
+        raise DartParseError(f"{where}: string interpolation is not supported: {token}")
+    return _unescape(body)
+
+
+def _tokens(text: str, pos: int) -> Iterator[Tuple[str, str, int]]:
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            line = text.count("\n", 0, pos) + 1
+            raise DartParseError(f"line {line}: unexpected {text[pos:pos + 20]!r}")
+        pos = m.end()
+        if m.lastgroup != "space":
+            yield m.lastgroup, m.group(), pos
+
+
+def _line(text: str, pos: int) -> str:
+    return f"line {text.count(chr(10), 0, pos) + 1}"
+
+
+@stage_trace.traced()
+def parse_words_dart(text: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """(enum category names, {category: raw words}) from words.dart."""
+    enum = _ENUM.search(text)
+    if enum is None:
+        raise DartParseError("enum StirnratenCategory not found")
+    categories = [name.strip() for name in enum.group(1).split(",") if name.strip()]
+    start = _WORDS_MAP.search(text)
+    if start is None:
+        raise DartParseError("StirnratenData.words map not found")
+
+    lists: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    key: Optional[str] = None
+    # Adjacent literals concatenate; a word ends at the next comma or bracket.
+    pending: Optional[str] = None
+    for kind, value, pos in _tokens(text, start.end()):
+        if current is None:
+            if kind == "punct" and value == "}":
+                return categories, lists
+            if kind == "name" and value.startswith("StirnratenCategory."):
+                key = value.split(".", 1)[1]
+            elif kind == "punct" and value == "[" and key is not None:
+                if key in lists:
+                    raise DartParseError(f"{_line(text, pos)}: category {key} is listed twice")
+                current = lists[key] = []
+            elif not (kind == "punct" and value in ":,<>" or value in ("const", "String")):
+                raise DartParseError(f"{_line(text, pos)}: unexpected {value!r} in the words map")
+            continue
+        if kind == "string":
+            pending = (pending or "") + _string_value(value, _line(text, pos))
+        elif kind == "punct" and value in ",]":
+            if pending is not None:
+                current.append(pending)
+                pending = None
+            if value == "]":
+                current, key = None, None
+        else:
+            raise DartParseError(f"{_line(text, pos)}: unexpected {value!r} in the {key} list")
+    raise DartParseError("words map is not closed")
+
+
+def blocked_terms(normalizer: Path) -> List[str]:
+    """The normalizer's default blocklist, read from its source so the two never drift apart."""
+    m = _BLOCKED_SET.search(normalizer.read_text(encoding="utf-8"))
+    if m is None:
+        raise DartParseError(f"{normalizer}: _defaultBlockedTerms not found")
+    return [_string_value(t, normalizer.name) for kind, t, _ in _tokens(m.group(1), 0) if kind == "string"]
+
+
+def normalize(
+    name: str, raw: Sequence[str], blocked: Sequence[str], max_tokens: Optional[int] = None
+) -> CategoryReport:
+    """WordlistNormalizer.normalize without the count limits (see the module docstring)."""
+    report = CategoryReport(name, len(raw))
+    seen = set()
+    for original in raw:
+        term = LEADING_BULLET.sub("", original.strip(), count=1)
+        term = WHITESPACE.sub(" ", term).strip()
+        if not term:
+            report.empty += 1
+            continue
+        if EMOJI.search(term):
+            report.emoji += 1
+            continue
+        if max_tokens is not None and len(term.split(" ")) > max_tokens:
+            report.too_long += 1
+            continue
+        lower = term.lower()
+        hits = [b for b in blocked if b in lower]
+        if any(re.search(rf"\b{re.escape(b)}\b", lower) for b in hits):
+            report.blocked += 1
+            continue
+        if lower in seen:
+            report.duplicates += 1
+            continue
+        seen.add(lower)
+        if max_tokens is None and len(term.split(" ")) > CUSTOM_LIST_MAX_TOKENS:
+            report.too_long += 1
+        if hits:
+            report.flagged.append(term)
+        if term != original:
+            report.rewritten.append((original, term))
+        report.words.append(term)
+    return report
+
+
+def encode_category(words: Sequence[str]) -> bytes:
+    encoded = [w.encode("utf-8") for w in words]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return (
+        HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded))
+        + struct.pack(f"<{len(offsets)}I", *offsets)
+        + b"".join(encoded)
+    )
+
+
+def decode_category(data: bytes) -> List[str]:
+    magic, version, _, n = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"not a version {FORMAT_VERSION} word list")
+    offsets = struct.unpack_from(f"<{n + 1}I", data, HEADER.size)
+    blob = data[HEADER.size + 4 * (n + 1) :]
+    return [blob[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(n)]
+
+
+def _aligned(size: int) -> int:
+    return -(-size // DART_OBJECT_ALIGNMENT) * DART_OBJECT_ALIGNMENT
+
+
+def dart_heap_bytes(words: Sequence[str]) -> int:
+    """Estimated Dart heap for a List<String> of words (one- or two-byte strings plus the array)."""
+    strings = sum(
+        _aligned(DART_STRING_HEADER + len(w) * (1 if all(ord(c) < 256 for c in w) else 2)) for w in words
+    )
+    return strings + _aligned(DART_ARRAY_HEADER + DART_POINTER * len(words))
+
+
+def _write_if_changed(path: Path, data: bytes, dry_run: bool) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    if not dry_run:
+        write_atomic(path, data)
+    return True
+
+
+@stage_trace.traced()
+def build(
+    words_dart: Path,
+    normalizer: Path,
+    out_dir: Path,
+    max_tokens: Optional[int] = None,
+    dry_run: bool = False,
+) -> Tuple[List[CategoryReport], List[str], int]:
+    """(per-category reports, issues, index.json bytes); writes the assets unless dry_run."""
+    text = words_dart.read_text(encoding="utf-8")
+    categories, lists = parse_words_dart(text)
+    blocked = blocked_terms(normalizer)
+    issues = [f"category {c} has no word list" for c in categories if c not in lists]
+    issues += [f"word list for unknown category {c}" for c in lists if c not in categories]
+
+    reports = []
+    index: Dict[str, Dict[str, object]] = {}
+    for name in categories:
+        report = normalize(name, lists.get(name, []), blocked, max_tokens)
+        data = encode_category(report.words)
+        report.asset_bytes = len(data)
+        report.changed = _write_if_changed(out_dir / f"{name}.bin", data, dry_run)
+        index[name] = {
+            "file": f"{name}.bin",
+            "count": len(report.words),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        reports.append(report)
+    index_data = (json.dumps({"format": FORMAT_VERSION, "categories": index}, indent=2) + "\n").encode("utf-8")
+    _write_if_changed(out_dir / "index.json", index_data, dry_run)
+    return reports, issues, len(index_data)
+
+
+def format_report(
+    reports: Sequence[CategoryReport], index_bytes: int, source_bytes: int, max_tokens: Optional[int]
+) -> str:
+    long_label = f">{max_tokens} words" if max_tokens is not None else f">{CUSTOM_LIST_MAX_TOKENS} words*"
+    lines = [f"  {'category':<14} {'words':>5} {'kept':>5} {'dupes':>5} {'other':>5} {long_label:>10} {'asset':>8}"]
+    for r in reports:
+        other = r.emoji + r.blocked + r.empty
+        mark = "" if r.changed else "  (unchanged)"
+        lines.append(
+            f"  {r.name:<14} {r.source_words:>5} {len(r.words):>5} {r.duplicates:>5} {other:>5} {r.too_long:>10}"
+            f" {r.asset_bytes:>7} B{mark}"
+        )
+    if max_tokens is None:
+        lines.append(f"  * kept; the custom-list limit would drop them (--max-tokens {CUSTOM_LIST_MAX_TOKENS}).")
+
+    every = [w for r in reports for w in r.words]
+    sizes = [r.asset_bytes for r in reports if r.words]
+    heaps = [dart_heap_bytes(r.words) for r in reports if r.words]
+    lines += [
+        "",
+        "  Start-up impact (Dart heap figures are estimates for a 64-bit VM):",
+        f"    const map in words.dart : {source_bytes:>8} B of source, {len(every)} strings"
+        f" live from start-up, ~{dart_heap_bytes(every)} B heap",
+        f"    assets/wordlists        : {sum(r.asset_bytes for r in reports) + index_bytes:>8} B total;"
+        f" start-up reads index.json ({index_bytes} B)",
+        f"    one category per game   : {statistics.median(sizes):>8.0f} B median, {max(sizes)} B max;"
+        f" ~{statistics.median(heaps):.0f} B median heap once decoded",
+    ]
+    rewritten = [pair for r in reports for pair in r.rewritten]
+    if rewritten:
+        original, term = rewritten[0]
+        lines.append(f"  {len(rewritten)} terms rewritten by the normalizer, e.g. {original!r} -> {term!r}")
+    flagged = [f"{r.name}: {w}" for r in reports for w in r.flagged]
+    if flagged:
+        lines.append(f"  kept despite a blocked substring (check these): {', '.join(flagged)}")
+    return "\n".join(lines)
+
+
+def map_source_bytes(text: str) -> int:
+    """Size of the words map's source, from its declaration to getWords()."""
+    start = _WORDS_MAP.search(text)
+    end = text.find("static List<String> getWords", start.end() if start else 0)
+    return len(text[start.start() : end].encode("utf-8")) if start and end > 0 else len(text.encode("utf-8"))
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile lib/data/words.dart into per-category word list assets.")
+    parser.add_argument(
+        "--words",
+        type=Path,
+        default=WORDS_DART,
+        help=f"Dart source with the word lists (default: {WORDS_DART.relative_to(ROOT)}).",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=OUT_DIR,
+        help=f"Output folder (default: {OUT_DIR.relative_to(ROOT)}).",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help=f"Drop terms with more words, like custom lists ({CUSTOM_LIST_MAX_TOKENS}); default: keep all.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report only; write nothing.")
+    stage_trace.add_arguments(parser, "build_wordlists")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with stage_trace.session(args, "build_wordlists"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    try:
+        reports, issues, index_bytes = build(args.words, NORMALIZER_DART, args.out, args.max_tokens, args.dry_run)
+    except DartParseError as exc:
+        sys.exit(f"Cannot read the word lists: {exc}")
+    for issue in issues:
+        print(f"Spec: {issue}")
+    source_bytes = map_source_bytes(args.words.read_text(encoding="utf-8"))
+    print(f"Word lists {'checked' if args.dry_run else 'written to'}: {args.out}")
+    print(format_report(reports, index_bytes, source_bytes, args.max_tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Check the fast paths of the generators against their exact references.
+
+generate_app_icons.py keeps the original per-pixel blend loop
+(--reference-engine) so the vectorized engine can be diffed against it.
+This runs both on a seeded random image (mostly bright, near-neutral
+pixels, so most of the border band actually blends) and on a real icon
+source, whole and in strips; every result must be pixel-identical.
+
+The mockup backgrounds blur their glows at reduced resolution. For every
+layout and device, the background is rendered with that blur and with a
+full-resolution one; they may differ by at most
+mockup_templates.BLUR_TOLERANCE levels per channel. The exit status is
+non-zero if any check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops
+
+import generate_app_icons as icons
+import generate_app_store_mockups as mockups
+import mockup_templates
+from mockup_layouts import DEVICES, place_on
+
+RANDOM_SIZE = 320
+STRIP_ROWS = 37
+
+
+def random_source(size: int, seed: int) -> Image.Image:
+    rng = icons.np.random.default_rng(seed)
+    base = rng.integers(215, 256, size=(size, size, 1), dtype=icons.np.uint8)
+    tint = rng.integers(-30, 31, size=(size, size, 3))
+    return Image.fromarray(icons.np.clip(base + tint, 0, 255).astype(icons.np.uint8), "RGB")
+
+
+def max_difference(a: Image.Image, b: Image.Image) -> int:
+    return max(hi for _, hi in ImageChops.difference(a, b).getextrema())
+
+
+def compare(name: str, src: Image.Image) -> Tuple[str, int, float, float]:
+    gradient = icons.make_gradient(max(src.size)).resize(src.size)
+    engines: List[Callable[[], Image.Image]] = [
+        lambda: icons._blend_pixels_reference(src, gradient),
+        lambda: icons._blend_pixels_array(src, gradient),
+        lambda: icons._blend_strips(src, gradient, STRIP_ROWS),
+    ]
+    results, seconds = [], []
+    for engine in engines:
+        start = time.perf_counter()
+        results.append(engine())
+        seconds.append(time.perf_counter() - start)
+    diff = max(max_difference(results[0], other) for other in results[1:])
+    return name, diff, seconds[0], seconds[1]
+
+
+def compare_glows() -> List[Tuple[str, int, float, float]]:
+    """(name, max diff, exact seconds, reduced seconds) per layout and device background."""
+    cases = []
+    for layout_name, layout in mockups.LAYOUTS.items():
+        for device in DEVICES:
+            p = place_on(layout, device)
+            seconds = []
+            results = []
+            for exact in (True, False):
+                start = time.perf_counter()
+                results.append(mockup_templates._render_background(p.size, p.top, p.bottom, p.glows, exact))
+                seconds.append(time.perf_counter() - start)
+            cases.append((f"{layout_name} on {device}", max_difference(*results), seconds[0], seconds[1]))
+    return cases
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Diff the array blend engine against the reference loop.")
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=icons.MASTER_OUTPUT,
+        help=f"Icon source to prepare and blend (default: {icons.MASTER_OUTPUT.relative_to(icons.ROOT)}).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random test image (default: 0).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if icons.np is None:
+        sys.exit("numpy is not installed; only the reference engine is available.")
+    cases = [
+        compare(f"random {RANDOM_SIZE}px (seed {args.seed})", random_source(RANDOM_SIZE, args.seed)),
+        compare(str(args.source), icons.prep_source(args.source)),
+    ]
+    for name, diff, reference, array in cases:
+        status = "ok    " if diff == 0 else "FAILED"
+        timing = f"reference {reference * 1000:8.1f} ms  array {array * 1000:7.1f} ms"
+        print(f"  {status} max diff {diff:>3}  {timing}  {name}")
+    glows = compare_glows()
+    for name, diff, exact, reduced in glows:
+        status = "ok    " if diff <= mockup_templates.BLUR_TOLERANCE else "FAILED"
+        timing = f"exact {exact * 1000:8.1f} ms  reduced {reduced * 1000:7.1f} ms"
+        print(f"  {status} max diff {diff:>3}  {timing}  glows: {name}")
+    if any(diff for _, diff, _, _ in cases):
+        sys.exit("The array engine does not match the reference engine.")
+    if any(diff > mockup_templates.BLUR_TOLERANCE for _, diff, _, _ in glows):
+        sys.exit(f"The reduced glow blur differs by more than {mockup_templates.BLUR_TOLERANCE} levels.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Fetch the mockup fonts into .cache/mockup_fonts and pin them.
+
+All FONT_URLS are downloaded at once in parallel, or taken from a local
+directory or .zip/.tar(.gz) archive with --from on air-gapped machines (file
+names may be the cache names or the upstream Google Fonts names). Every
+file is checked against the sha256 in scripts/mockup_fonts.lock.json.
+A mismatch is an error unless --update-lock re-pins it. Fonts the lockfile
+lists without a checksum are pinned by the first successful fetch; commit
+the updated lockfile so every machine renders with the same font files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+from urllib.request import urlopen
+
+from asset_io import write_atomic
+from build_cache import file_sha256
+from mockup_fonts import FONT_CACHE_DIR, FONT_LOCK, FONT_URLS, load_lock
+
+ROOT = Path(__file__).resolve().parents[1]
+LOCK_VERSION = 1
+# Anything smaller is an error page, not a font.
+MIN_FONT_BYTES = 10_000
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    name: str
+    source: str
+    size: int = 0
+    sha256: str = ""
+    error: Optional[str] = None
+
+
+def accepted_names(name: str) -> Set[str]:
+    """The cache name plus the upstream file name (e.g. Fredoka[wdth,wght].ttf)."""
+    return {name, unquote(Path(urlparse(FONT_URLS[name]).path).name)}
+
+
+def _read_local(name: str, source: Path) -> Optional[bytes]:
+    wanted = accepted_names(name)
+    if source.is_dir():
+        hit = next((p for p in sorted(source.rglob("*")) if p.name in wanted and p.is_file()), None)
+        return hit.read_bytes() if hit else None
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            member = next((m for m in zf.namelist() if Path(m).name in wanted), None)
+            return zf.read(member) if member else None
+    if tarfile.is_tarfile(source):
+        with tarfile.open(source) as tf:
+            member = next((m for m in tf.getmembers() if m.isfile() and Path(m.name).name in wanted), None)
+            f = tf.extractfile(member) if member else None
+            return f.read() if f else None
+    raise ValueError(f"{source} is neither a directory nor a .zip/.tar archive.")
+
+
+def _download(url: str, timeout: float) -> bytes:
+    with urlopen(url, timeout=timeout) as r:
+        return r.read()
+
+
+def fetch_font(name: str, expected: Optional[str], source: Optional[Path], force: bool, timeout: float) -> FetchResult:
+    dest = FONT_CACHE_DIR / name
+    if not force and dest.exists():
+        sha = file_sha256(dest)
+        if expected is None or sha == expected:
+            return FetchResult(name, "cached", dest.stat().st_size, sha)
+
+    origin = "import" if source is not None else "download"
+    try:
+        data = _read_local(name, source) if source is not None else _download(FONT_URLS[name], timeout)
+    except Exception as exc:
+        return FetchResult(name, origin, error=f"{type(exc).__name__}: {exc}")
+    if data is None:
+        looked_for = ", ".join(sorted(accepted_names(name)))
+        return FetchResult(name, origin, error=f"not found in {source} (looked for {looked_for})")
+    if len(data) < MIN_FONT_BYTES:
+        return FetchResult(name, origin, len(data), error=f"only {len(data)} bytes; not a font file")
+
+    sha = hashlib.sha256(data).hexdigest()
+    if expected is not None and sha != expected:
+        return FetchResult(name, origin, len(data), sha, f"sha256 {sha[:12]} does not match pinned {expected[:12]}")
+    write_atomic(dest, data)
+    return FetchResult(name, origin, len(data), sha)
+
+
+def write_lock(results: List[FetchResult], path: Path = FONT_LOCK) -> None:
+    fonts = {r.name: {"url": FONT_URLS[r.name], "sha256": r.sha256, "size": r.size} for r in results}
+    payload = {"version": LOCK_VERSION, "fonts": dict(sorted(fonts.items()))}
+    write_atomic(path, (json.dumps(payload, indent=2) + "\n").encode("utf-8"))
+
+
+def format_report(results: List[FetchResult]) -> str:
+    lines = []
+    for r in results:
+        status = "ok    " if r.error is None else "FAILED"
+        detail = r.error if r.error is not None else f"{r.size:>9} B  sha256 {r.sha256[:12]}"
+        lines.append(f"  {status} {r.name:<18} {r.source:<8} {detail}")
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch and pin the fonts used by generate_app_store_mockups.py.")
+    parser.add_argument(
+        "--from",
+        dest="source",
+        type=Path,
+        metavar="DIR_OR_ARCHIVE",
+        help="Take the fonts from a local directory or .zip/.tar archive instead of downloading.",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-fetch fonts that are already cached and verified.")
+    parser.add_argument(
+        "--update-lock",
+        action="store_true",
+        help=f"Accept new checksums and rewrite {FONT_LOCK.relative_to(ROOT)}.",
+    )
+    parser.add_argument("--timeout", type=float, default=20.0, help="Per-download timeout in seconds (default: 20).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    lock = load_lock()
+    pins: Dict[str, Optional[str]] = {
+        name: None if args.update_lock else lock.get(name, {}).get("sha256") for name in FONT_URLS
+    }
+    with ThreadPoolExecutor(max_workers=len(FONT_URLS)) as pool:
+        futures = [
+            pool.submit(fetch_font, name, pins[name], args.source, args.force, args.timeout) for name in FONT_URLS
+        ]
+        results = [f.result() for f in futures]
+
+    print(f"Fonts in {FONT_CACHE_DIR}:")
+    print(format_report(results))
+    failed = [r for r in results if r.error is not None]
+    if failed:
+        sys.exit(f"{len(failed)} font(s) failed; the lockfile was not changed.")
+    unpinned = [name for name in FONT_URLS if not lock.get(name, {}).get("sha256")]
+    if args.update_lock or unpinned or set(lock) != set(FONT_URLS):
+        write_lock(results)
+        print(f"Pinned {len(results)} fonts in {FONT_LOCK.relative_to(ROOT)}.")
+    else:
+        print(f"All fonts match {FONT_LOCK.relative_to(ROOT)}.")
+
+
+if __name__ == "__main__":
+    main()
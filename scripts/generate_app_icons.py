@@ -13,16 +13,35 @@ Why this script exists:
 from __future__ import annotations
 
 import argparse
+import math
+import sys
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from PIL import Image, ImageEnhance, ImageFilter
 
+import icon_specs
+import png_encode
+import stage_trace
+import tiled
+from build_cache import BuildCache, code_fingerprint, file_sha256
+from gradients import bilinear_gradient
+from icon_export import ExportTarget, export_targets, format_report
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the per-pixel reference engine still works without it.
+    np = None
+
 ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_INPUT = Path.home() / "Downloads" / "97bcd647-706e-421e-9637-55a96b932aab.png"
 MASTER_OUTPUT = ROOT / "assets/images/App_Icon.png"
+CACHE_DIR = ROOT / ".cache" / "app_icons"
 IOS_DIR = ROOT / "ios/Runner/Assets.xcassets/AppIcon.appiconset"
 ANDROID_DIR = ROOT / "android/app/src/main/res"
+MACOS_DIR = ROOT / "macos/Runner/Assets.xcassets/AppIcon.appiconset"
+WEB_DIR = ROOT / "web"
+WINDOWS_RUNNER_DIR = ROOT / "windows/runner"
 
 # Warm palette aligned with the game's current visual language.
 TL = (255, 214, 40)
@@ -30,59 +49,54 @@ TR = (255, 134, 56)
 BL = (255, 139, 36)
 BR = (255, 75, 118)
 
+# Slight zoom improves legibility for small icon sizes.
+SOURCE_ZOOM = 1.03
+
 
 def clamp(v: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return lo if v < lo else hi if v > hi else v
 
 
-def lerp(a: float, b: float, t: float) -> float:
-    return a + (b - a) * t
+@stage_trace.traced()
+def make_gradient(size: int = 1024) -> Image.Image:
+    return bilinear_gradient((size, size), TL, TR, BL, BR)
 
 
-def mix_rgb(a: Tuple[int, int, int], b: Tuple[int, int, int], t: float) -> Tuple[int, int, int]:
-    return (
-        int(round(lerp(a[0], b[0], t))),
-        int(round(lerp(a[1], b[1], t))),
-        int(round(lerp(a[2], b[2], t))),
-    )
+@stage_trace.traced()
+def prep_source(source: Path, strip_rows: Optional[int] = None) -> Image.Image:
+    """Load, normalize to 1024px and zoom; strip_rows processes in strips (see tiled.py)."""
+    zoom = SOURCE_ZOOM
+    zw = int(round(1024 * zoom))
+    zh = int(round(1024 * zoom))
+    ox = (zw - 1024) // 2
+    oy = (zh - 1024) // 2
 
+    if strip_rows is not None:
+        src = Image.open(source)
+        if src.size != (1024, 1024):
+            src = tiled.resize(src, (1024, 1024), mode="RGB", rows=strip_rows)
+        # Resizing the zoom crop box directly equals resize-to-(zw, zh) then crop.
+        box = (ox * 1024 / zw, oy * 1024 / zh, (ox + 1024) * 1024 / zw, (oy + 1024) * 1024 / zh)
+        return tiled.resize(src, (1024, 1024), box=box, mode="RGB", rows=strip_rows)
 
-def make_gradient(size: int = 1024) -> Image.Image:
-    grad = Image.new("RGB", (size, size))
-    pix = grad.load()
-    last = float(size - 1)
-    for y in range(size):
-        ty = y / last
-        left = mix_rgb(TL, BL, ty)
-        right = mix_rgb(TR, BR, ty)
-        for x in range(size):
-            tx = x / last
-            pix[x, y] = mix_rgb(left, right, tx)
-    return grad
-
-
-def prep_source(source: Path) -> Image.Image:
     src = Image.open(source).convert("RGB")
     if src.size != (1024, 1024):
         src = src.resize((1024, 1024), Image.Resampling.LANCZOS)
 
-    # Slight zoom improves legibility for small icon sizes.
-    zoom = 1.03
-    zw = int(round(1024 * zoom))
-    zh = int(round(1024 * zoom))
-    ox = (zw - 1024) // 2
-    oy = (zh - 1024) // 2
     src = src.resize((zw, zh), Image.Resampling.LANCZOS).crop((ox, oy, ox + 1024, oy + 1024))
     return src
 
 
-def blend_edge_canvas(src: Image.Image, gradient: Image.Image) -> Image.Image:
+EDGE_SOFT = 220.0
+
+
+def _blend_pixels_reference(src: Image.Image, gradient: Image.Image) -> Image.Image:
     out = Image.new("RGB", src.size)
     src_px = src.load()
     bg_px = gradient.load()
     out_px = out.load()
     w, h = src.size
-    edge_soft = 220.0
+    edge_soft = EDGE_SOFT
 
     for y in range(h):
         for x in range(w):
@@ -113,77 +127,234 @@ def blend_edge_canvas(src: Image.Image, gradient: Image.Image) -> Image.Image:
                 int(round(g * (1.0 - alpha) + gb * alpha)),
                 int(round(b * (1.0 - alpha) + bb * alpha)),
             )
+    return out
+
+
+# Only pixels with r + g + b above this can blend: both the white and the glow
+# ramps start at a brightness of 225 (see the reference loop).
+_BLEND_MIN_SUM = 3 * 225
+
+
+def _band_rects(rows: int, w: int, top: int, h: int) -> List[Tuple[int, int, int, int]]:
+    """Disjoint (y0, y1, x0, x1) rectangles of a strip that lie within EDGE_SOFT of the image border."""
+    band = int(math.ceil(EDGE_SOFT))
+    upper = min(rows, max(0, band - top))
+    lower = max(upper, min(rows, h - band - top))
+    rects = [(0, upper, 0, w), (lower, rows, 0, w)]
+    left = min(band, w)
+    rects += [(upper, lower, 0, left), (upper, lower, max(left, w - band), w)]
+    return [r for r in rects if r[0] < r[1] and r[2] < r[3]]
+
+
+def _blend_pixels_array(
+    src: Image.Image, gradient: Image.Image, top: int = 0, height: Optional[int] = None
+) -> Image.Image:
+    # Same math as the reference loop, in float64 and in the same operation
+    # order so results round the same way, but only for the pixels that can
+    # change: bright ones (a uint16 test) inside the border band. Everything
+    # else is copied unchanged.
+    # src/gradient may be a strip starting at row `top` of an image `height` rows tall.
+    arr = np.asarray(src.convert("RGB"))
+    rows, w = arr.shape[:2]
+    h = rows if height is None else height
+
+    ys, xs = [], []
+    for y0, y1, x0, x1 in _band_rects(rows, w, top, h):
+        py, px = np.nonzero(arr[y0:y1, x0:x1].sum(axis=2, dtype=np.uint16) > _BLEND_MIN_SUM)
+        ys.append(py + y0)
+        xs.append(px + x0)
+    ys, xs = np.concatenate(ys or [np.empty(0, np.intp)]), np.concatenate(xs or [np.empty(0, np.intp)])
+    out = arr.copy()
+    if ys.size == 0:
+        return Image.fromarray(out, "RGB")
+
+    rgb = arr[ys, xs].astype(np.float64)
+    bg = np.asarray(gradient.convert("RGB"))[ys, xs].astype(np.float64)
+
+    br = rgb.sum(axis=1) / 3.0
+    chroma = rgb.max(axis=1) - rgb.min(axis=1)
+
+    gy = ys + top
+    dist = np.minimum(np.minimum(xs, (w - 1) - xs), np.minimum(gy, (h - 1) - gy))
+    edge = np.clip((EDGE_SOFT - dist) / EDGE_SOFT, 0.0, 1.0)
+
+    white = np.clip((br - 225.0) / 30.0, 0.0, 1.0)
+    neutral = np.clip((40.0 - chroma) / 40.0, 0.0, 1.0)
+    alpha = edge * white * neutral
+
+    bright_glow = edge * np.clip((br - 244.0) / 10.0, 0.0, 1.0) * 0.65
+    alpha = np.clip(np.maximum(alpha, bright_glow), 0.0, 1.0)
+
+    blend = alpha > 0.001
+    a = alpha[blend][:, np.newaxis]
+    out[ys[blend], xs[blend]] = np.rint(rgb[blend] * (1.0 - a) + bg[blend] * a).astype(np.uint8)
+    return Image.fromarray(out, "RGB")
+
+
+UNSHARP = ImageFilter.UnsharpMask(radius=1.3, percent=105, threshold=2)
+
+
+def _blend_strips(src: Image.Image, gradient: Image.Image, rows: int) -> Image.Image:
+    out = Image.new("RGB", src.size)
+    for y0, y1 in tiled.strips(src.height, rows):
+        box = (0, y0, src.width, y1)
+        out.paste(_blend_pixels_array(src.crop(box), gradient.crop(box), y0, src.height), (0, y0))
+    return out
+
+
+@stage_trace.traced()
+def blend_edge_canvas(
+    src: Image.Image,
+    gradient: Image.Image,
+    reference: bool = False,
+    strip_rows: Optional[int] = None,
+) -> Image.Image:
+    if strip_rows is not None and not reference and np is not None:
+        out = _blend_strips(src, gradient, strip_rows)
+        out = tiled.color(out, 1.07, strip_rows)
+        out = tiled.contrast(out, 1.05, strip_rows)
+        return tiled.apply(out, lambda band: band.filter(UNSHARP), tiled.blur_halo(UNSHARP.radius), strip_rows)
+
+    if reference or np is None:
+        out = _blend_pixels_reference(src, gradient)
+    else:
+        out = _blend_pixels_array(src, gradient)
 
     out = ImageEnhance.Color(out).enhance(1.07)
     out = ImageEnhance.Contrast(out).enhance(1.05)
-    out = out.filter(ImageFilter.UnsharpMask(radius=1.3, percent=105, threshold=2))
+    out = out.filter(UNSHARP)
     return out
 
 
-def save_master(img: Image.Image, path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(path, format="PNG", optimize=True)
-
-
-def export_ios(master: Image.Image) -> None:
-    specs = {
-        "Icon-App-20x20@1x.png": 20,
-        "Icon-App-20x20@2x.png": 40,
-        "Icon-App-20x20@3x.png": 60,
-        "Icon-App-29x29@1x.png": 29,
-        "Icon-App-29x29@2x.png": 58,
-        "Icon-App-29x29@3x.png": 87,
-        "Icon-App-40x40@1x.png": 40,
-        "Icon-App-40x40@2x.png": 80,
-        "Icon-App-40x40@3x.png": 120,
-        "Icon-App-60x60@2x.png": 120,
-        "Icon-App-60x60@3x.png": 180,
-        "Icon-App-76x76@1x.png": 76,
-        "Icon-App-76x76@2x.png": 152,
-        "Icon-App-83.5x83.5@2x.png": 167,
-        "Icon-App-1024x1024@1x.png": 1024,
-    }
-    IOS_DIR.mkdir(parents=True, exist_ok=True)
-    for name, size in specs.items():
-        out = master if size == 1024 else master.resize((size, size), Image.Resampling.LANCZOS)
-        out.save(IOS_DIR / name, format="PNG", optimize=True)
-
-
-def export_android(master: Image.Image) -> None:
-    specs: Dict[str, int] = {
-        "mipmap-mdpi/ic_launcher.png": 48,
-        "mipmap-hdpi/ic_launcher.png": 72,
-        "mipmap-xhdpi/ic_launcher.png": 96,
-        "mipmap-xxhdpi/ic_launcher.png": 144,
-        "mipmap-xxxhdpi/ic_launcher.png": 192,
-    }
-    for rel, size in specs.items():
-        dst = ANDROID_DIR / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        master.resize((size, size), Image.Resampling.LANCZOS).save(dst, format="PNG", optimize=True)
-
-
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Generate iOS/Android app icons from a 1024x1024 source PNG.")
+@stage_trace.traced()
+def platform_targets() -> Tuple[List[ExportTarget], List[str]]:
+    targets: List[ExportTarget] = []
+    issues: List[str] = []
+    for found, problems in (
+        icon_specs.appiconset_targets(IOS_DIR),
+        icon_specs.android_targets(ANDROID_DIR),
+        icon_specs.appiconset_targets(MACOS_DIR),
+        icon_specs.web_targets(WEB_DIR),
+        icon_specs.windows_targets(WINDOWS_RUNNER_DIR),
+    ):
+        targets.extend(found)
+        issues.extend(problems)
+    return targets, issues
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate iOS/Android/macOS/web/Windows app icons from a 1024x1024 source PNG."
+    )
     parser.add_argument(
         "--source",
         type=Path,
         help="Path to source PNG (defaults to ~/Downloads/<latest icon candidate>).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--reference-engine",
+        action="store_true",
+        help="Use the original per-pixel blend loop instead of the array engine (slow; for diffing).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for resizing/encoding (defaults to the CPU count).",
+    )
+    png_encode.add_arguments(parser)
+    tiled.add_arguments(parser)
+    stage_trace.add_arguments(parser, "generate_app_icons")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Rebuild every stage and target, ignoring {CACHE_DIR.relative_to(ROOT)}.",
+    )
+    return parser.parse_args(argv)
+
+
+@stage_trace.traced()
+def build_master(
+    source: Path,
+    cache: BuildCache,
+    prep_key: Optional[str],
+    master_key: str,
+    reference: bool,
+    strip_rows: Optional[int] = None,
+) -> Image.Image:
+    master = cache.load_image("master", master_key)
+    if master is not None:
+        return master
+    if prep_key is None:
+        # The source is the generated master and its stage image is gone: its pixels are the master.
+        master = Image.open(source).convert("RGB")
+        cache.store_image("master", master_key, master)
+        return master
+
+    src = cache.load_image("prep", prep_key)
+    if src is None:
+        src = prep_source(source, strip_rows)
+        cache.store_image("prep", prep_key, src)
+    gradient = make_gradient(1024)
+    master = blend_edge_canvas(src, gradient, reference=reference, strip_rows=strip_rows)
+    cache.store_image("master", master_key, master)
+    return master
 
 
-def main() -> None:
-    args = parse_args()
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with stage_trace.session(args, "generate_app_icons"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
     source = args.source or (DEFAULT_INPUT if DEFAULT_INPUT.exists() else MASTER_OUTPUT)
-    src = prep_source(source)
-    gradient = make_gradient(1024)
-    master = blend_edge_canvas(src, gradient)
-    save_master(master, MASTER_OUTPUT)
-    export_ios(master)
-    export_android(master)
+    cache = BuildCache(CACHE_DIR, enabled=not args.no_cache)
+    # Every local module the pipeline imports (encoding, specs, shared memory, cache) is part of the key.
+    code = code_fingerprint(Path(__file__))
+    strip_rows = tiled.rows_from_args(args)
+    prep_key: Optional[str]
+    if source.resolve() == MASTER_OUTPUT.resolve() and cache.produced(MASTER_OUTPUT):
+        # Rebuilding from our own output would re-apply the zoom on every run, so
+        # the master stage that produced it is reused; targets are still checked.
+        prep_key = None
+        master_key = cache.stage_of(MASTER_OUTPUT) or cache.key("master", file_sha256(MASTER_OUTPUT))
+        print(f"Source is the generated master {MASTER_OUTPUT.relative_to(ROOT)}; reusing its master stage.")
+    else:
+        # Tiled resizes may differ from whole-image ones by one level on a few pixels.
+        prep_key = cache.key("prep", file_sha256(source), SOURCE_ZOOM, code, strip_rows is not None)
+        master_key = cache.key("master", prep_key, (TL, TR, BL, BR), EDGE_SOFT, args.reference_engine)
+
+    # One pass over the master and every platform: shared renditions are only
+    # encoded once (the master PNG is the 1024 iOS icon's bytes).
+    platform, issues = platform_targets()
+    targets = [ExportTarget(MASTER_OUTPUT, 1024)] + platform
+    for issue in issues:
+        print(f"Spec: {issue}")
+    # Target keys only depend on the stage keys, so a no-op run never decodes anything.
+    encode = png_encode.options_from_args(args)
+    keys = {t.path: cache.key(master_key, code, t.kind, t.size, encode.strategy, encode.max_bytes) for t in targets}
+    with stage_trace.span("cache_check", targets=len(targets)) as info:
+        stale = [t for t in targets if not cache.is_fresh(t.path, keys[t.path])]
+        info["stale"] = len(stale)
     print(f"Built icons from: {source}")
+    if not stale:
+        print(f"Icons up to date ({len(targets)} targets, cache: {CACHE_DIR.relative_to(ROOT)}).")
+        return
+
+    master = build_master(source, cache, prep_key, master_key, args.reference_engine, strip_rows)
+    # cProfile only sees this process, so keep the work in it.
+    workers = 1 if args.cprofile else args.workers
+    # Maskable web icons bleed into the same gradient the edge canvas is blended with.
+    results = export_targets(master, stale, workers=workers, options=encode, backdrop=make_gradient(1024))
+    for r in results:
+        if not r.over_budget:
+            cache.record(r.target.path, keys[r.target.path], stage=master_key)
+    cache.save()
     print(f"Master icon: {MASTER_OUTPUT}")
+    print(format_report(results, ROOT))
+    print(f"  {len(targets) - len(stale)} targets up to date, stage cache hits {cache.hits}, misses {cache.misses}")
+    if any(r.over_budget for r in results):
+        sys.exit(f"Some icons exceed --max-bytes={encode.max_bytes}.")
 
 
 if __name__ == "__main__":
@@ -2,218 +2,106 @@
 """
 Generate App Store marketing mockups with frontal phone renders.
 
-This script is intentionally conservative: it keeps the 2 existing mockups in
-docs/app_store_mockups and generates exactly 3 additional portrait mockups from
-the latest screenshots in ~/Downloads, so the folder ends up with exactly 5
-images total.
+What to render is declared in a JSON manifest (scripts/app_store_mockups.json
+by default): screenshot, title, subtitle, layout and output name per entry.
+Entries render in a process pool; a failing entry is reported without
+aborting the rest of the batch. By default the manifest keeps the 2 existing
+mockups in docs/app_store_mockups and generates 3 portrait mockups from the
+latest screenshots in ~/Downloads, so the folder ends up with exactly 5 images.
+
+A manifest may also list "devices" and "locales"; every mockup is then
+rendered for each combination (see load_manifest) in the same pool run.
+scripts/app_store_submission.json renders the full App Store Connect set
+(6.9" and 6.5" iPhone, 13" iPad).
+
+--draft previews a manifest: every mockup at 1/4 scale with fast
+resampling and PNG compression, written to .cache/mockup_drafts/<manifest>
+with an index.html contact sheet. Layouts are resolution-independent (see
+mockup_layouts), so a draft is the final composition, only smaller. Without
+the flag the exact full-resolution render runs.
 """
 
 from __future__ import annotations
 
+import argparse
+import html
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
-from urllib.request import urlopen
-
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+import mockup_fonts
+import mockup_templates
+import png_encode
+import screen_ingest
+import stage_trace
+import tiled
+from asset_io import default_workers, write_atomic
+from gradients import linear_gradient
+from mockup_layouts import DEVICES, REFERENCE_DEVICE, Caption, MockupLayout, canvas_size, place_on
+from mockup_templates import Glow, LayerKey, background_key, chrome_key, composite_phone_chrome
+from mockup_text import TextLayout, fit_text, wrap_words
+from screen_ingest import fit_screen
+from shared_image import SharedImage, SharedImages, open_shared
 
 ROOT = Path(__file__).resolve().parents[1]
 DOWNLOADS = Path.home() / "Downloads"
 OUT_DIR = ROOT / "docs" / "app_store_mockups"
-FONT_CACHE_DIR = ROOT / ".cache" / "mockup_fonts"
-
-SRC_HOME = DOWNLOADS / "IMG_4259.PNG"
-SRC_CATEGORIES = DOWNLOADS / "IMG_4260.PNG"
-SRC_GAMEPLAY = DOWNLOADS / "IMG_4261.PNG"
-SRC_GAMEPLAY_ALT = DOWNLOADS / "IMG_4267.PNG"
-SRC_SETTINGS = DOWNLOADS / "IMG_4263.PNG"
-SRC_RESULTS = DOWNLOADS / "IMG_4265.PNG"
-
-# New (Feb 2026) screenshots from current UI.
-SRC_CATEGORIES_SETTINGS_NEW = DOWNLOADS / "IMG_4275.PNG"
-SRC_AI_WORDLIST_NEW = DOWNLOADS / "IMG_4276.PNG"
-SRC_CUSTOM_WORDLISTS_NEW = DOWNLOADS / "IMG_4277.PNG"
-
-PORTRAIT_SIZE = (1290, 2796)
-LANDSCAPE_SIZE = (2796, 1290)
-
-FREDOKA_VAR_NAME = "Fredoka-Var.ttf"
-NUNITO_VAR_NAME = "Nunito-Var.ttf"
-
-# Remove iOS status bar area (time, signal, battery) from portrait screenshots.
-# Ratio is conservative to avoid cutting useful UI content.
-STATUS_BAR_CROP_RATIO = 0.055
-
-# Google Fonts raw (open-source). Download on demand into .cache so the script is repeatable.
-FONT_URLS = {
-    # Variable fonts (supported by Pillow / FreeType on macOS).
-    FREDOKA_VAR_NAME: "https://raw.githubusercontent.com/google/fonts/main/ofl/fredoka/Fredoka%5Bwdth,wght%5D.ttf",
-    NUNITO_VAR_NAME: "https://raw.githubusercontent.com/google/fonts/main/ofl/nunito/Nunito%5Bwght%5D.ttf",
-}
-
-
-def _download_font(name: str) -> Path | None:
-    url = FONT_URLS.get(name)
-    if not url:
-        return None
-    try:
-        FONT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        dest = FONT_CACHE_DIR / name
-        if dest.exists() and dest.stat().st_size > 10_000:
-            return dest
-        with urlopen(url, timeout=12) as r:
-            data = r.read()
-        if len(data) < 10_000:
-            return None
-        dest.write_bytes(data)
-        return dest
-    except Exception:
-        return None
-
-
-def _resolve_font_path(candidate: str) -> Path | None:
-    # Absolute path.
-    p = Path(candidate)
-    if p.is_absolute() and p.exists():
-        return p
-
-    # Cache.
-    cached = FONT_CACHE_DIR / candidate
-    if cached.exists():
-        return cached
-
-    # Try to download by known name.
-    downloaded = _download_font(candidate)
-    if downloaded is not None and downloaded.exists():
-        return downloaded
-
-    # Try common font dirs (in case user has it installed).
-    for base in (
-        Path("/System/Library/Fonts"),
-        Path("/System/Library/Fonts/Supplemental"),
-        Path("/Library/Fonts"),
-        Path.home() / "Library" / "Fonts",
-    ):
-        hit = next(base.glob(f"*{candidate.replace('.ttf','')}*"), None)
-        if hit and hit.exists():
-            return hit
-    return None
+DEFAULT_MANIFEST = Path(__file__).resolve().with_name("app_store_mockups.json")
+DRAFT_DIR = ROOT / ".cache" / "mockup_drafts"
+DRAFT_SCALE = 0.25
+
+# A screenshot file (ingested and cached) or an already decoded image.
+Screenshot = Union[Path, Image.Image]
+
+# Set per process by configure(); None renders screenshots untiled.
+_strip_rows: Optional[int] = None
+_draft = False
+
+
+def configure(
+    template_dir: Optional[Path],
+    strip_rows: Optional[int] = None,
+    tracing: bool = False,
+    screen_dir: Optional[Path] = None,
+    layers: Optional[Dict[LayerKey, SharedImage]] = None,
+    draft: bool = False,
+    allow_fallback_fonts: bool = False,
+) -> None:
+    """Per-process render settings; also the pool initializer (layers: shared template layers)."""
+    global _strip_rows, _draft
+    _strip_rows = strip_rows
+    _draft = draft
+    mockup_fonts.configure(allow_fallback_fonts)
+    mockup_templates.configure(template_dir)
+    if layers:
+        mockup_templates.preload({key: open_shared(handle) for key, handle in layers.items()})
+    screen_ingest.configure(screen_dir)
+    stage_trace.enable(tracing)
 
 
 def load_font_bold(size: int) -> ImageFont.ImageFont:
-    # Title font (Fredoka) with a bold weight.
-    try:
-        path = _resolve_font_path(FREDOKA_VAR_NAME)
-        if path and path.exists():
-            font = ImageFont.truetype(str(path), size=size)
-            if hasattr(font, "set_variation_by_axes"):
-                # axes: Weight (300..700), Width (75..125)
-                font.set_variation_by_axes([700, 100])
-            return font
-    except Exception:
-        pass
-
-    # Fallbacks.
-    for cand in (
-        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-        "/System/Library/Fonts/Supplemental/Arial.ttf",
-    ):
-        path = _resolve_font_path(cand)
-        if path and path.exists():
-            return ImageFont.truetype(str(path), size=size)
-    return ImageFont.load_default()
+    return mockup_fonts.get_font(mockup_fonts.TITLE, size)
 
 
 def load_font_regular(size: int) -> ImageFont.ImageFont:
-    # Subtitle font (Nunito) with a semibold-ish weight.
-    try:
-        path = _resolve_font_path(NUNITO_VAR_NAME)
-        if path and path.exists():
-            font = ImageFont.truetype(str(path), size=size)
-            if hasattr(font, "set_variation_by_axes"):
-                # axis: Weight (200..1000)
-                font.set_variation_by_axes([650])
-            return font
-    except Exception:
-        pass
-
-    # Fallbacks.
-    for cand in ("/System/Library/Fonts/Supplemental/Arial.ttf",):
-        path = _resolve_font_path(cand)
-        if path and path.exists():
-            return ImageFont.truetype(str(path), size=size)
-    return ImageFont.load_default()
+    return mockup_fonts.get_font(mockup_fonts.BODY, size)
 
 
 def gradient_canvas(size: Tuple[int, int], c1: Tuple[int, int, int], c2: Tuple[int, int, int]) -> Image.Image:
-    w, h = size
-    canvas = Image.new("RGB", size)
-    pix = canvas.load()
-    for y in range(h):
-        t = y / max(1, h - 1)
-        r = int(c1[0] * (1 - t) + c2[0] * t)
-        g = int(c1[1] * (1 - t) + c2[1] * t)
-        b = int(c1[2] * (1 - t) + c2[2] * t)
-        for x in range(w):
-            pix[x, y] = (r, g, b)
-    return canvas
-
-
-def add_soft_glow(base: Image.Image, xy: Tuple[int, int], radius: int, color: Tuple[int, int, int, int]) -> None:
-    glow = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(glow)
-    x, y = xy
-    gdraw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
-    glow = glow.filter(ImageFilter.GaussianBlur(radius=80))
-    base.alpha_composite(glow)
-
-
-def fit_cover(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
-    src_w, src_h = img.size
-    dst_w, dst_h = size
-    src_ratio = src_w / src_h
-    dst_ratio = dst_w / dst_h
-    if src_ratio > dst_ratio:
-        new_h = dst_h
-        new_w = int(new_h * src_ratio)
-    else:
-        new_w = dst_w
-        new_h = int(new_w / src_ratio)
-    resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-    left = (new_w - dst_w) // 2
-    top = (new_h - dst_h) // 2
-    return resized.crop((left, top, left + dst_w, top + dst_h))
-
-
-def preprocess_screenshot(img: Image.Image) -> Image.Image:
-    """Strip status bar from portrait screenshots before framing."""
-    w, h = img.size
-    if h <= w:
-        return img
-    crop_px = int(h * STATUS_BAR_CROP_RATIO)
-    if crop_px <= 0 or crop_px >= h - 8:
-        return img
-    return img.crop((0, crop_px, w, h))
+    return linear_gradient(size, (c1, c2))
 
 
 def wrap_lines(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> list[str]:
-    words = text.split()
-    if not words:
-        return [text]
-    lines: list[str] = []
-    current: list[str] = []
-    for w in words:
-        candidate = " ".join(current + [w])
-        box = draw.textbbox((0, 0), candidate, font=font)
-        if box[2] - box[0] <= max_width or not current:
-            current.append(w)
-            continue
-        lines.append(" ".join(current))
-        current = [w]
-    if current:
-        lines.append(" ".join(current))
-    return lines
+    return wrap_words(text, font, max_width)
 
 
+@stage_trace.traced()
 def draw_text_center(
     draw: ImageDraw.ImageDraw,
     text: str,
@@ -224,55 +112,33 @@ def draw_text_center(
     *,
     max_width_ratio: float = 0.92,
     is_title: bool = True,
-) -> None:
-    font = load_font_bold(size) if is_title else load_font_regular(size)
-    max_w = int(width * max_width_ratio)
-    lines = wrap_lines(draw, text, font, max_w)
-
-    # If still too wide (very long title), shrink a bit.
-    while len(lines) > 2 and size > 44:
-        size -= 4
-        font = load_font_bold(size) if is_title else load_font_regular(size)
-        lines = wrap_lines(draw, text, font, max_w)
-
-    line_h = int(size * (1.15 if is_title else 1.25))
-    for i, line in enumerate(lines[:2]):
-        box = draw.textbbox((0, 0), line, font=font)
-        tw = box[2] - box[0]
-        x = (width - tw) // 2
-        yy = y + i * line_h
-        # Subtle shadow for legibility on gradients.
-        draw.text((x, yy + 2), line, font=font, fill=(0, 0, 0, 40))
-        draw.text((x, yy), line, font=font, fill=color)
-
-
-def draw_phone(
+    min_size: int = 44,
+) -> TextLayout:
+    # Very long titles shrink (down to min_size) until they fit on two lines.
+    layout = fit_text(
+        text,
+        load_font_bold if is_title else load_font_regular,
+        size,
+        width,
+        max_width=int(width * max_width_ratio),
+        max_lines=2,
+        min_size=min_size,
+        line_spacing=1.15 if is_title else 1.25,
+    )
+    layout.draw(draw, (0, y), color)
+    return layout
+
+
+@stage_trace.traced()
+def paste_screen(
     canvas: Image.Image,
-    screenshot: Image.Image,
+    screenshot: Screenshot,
     body_box: Tuple[int, int, int, int],
     corner: int,
     bezel: int,
+    fast: bool = False,
 ) -> None:
     x0, y0, x1, y1 = body_box
-
-    shadow = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
-    sdraw = ImageDraw.Draw(shadow)
-    sdraw.rounded_rectangle((x0 + 8, y0 + 16, x1 + 8, y1 + 16), radius=corner, fill=(0, 0, 0, 95))
-    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=18))
-    canvas.alpha_composite(shadow)
-
-    draw = ImageDraw.Draw(canvas)
-    # iPhone-ish front render (modern flat sides + Dynamic Island).
-    # Not a real iPhone 17 CAD, but matches the current "iPhone" visual language.
-    draw.rounded_rectangle((x0, y0, x1, y1), radius=corner, fill=(16, 18, 22))
-    draw.rounded_rectangle((x0 + 2, y0 + 2, x1 - 2, y1 - 2), radius=corner - 2, outline=(96, 102, 112), width=2)
-    # Subtle rim highlight.
-    rim = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
-    rdraw = ImageDraw.Draw(rim)
-    rdraw.rounded_rectangle((x0 + 6, y0 + 6, x1 - 6, y1 - 6), radius=corner - 6, outline=(255, 255, 255, 28), width=2)
-    rim = rim.filter(ImageFilter.GaussianBlur(radius=1))
-    canvas.alpha_composite(rim)
-
     sx0 = x0 + bezel
     sy0 = y0 + bezel
     sx1 = x1 - bezel
@@ -280,8 +146,11 @@ def draw_phone(
     screen_w = sx1 - sx0
     screen_h = sy1 - sy0
 
-    prepared = preprocess_screenshot(screenshot.convert("RGB"))
-    screen = fit_cover(prepared, (screen_w, screen_h))
+    if isinstance(screenshot, Image.Image):
+        screen = fit_screen(screenshot, (screen_w, screen_h), _strip_rows)
+    else:
+        # Files go through ingestion: decoded once, fitted screens cached by content.
+        screen = screen_ingest.load_screen(screenshot, (screen_w, screen_h), _strip_rows, fast=fast)
     mask = Image.new("L", (screen_w, screen_h), 0)
     mdraw = ImageDraw.Draw(mask)
     mdraw.rounded_rectangle((0, 0, screen_w, screen_h), radius=max(12, int(corner * 0.55)), fill=255)
@@ -291,122 +160,457 @@ def draw_phone(
     # so the top area stays clean for marketing screenshots.
 
 
-def build_portrait_mockup(src: Path, title: str, subtitle: str, out_name: str) -> None:
-    bg = gradient_canvas(PORTRAIT_SIZE, (255, 235, 126), (255, 120, 126)).convert("RGBA")
-    add_soft_glow(bg, (220, 2280), 360, (130, 255, 255, 120))
-    add_soft_glow(bg, (1080, 600), 320, (255, 230, 160, 120))
+PORTRAIT = MockupLayout(
+    landscape=False,
+    top=(255, 235, 126),
+    bottom=(255, 120, 126),
+    glows=(Glow((220, 2280), 360, (130, 255, 255, 120)), Glow((1080, 600), 320, (255, 230, 160, 120))),
+    title=Caption(120, 76, (24, 31, 53)),
+    subtitle=Caption(222, 44, (53, 63, 89)),
+    phone=(135, 420, 1155, 2600),
+    corner=140,
+    bezel=50,
+)
+
+PORTRAIT_GAMEPLAY = MockupLayout(
+    landscape=False,
+    top=(255, 218, 96),
+    bottom=(255, 93, 86),
+    glows=(Glow((150, 2400), 360, (255, 180, 100, 120)), Glow((1060, 700), 300, (255, 255, 180, 120))),
+    title=Caption(120, 76, (255, 255, 255)),
+    subtitle=Caption(222, 44, (255, 244, 230)),
+    phone=(75, 990, 1215, 1580),
+    corner=90,
+    bezel=22,
+)
+
+LANDSCAPE_GAMEPLAY = MockupLayout(
+    landscape=True,
+    top=(255, 215, 95),
+    bottom=(255, 97, 88),
+    glows=(Glow((350, 1060), 290, (255, 255, 170, 110)), Glow((2360, 250), 290, (255, 150, 130, 110))),
+    title=Caption(72, 84, (255, 255, 255)),
+    subtitle=Caption(168, 44, (255, 244, 230)),
+    phone=(278, 180, 2518, 1160),
+    corner=120,
+    bezel=36,
+)
+
+LAYOUTS: Dict[str, MockupLayout] = {
+    "portrait": PORTRAIT,
+    "portrait-gameplay": PORTRAIT_GAMEPLAY,
+    "landscape": LANDSCAPE_GAMEPLAY,
+}
+
+
+def draw_caption(draw: ImageDraw.ImageDraw, text: str, caption: Caption, width: int, is_title: bool) -> TextLayout:
+    return draw_text_center(
+        draw, text, caption.y, caption.size, caption.color, width, is_title=is_title, min_size=caption.min_size
+    )
+
 
+@stage_trace.traced()
+def build_mockup(
+    layout: MockupLayout,
+    src: Screenshot,
+    title: str,
+    subtitle: str | None = None,
+    device: Optional[str] = None,
+    draft: bool = False,
+) -> Image.Image:
+    """Render layout on the device canvas (the 6.9" iPhone by default); draft renders it at DRAFT_SCALE."""
+    p = place_on(layout, device, DRAFT_SCALE if draft else 1.0)
+    bg = mockup_templates.background(p.size, p.top, p.bottom, p.glows)
     draw = ImageDraw.Draw(bg)
-    draw_text_center(draw, title, 120, 76, (24, 31, 53), PORTRAIT_SIZE[0], is_title=True)
-    draw_text_center(draw, subtitle, 222, 44, (53, 63, 89), PORTRAIT_SIZE[0], is_title=False)
+    draw_caption(draw, title, p.title, p.size[0], is_title=True)
+    if subtitle:
+        draw_caption(draw, subtitle, p.subtitle, p.size[0], is_title=False)
 
-    shot = Image.open(src).convert("RGB")
-    phone_w, phone_h = 1020, 2180
-    x0 = (PORTRAIT_SIZE[0] - phone_w) // 2
-    y0 = 420
-    draw_phone(bg, shot, (x0, y0, x0 + phone_w, y0 + phone_h), corner=140, bezel=50)
+    composite_phone_chrome(bg, p.phone, corner=p.corner, scale=p.scale)
+    paste_screen(bg, src, p.phone, corner=p.corner, bezel=p.bezel, fast=draft)
+    return bg.convert("RGB")
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    bg.convert("RGB").save(OUT_DIR / out_name, format="PNG", optimize=True)
 
+@dataclass(frozen=True)
+class MockupEntry:
+    screenshot: Path
+    title: str
+    subtitle: Optional[str]
+    layout: str
+    output: str
+    device: str = REFERENCE_DEVICE
+    locale: Optional[str] = None
 
-def build_portrait_gameplay_mockup(src: Path, out_name: str) -> None:
-    bg = gradient_canvas(PORTRAIT_SIZE, (255, 218, 96), (255, 93, 86)).convert("RGBA")
-    add_soft_glow(bg, (150, 2400), 360, (255, 180, 100, 120))
-    add_soft_glow(bg, (1060, 700), 300, (255, 255, 180, 120))
-    draw = ImageDraw.Draw(bg)
-    draw_text_center(draw, "Action im Querformat", 120, 76, (255, 255, 255), PORTRAIT_SIZE[0], is_title=True)
-    draw_text_center(draw, "Neigen, raten, Punkte holen", 222, 44, (255, 244, 230), PORTRAIT_SIZE[0], is_title=False)
 
-    shot = Image.open(src).convert("RGB")
-    phone_w, phone_h = 1140, 590
-    x0 = (PORTRAIT_SIZE[0] - phone_w) // 2
-    y0 = 990
-    draw_phone(bg, shot, (x0, y0, x0 + phone_w, y0 + phone_h), corner=90, bezel=22)
+@dataclass(frozen=True)
+class Manifest:
+    output_dir: Path
+    entries: Tuple[MockupEntry, ...]
+    keep: Tuple[str, ...]
+    prune: bool
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    bg.convert("RGB").save(OUT_DIR / out_name, format="PNG", optimize=True)
 
+@dataclass(frozen=True)
+class EntryResult:
+    entry: MockupEntry
+    encoded: Optional[png_encode.EncodeResult]
+    seconds: float
+    error: Optional[str] = None
 
-def build_landscape_gameplay_mockup(
-    src: Path,
-    out_name: str,
-    title: str = "Stirnraten Gameplay",
-    subtitle: str | None = None,
-) -> None:
-    bg = gradient_canvas(LANDSCAPE_SIZE, (255, 215, 95), (255, 97, 88)).convert("RGBA")
-    add_soft_glow(bg, (350, 1060), 290, (255, 255, 170, 110))
-    add_soft_glow(bg, (2360, 250), 290, (255, 150, 130, 110))
-    draw = ImageDraw.Draw(bg)
-    draw_text_center(draw, title, 72, 84, (255, 255, 255), LANDSCAPE_SIZE[0], is_title=True)
-    if subtitle:
-      draw_text_center(draw, subtitle, 168, 44, (255, 244, 230), LANDSCAPE_SIZE[0], is_title=False)
-
-    shot = Image.open(src).convert("RGB")
-    phone_w, phone_h = 2240, 980
-    x0 = (LANDSCAPE_SIZE[0] - phone_w) // 2
-    y0 = 180
-    draw_phone(bg, shot, (x0, y0, x0 + phone_w, y0 + phone_h), corner=120, bezel=36)
-
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    bg.convert("RGB").save(OUT_DIR / out_name, format="PNG", optimize=True)
-
-
-def assert_sources() -> None:
-    missing = [str(p) for p in (SRC_CATEGORIES_SETTINGS_NEW, SRC_AI_WORDLIST_NEW, SRC_CUSTOM_WORDLISTS_NEW) if not p.exists()]
-    if missing:
-        raise FileNotFoundError(
-            "Missing screenshots in ~/Downloads:\n"
-            + "\n".join(missing)
-            + "\n\nExport 3 iPhone portrait screenshots to Downloads as:\n"
-            + "- IMG_4275.PNG (Kategorien/Einstellungen)\n"
-            + "- IMG_4276.PNG (KI-Woerterliste)\n"
-            + "- IMG_4277.PNG (Eigene Woerter / gespeicherte Liste)\n"
+
+def _resolve(base: Path, value: str) -> Path:
+    p = Path(value).expanduser()
+    return p if p.is_absolute() else base / p
+
+
+def _pick(value: Any, device: str, locale: Optional[str]) -> Any:
+    """A plain value, or the most specific match of a {"device/locale", device, locale, "default"} map."""
+    if not isinstance(value, dict):
+        return value
+    for key in (f"{device}/{locale}", device, locale, "default"):
+        if key in value:
+            return value[key]
+    return None
+
+
+@stage_trace.traced()
+def load_manifest(path: Path) -> Manifest:
+    """Expand every mockup over its devices x locales.
+
+    "devices" and "locales" may be set for the whole manifest or per mockup
+    (default: the reference device, no locale). screenshot, title and
+    subtitle may be maps keyed by device, locale, "device/locale" or
+    "default"; output names may use {device}, {locale} and {size}.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    base = path.resolve().parent
+    shots = _resolve(base, data.get("screenshot_dir", str(DOWNLOADS)))
+    entries = []
+    for i, raw in enumerate(data.get("mockups", [])):
+        layout_name = raw.get("layout", "portrait")
+        devices = raw.get("devices", data.get("devices", [REFERENCE_DEVICE]))
+        unknown = [d for d in devices if d not in DEVICES]
+        if unknown:
+            raise ValueError(
+                f"{path}: mockup #{i + 1} has unknown devices {', '.join(unknown)} (expected {', '.join(DEVICES)})."
+            )
+        for device in devices:
+            for locale in raw.get("locales", data.get("locales", [None])):
+                cell = {k: _pick(raw.get(k), device, locale) for k in ("screenshot", "title", "subtitle", "output")}
+                missing = [k for k in ("screenshot", "title", "output") if not cell[k]]
+                if missing:
+                    where = f"mockup #{i + 1} ({device}{'' if locale is None else ', ' + locale})"
+                    raise ValueError(f"{path}: {where} is missing {', '.join(missing)}.")
+                # Unknown layouts fail at render time, per entry; their name still gets a size.
+                layout = LAYOUTS.get(layout_name, PORTRAIT)
+                w, h = canvas_size(layout, DEVICES[device])
+                entries.append(
+                    MockupEntry(
+                        screenshot=_resolve(shots, cell["screenshot"]),
+                        title=cell["title"],
+                        subtitle=cell["subtitle"],
+                        layout=layout_name,
+                        output=cell["output"].format(device=device, locale=locale or "default", size=f"{w}x{h}"),
+                        device=device,
+                        locale=locale,
+                    )
+                )
+    outputs = [e.output for e in entries]
+    dupes = sorted({o for o in outputs if outputs.count(o) > 1})
+    if dupes:
+        raise ValueError(
+            f"{path}: duplicate output names: {', '.join(dupes)} (use {{device}}, {{locale}} or {{size}} in them)."
         )
+    return Manifest(
+        output_dir=_resolve(ROOT, data["output_dir"]) if "output_dir" in data else OUT_DIR,
+        entries=tuple(entries),
+        keep=tuple(data.get("keep", [])),
+        prune=bool(data.get("prune", False)),
+    )
 
 
-def prune_out_dir(keep: set[str]) -> None:
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    for p in OUT_DIR.glob("*.png"):
-        if p.name not in keep:
-            p.unlink()
+def render_entry(entry: MockupEntry, out_dir: Path, options: png_encode.EncodeOptions) -> EntryResult:
+    with stage_trace.span(
+        "render_entry", output=entry.output, layout=entry.layout, device=entry.device, locale=entry.locale
+    ) as info:
+        result = _render_entry(entry, out_dir, options)
+        info["error"] = result.error
+        return result
 
 
-def main() -> None:
-    assert_sources()
+def _render_entry(entry: MockupEntry, out_dir: Path, options: png_encode.EncodeOptions) -> EntryResult:
+    start = time.perf_counter()
+    try:
+        layout = LAYOUTS.get(entry.layout)
+        if layout is None:
+            raise ValueError(f"unknown layout {entry.layout!r} (expected one of {', '.join(LAYOUTS)})")
+        if not entry.screenshot.exists():
+            raise FileNotFoundError(f"missing screenshot {entry.screenshot}")
+        img = build_mockup(layout, entry.screenshot, entry.title, entry.subtitle, entry.device, _draft)
+        encoded = png_encode.encode_file(out_dir / entry.output, img, options)
+        return EntryResult(entry, encoded, time.perf_counter() - start)
+    except Exception as exc:
+        return EntryResult(entry, None, time.perf_counter() - start, f"{type(exc).__name__}: {exc}")
+
+
+def _render_job(job: Tuple[MockupEntry, Path, png_encode.EncodeOptions]) -> EntryResult:
+    return render_entry(*job)
+
+
+def _render_job_in_worker(job: Tuple[MockupEntry, Path, png_encode.EncodeOptions]) -> Tuple[EntryResult, list]:
+    return render_entry(*job), stage_trace.drain()
+
+
+@stage_trace.traced()
+def render_batch(
+    entries: Sequence[MockupEntry],
+    out_dir: Path,
+    options: png_encode.EncodeOptions,
+    workers: Optional[int] = None,
+    template_dir: Optional[Path] = mockup_templates.TEMPLATE_CACHE_DIR,
+    strip_rows: Optional[int] = None,
+    screen_dir: Optional[Path] = screen_ingest.SCREEN_CACHE_DIR,
+    draft: bool = False,
+    allow_fallback_fonts: bool = False,
+) -> List[EntryResult]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(entry, out_dir, options) for entry in entries]
+    workers = workers or default_workers(len(jobs))
+    tracing = stage_trace.enabled()
+    configure(template_dir, strip_rows, tracing, screen_dir, draft=draft, allow_fallback_fonts=allow_fallback_fonts)
+    # Group entries of the same screenshot so a process decodes each one once
+    # (screen_ingest keeps only the last two decoded), then fits it per device.
+    jobs.sort(key=lambda job: (str(job[0].screenshot), job[0].device, job[0].layout))
+    if workers <= 1 or len(jobs) <= 1:
+        done = {r.entry: r for r in map(_render_job, jobs)}
+        return [done[entry] for entry in entries]
+    with SharedImages() as shared:
+        layers = share_template_layers(entries, shared)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=configure,
+            initargs=(template_dir, strip_rows, tracing, screen_dir, layers, draft, allow_fallback_fonts),
+        ) as pool:
+            done = {}
+            for r, events in pool.map(_render_job_in_worker, jobs, chunksize=max(1, len(jobs) // workers)):
+                done[r.entry] = r
+                stage_trace.merge(events)
+    return [done[entry] for entry in entries]
+
+
+@stage_trace.traced()
+def share_template_layers(entries: Sequence[MockupEntry], shared: SharedImages) -> Dict[LayerKey, SharedImage]:
+    """Render or load every background and chrome layer once and share it with all workers."""
+    keys = set()
+    for e in entries:
+        layout = LAYOUTS.get(e.layout)
+        if layout is not None and e.device in DEVICES:
+            p = place_on(layout, e.device, DRAFT_SCALE if _draft else 1.0)
+            keys.add(background_key(p.size, p.top, p.bottom, p.glows))
+            keys.add(chrome_key(p.size, p.phone, p.corner, p.scale))
+    return {key: shared.put(mockup_templates.cached_layer(key)) for key in keys}
+
+
+def format_batch_report(results: Sequence[EntryResult]) -> str:
+    lines = []
+    width = max((len(r.entry.output) for r in results), default=0)
+    for r in results:
+        if r.error is not None:
+            lines.append(f"  FAILED {r.entry.output}: {r.error}")
+            continue
+        enc = r.encoded
+        lines.append(
+            f"  ok     {r.entry.output:<{width}}  {r.entry.device:<10} {r.entry.layout:<17} {r.seconds * 1000:8.1f} ms"
+            f"  {enc.bytes_written:>9} B ({enc.strategy}){'  OVER BUDGET' if enc.over_budget else ''}"
+        )
+    failed = sum(1 for r in results if r.error is not None)
+    lines.append(f"  {len(results) - failed} rendered, {failed} failed")
+    return "\n".join(lines)
+
+
+CONTACT_SHEET_STYLE = """
+body { font: 14px -apple-system, system-ui, sans-serif; margin: 24px; background: #1c1d21; color: #e8e8ea; }
+h2 { font-size: 16px; margin: 28px 0 12px; }
+.sheet { display: flex; flex-wrap: wrap; gap: 20px; align-items: flex-start; }
+figure { margin: 0; }
+figure img { display: block; box-shadow: 0 2px 10px #0008; }
+figcaption { max-width: 360px; margin-top: 6px; color: #a9aab0; }
+figcaption b { color: #e8e8ea; font-weight: 600; }
+.failed { width: 240px; padding: 12px; border: 1px solid #d55; color: #f99; }
+"""
 
-    # Keep the existing 2 images already checked in.
-    keep = {
-        "01_startscreen_1290x2796.png",
-        "06_auswertung_1290x2796.png",
-        # Newly generated (this script):
-        "02_kategorien_1290x2796.png",
-        "03_ki_woerterlisten_1290x2796.png",
-        "04_eigene_listen_1290x2796.png",
-    }
 
-    build_portrait_mockup(
-        SRC_CUSTOM_WORDLISTS_NEW,
-        "Erstelle eigene Kategorien mit KI",
-        "Deine Begriffe, jederzeit spielbereit",
-        "02_kategorien_1290x2796.png",
+def contact_sheet(results: Sequence[EntryResult], title: str) -> str:
+    """HTML page with every rendered image of a batch, grouped by locale and device."""
+    groups: Dict[Tuple[str, str], List[EntryResult]] = {}
+    for r in results:
+        groups.setdefault((r.entry.locale or "default", r.entry.device), []).append(r)
+    parts = [
+        "<!doctype html>",
+        f"<meta charset=\"utf-8\"><title>{html.escape(title)}</title><style>{CONTACT_SHEET_STYLE}</style>",
+        f"<h1>{html.escape(title)}</h1>",
+    ]
+    # The query string defeats the browser cache when a draft is re-rendered under the same name.
+    stamp = time.time_ns()
+    for (locale, device), group in groups.items():
+        parts.append(f"<h2>{html.escape(locale)} &middot; {html.escape(device)}</h2><div class=\"sheet\">")
+        for r in group:
+            caption = f"<b>{html.escape(r.entry.output)}</b><br>{html.escape(r.entry.title)}"
+            if r.error is not None:
+                parts.append(f"<figure class=\"failed\">{caption}<br>{html.escape(r.error)}</figure>")
+                continue
+            src = html.escape(f"{Path(r.entry.output).as_posix()}?v={stamp}")
+            parts.append(f"<figure><img src=\"{src}\" loading=\"lazy\"><figcaption>{caption}</figcaption></figure>")
+        parts.append("</div>")
+    return "\n".join(parts) + "\n"
+
+
+@stage_trace.traced()
+def write_contact_sheet(results: Sequence[EntryResult], out_dir: Path, title: str) -> Path:
+    path = out_dir / "index.html"
+    write_atomic(path, contact_sheet(results, title).encode("utf-8"))
+    return path
+
+
+@stage_trace.traced()
+def prune_out_dir(out_dir: Path, keep: set[str]) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Only directories that receive outputs are pruned; other subfolders are left alone.
+    for d in {out_dir} | {(out_dir / name).parent for name in keep}:
+        for p in d.glob("*.png"):
+            if p.relative_to(out_dir).as_posix() not in keep:
+                p.unlink()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate App Store marketing mockups from a screenshot manifest.")
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=DEFAULT_MANIFEST,
+        help=f"JSON manifest of mockups to render (default: {DEFAULT_MANIFEST.relative_to(ROOT)}).",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        metavar="OUTPUT",
+        help="Render only the entry with this output name (repeatable).",
+    )
+    parser.add_argument(
+        "--device",
+        action="append",
+        choices=sorted(DEVICES),
+        help="Render only this device of the manifest's matrix (repeatable).",
+    )
+    parser.add_argument(
+        "--locale",
+        action="append",
+        help="Render only this locale of the manifest's matrix (repeatable).",
     )
-    build_portrait_mockup(
-        SRC_AI_WORDLIST_NEW,
-        "Erstelle eigene Listen mit KI oder per Hand",
-        "Schnell anpassen und losspielen",
-        "03_ki_woerterlisten_1290x2796.png",
+    parser.add_argument(
+        "--draft",
+        action="store_true",
+        help=f"Preview at 1/{round(1 / DRAFT_SCALE)} scale with fast resampling and compression, plus an HTML "
+        f"contact sheet, in {DRAFT_DIR.relative_to(ROOT)}/<manifest>; final outputs are left alone.",
     )
-    build_portrait_mockup(
-        SRC_CATEGORIES_SETTINGS_NEW,
-        "Entdecke spannende Modi",
-        "Klassisch, K.o., Schwer, Trinkspiel",
-        "04_eigene_listen_1290x2796.png",
+    parser.add_argument(
+        "--allow-fallback-fonts",
+        action="store_true",
+        help="Render with fallback faces when the pinned fonts are missing (rough previews only).",
     )
+    png_encode.add_arguments(parser)
+    tiled.add_arguments(parser)
+    stage_trace.add_arguments(parser, "generate_app_store_mockups")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for rendering (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "--no-screen-cache",
+        action="store_true",
+        help=f"Do not read/write fitted screenshots in {screen_ingest.SCREEN_CACHE_DIR.relative_to(ROOT)}.",
+    )
+    parser.add_argument(
+        "--no-template-cache",
+        action="store_true",
+        help=f"Do not read/write template layers in {mockup_templates.TEMPLATE_CACHE_DIR.relative_to(ROOT)}.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with stage_trace.session(args, "generate_app_store_mockups"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    manifest = load_manifest(args.manifest)
+    entries = [
+        e
+        for e in manifest.entries
+        if (not args.only or e.output in args.only)
+        and (not args.device or e.device in args.device)
+        and (not args.locale or e.locale in args.locale)
+    ]
+    if not entries:
+        sys.exit("No mockups selected.")
+
+    # Fail before any work (or worker start-up) instead of rendering with a fallback face.
+    font_problems = mockup_fonts.check_fonts()
+    if font_problems and not args.allow_fallback_fonts:
+        sys.exit(
+            "Fonts are not ready:\n  "
+            + "\n  ".join(font_problems)
+            + f"\nTo fix: {mockup_fonts.FETCH_HINT}, or pass --allow-fallback-fonts for a rough preview."
+        )
 
-    # Ensure we only keep the 5 final mockups.
-    prune_out_dir(keep)
-    print(f"Mockups generated in: {OUT_DIR}")
+    start = time.perf_counter()
+    if args.draft:
+        out_dir = DRAFT_DIR / args.manifest.stem
+        encode = png_encode.EncodeOptions(strategy="fast")
+        # A whole draft set renders faster than a pool starts.
+        workers = args.workers or 1
+    else:
+        out_dir = manifest.output_dir
+        encode = png_encode.options_from_args(args)
+        workers = args.workers
+    template_dir = None if args.no_template_cache else mockup_templates.TEMPLATE_CACHE_DIR
+    results = render_batch(
+        entries,
+        out_dir,
+        encode,
+        # cProfile only sees this process, so keep the work in it.
+        workers=1 if args.cprofile else workers,
+        template_dir=template_dir,
+        strip_rows=tiled.rows_from_args(args),
+        screen_dir=None if args.no_screen_cache else screen_ingest.SCREEN_CACHE_DIR,
+        draft=args.draft,
+        allow_fallback_fonts=args.allow_fallback_fonts,
+    )
+    # After the batch; an entry evicted under a concurrent render server job is just a cache miss.
+    mockup_templates.trim_cache()
+    screen_ingest.trim_cache()
+
+    failed = [r for r in results if r.error is not None]
+    if args.draft:
+        sheet = write_contact_sheet(results, out_dir, f"{args.manifest.name} (draft)")
+        print(format_batch_report(results))
+        print(f"Draft of {len(results)} mockups in {time.perf_counter() - start:.2f}s: {sheet.as_uri()}")
+        if failed:
+            sys.exit(f"{len(failed)} of {len(results)} mockups failed.")
+        return
+
+    # Prune only after a complete, successful run so failures never delete good images.
+    if manifest.prune and not failed and len(entries) == len(manifest.entries):
+        prune_out_dir(manifest.output_dir, set(manifest.keep) | {e.output for e in manifest.entries})
+    print(f"Mockups generated in: {manifest.output_dir}")
+    print(format_batch_report(results))
+    if failed:
+        sys.exit(f"{len(failed)} of {len(results)} mockups failed.")
+    if any(r.encoded.over_budget for r in results):
+        sys.exit(f"Some mockups exceed --max-bytes={encode.max_bytes}.")
 
 
 if __name__ == "__main__":
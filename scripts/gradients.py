@@ -0,0 +1,164 @@
+"""
+Gradient fills shared by the icon and mockup generators.
+
+Both scripts used to fill gradients one pixel at a time through Image.load().
+The helpers here produce byte-identical images with whole-image primitives:
+- linear gradients are computed once per row/column and stretched with a
+  NEAREST resize (pure Pillow),
+- bilinear gradients use numpy broadcasting when available.
+
+Results are memoized by (size, stops, ...) so repeated backgrounds are free.
+Callers always receive a fresh copy and may draw on it.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; bilinear gradients fall back to a per-pixel loop.
+    np = None
+
+Color = Tuple[int, int, int]
+
+# Rounding rules of the original generators:
+# - "trunc": int(c1 * (1 - t) + c2 * t)   (gradient_canvas in the mockup script)
+# - "round": int(round(a + (b - a) * t))  (make_gradient in the icon script)
+TRUNC = "trunc"
+ROUND = "round"
+
+_CACHE_SIZE = 8
+
+
+def lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
+
+
+def mix_rgb(a: Color, b: Color, t: float) -> Color:
+    return (
+        int(round(lerp(a[0], b[0], t))),
+        int(round(lerp(a[1], b[1], t))),
+        int(round(lerp(a[2], b[2], t))),
+    )
+
+
+def _mix_weighted(a: Color, b: Color, t: float, rounding: str) -> Color:
+    if rounding == ROUND:
+        return mix_rgb(a, b, t)
+    return (
+        int(a[0] * (1 - t) + b[0] * t),
+        int(a[1] * (1 - t) + b[1] * t),
+        int(a[2] * (1 - t) + b[2] * t),
+    )
+
+
+def _stop_positions(count: int, positions: Optional[Sequence[float]]) -> Tuple[float, ...]:
+    if positions is not None:
+        if len(positions) != count:
+            raise ValueError(f"Expected {count} stop positions, got {len(positions)}.")
+        result = tuple(float(p) for p in positions)
+        if any(b < a for a, b in zip(result, result[1:])):
+            raise ValueError("Stop positions must be sorted.")
+        return result
+    if count == 1:
+        return (0.0,)
+    return tuple(i / (count - 1) for i in range(count))
+
+
+def _ramp(length: int, stops: Tuple[Color, ...], positions: Tuple[float, ...], rounding: str) -> bytes:
+    out = bytearray()
+    last = max(1, length - 1)
+    seg = 0
+    for i in range(length):
+        t = i / last
+        if len(stops) == 1 or t <= positions[0]:
+            color = stops[0]
+        elif t >= positions[-1]:
+            color = stops[-1]
+        else:
+            while t > positions[seg + 1]:
+                seg += 1
+            p0, p1 = positions[seg], positions[seg + 1]
+            color = _mix_weighted(stops[seg], stops[seg + 1], (t - p0) / (p1 - p0), rounding)
+        out.extend(color)
+    return bytes(out)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _linear_cached(
+    size: Tuple[int, int],
+    stops: Tuple[Color, ...],
+    positions: Tuple[float, ...],
+    vertical: bool,
+    rounding: str,
+) -> Image.Image:
+    w, h = size
+    if vertical:
+        strip = Image.frombytes("RGB", (1, h), _ramp(h, stops, positions, rounding))
+    else:
+        strip = Image.frombytes("RGB", (w, 1), _ramp(w, stops, positions, rounding))
+    return strip.resize((w, h), Image.Resampling.NEAREST)
+
+
+def linear_gradient(
+    size: Tuple[int, int],
+    stops: Sequence[Color],
+    *,
+    positions: Optional[Sequence[float]] = None,
+    vertical: bool = True,
+    rounding: str = TRUNC,
+) -> Image.Image:
+    """Two- or multi-stop gradient along one axis; stops are evenly spaced unless positions are given."""
+    if not stops:
+        raise ValueError("A gradient needs at least one color stop.")
+    key_stops = tuple(tuple(int(c) for c in s) for s in stops)
+    key_positions = _stop_positions(len(key_stops), positions)
+    return _linear_cached(tuple(size), key_stops, key_positions, vertical, rounding).copy()
+
+
+def _bilinear_loop(size: Tuple[int, int], tl: Color, tr: Color, bl: Color, br: Color) -> Image.Image:
+    w, h = size
+    grad = Image.new("RGB", size)
+    pix = grad.load()
+    last_x = float(max(1, w - 1))
+    last_y = float(max(1, h - 1))
+    for y in range(h):
+        ty = y / last_y
+        left = mix_rgb(tl, bl, ty)
+        right = mix_rgb(tr, br, ty)
+        for x in range(w):
+            pix[x, y] = mix_rgb(left, right, x / last_x)
+    return grad
+
+
+def _bilinear_array(size: Tuple[int, int], tl: Color, tr: Color, bl: Color, br: Color) -> Image.Image:
+    w, h = size
+    ty = (np.arange(h) / float(max(1, h - 1)))[:, np.newaxis]
+    tx = (np.arange(w) / float(max(1, w - 1)))[np.newaxis, :, np.newaxis]
+    tl_a, tr_a, bl_a, br_a = (np.array(c, dtype=np.float64) for c in (tl, tr, bl, br))
+    # Rows are rounded first, exactly like mix_rgb() on the left/right edges.
+    left = np.rint(tl_a + (bl_a - tl_a) * ty)[:, np.newaxis, :]
+    right = np.rint(tr_a + (br_a - tr_a) * ty)[:, np.newaxis, :]
+    out = np.rint(left + (right - left) * tx)
+    return Image.fromarray(out.astype(np.uint8), "RGB")
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _bilinear_cached(size: Tuple[int, int], tl: Color, tr: Color, bl: Color, br: Color) -> Image.Image:
+    if np is None:
+        return _bilinear_loop(size, tl, tr, bl, br)
+    return _bilinear_array(size, tl, tr, bl, br)
+
+
+def bilinear_gradient(size: Tuple[int, int], tl: Color, tr: Color, bl: Color, br: Color) -> Image.Image:
+    """Four-corner gradient; edge colors are rounded per row, then interpolated across (ROUND rules)."""
+    return _bilinear_cached(tuple(size), tuple(tl), tuple(tr), tuple(bl), tuple(br)).copy()
+
+
+def clear_cache() -> None:
+    _linear_cached.cache_clear()
+    _bilinear_cached.cache_clear()
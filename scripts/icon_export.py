@@ -0,0 +1,244 @@
+"""
+Parallel export of every platform's icons from a single master image.
+
+PNG icons are resampled with LANCZOS straight from the master, so they are
+pixel-identical to a direct resize. The many small frames of a Windows .ico
+are resampled from a pyramid of halved levels (1024, 512, 256, ...) instead:
+each from the smallest level that is still ICON_REDUCING_GAP times its
+size, so a 16px frame does not filter 1024 rows. That is not lossless
+(pixels move by a few levels), which is why the PNG icons do not use it.
+
+- "png": the icon at one size;
+- "maskable": the icon scaled into the web manifest safe zone over a
+  backdrop, so launchers can crop it to any shape. The backdrop is a
+  smooth gradient and comes from its own pyramid, which leaves its pixels
+  unchanged;
+- "ico": a multi-resolution Windows icon with every ICO_SIZES frame up to
+  the target size.
+
+Targets that share a kind and size are rendered and encoded once; the
+bytes are then written to every path that needs them. Renders run in a
+process pool sized to the machine, and files are replaced atomically so an
+interrupted run never leaves a half-written file behind.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+import stage_trace
+from asset_io import default_workers, write_atomic
+from png_encode import EncodeOptions, encode_within_budget
+from shared_image import SharedImage, SharedImages, open_shared, unpadded
+
+# Pyramid resamples read a level at least this many times the frame size (Pillow's reducing_gap guidance).
+ICON_REDUCING_GAP = 3.0
+# Frames of a Windows .ico: shell views, taskbar and Explorer tiles up to 256px.
+ICO_SIZES = (16, 24, 32, 48, 64, 128, 256)
+# Maskable web icons keep their content inside a centered circle of 80% of the
+# icon's width; the master's own inscribed circle is scaled onto it.
+MASKABLE_SAFE_ZONE = 0.8
+KINDS = ("png", "maskable", "ico")
+
+# Side length -> level; the largest level is the master.
+Pyramid = Dict[int, Image.Image]
+
+_LEVELS: Optional[Pyramid] = None
+_BACKDROP: Optional[Pyramid] = None
+_OPTIONS = EncodeOptions()
+
+
+@dataclass(frozen=True)
+class ExportTarget:
+    path: Path
+    size: int
+    kind: str = "png"
+
+    def __post_init__(self) -> None:
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown icon kind {self.kind!r}; expected one of {', '.join(KINDS)}.")
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    target: ExportTarget
+    seconds: float
+    bytes_written: int
+    # True when the encoded bytes were produced for an earlier target of the same size.
+    reused: bool
+    strategy: str = "default"
+    over_budget: bool = False
+
+
+# (kind, size) of a rendition.
+RenditionKey = Tuple[str, int]
+Rendered = Tuple[RenditionKey, bytes, float, str, bool]
+
+
+def _frame_sizes(kind: str, size: int) -> List[int]:
+    if kind == "ico":
+        return [s for s in ICO_SIZES if s <= size] or [size]
+    if kind == "maskable":
+        return [round(size * MASKABLE_SAFE_ZONE)]
+    return [size]
+
+
+@stage_trace.traced()
+def build_pyramid(master: Image.Image, smallest: int) -> Pyramid:
+    """The master plus box-reduced halvings, down to the last level a smallest-px frame reads."""
+    levels = {master.width: master}
+    level = master
+    while level.width // 2 >= smallest * ICON_REDUCING_GAP:
+        level = level.reduce(2)
+        levels[level.width] = level
+    return levels
+
+
+def resize_icon(levels: Pyramid, size: int) -> Image.Image:
+    """LANCZOS from the master (the largest level), identical to resizing the master directly."""
+    master = levels[max(levels)]
+    return master if master.size == (size, size) else master.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def resize_from_pyramid(levels: Pyramid, size: int) -> Image.Image:
+    """LANCZOS from the smallest level that is still ICON_REDUCING_GAP times size."""
+    fits = [side for side in levels if side >= size * ICON_REDUCING_GAP]
+    src = levels[min(fits) if fits else max(levels)]
+    return src if src.size == (size, size) else src.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def maskable_icon(levels: Pyramid, backdrop: Pyramid, size: int) -> Image.Image:
+    inner = round(size * MASKABLE_SAFE_ZONE)
+    icon = unpadded(resize_from_pyramid(backdrop, size))
+    offset = (size - inner) // 2
+    icon.paste(unpadded(resize_icon(levels, inner)), (offset, offset))
+    return icon
+
+
+def ico_bytes(levels: Pyramid, size: int) -> bytes:
+    frames = [unpadded(resize_from_pyramid(levels, s)) for s in _frame_sizes("ico", size)]
+    buf = BytesIO()
+    # Pillow stores each frame as PNG and takes the sizes from the appended frames instead of resizing.
+    frames[-1].save(buf, format="ICO", sizes=[f.size for f in frames], append_images=frames[:-1])
+    return buf.getvalue()
+
+
+def _render(levels: Pyramid, backdrop: Optional[Pyramid], key: RenditionKey, options: EncodeOptions) -> Rendered:
+    kind, size = key
+    start = time.perf_counter()
+    with stage_trace.span("render_size", kind=kind, size=size, pixels=size * size) as info:
+        if kind == "ico":
+            # Budgets and PNG strategies apply to PNG files; Pillow encodes the frames.
+            data, strategy, over = ico_bytes(levels, size), "ico", False
+        else:
+            with stage_trace.span("resize_icon", size=size):
+                if kind == "maskable":
+                    assert backdrop is not None, "maskable icons need a backdrop"
+                    icon = maskable_icon(levels, backdrop, size)
+                else:
+                    # Workers read the levels as RGBX views of shared memory.
+                    icon = unpadded(resize_icon(levels, size))
+            data, strategy, over = encode_within_budget(icon, options)
+        info.update(bytes=len(data), strategy=strategy)
+    return key, data, time.perf_counter() - start, strategy, over
+
+
+def _init_worker(
+    levels: Dict[int, SharedImage], backdrop: Optional[Dict[int, SharedImage]], options: EncodeOptions, tracing: bool
+) -> None:
+    global _LEVELS, _BACKDROP, _OPTIONS
+    _LEVELS = {side: open_shared(handle) for side, handle in levels.items()}
+    _BACKDROP = {side: open_shared(handle) for side, handle in backdrop.items()} if backdrop is not None else None
+    _OPTIONS = options
+    stage_trace.enable(tracing)
+
+
+def _render_in_worker(key: RenditionKey) -> Tuple[Rendered, list]:
+    assert _LEVELS is not None, "worker started without a pyramid"
+    return _render(_LEVELS, _BACKDROP, key, _OPTIONS), stage_trace.drain()
+
+
+def _render_all(
+    levels: Pyramid,
+    backdrop: Optional[Pyramid],
+    keys: Sequence[RenditionKey],
+    workers: int,
+    options: EncodeOptions,
+) -> Dict[RenditionKey, Rendered]:
+    if workers <= 1 or len(keys) <= 1:
+        return {key: _render(levels, backdrop, key, options) for key in keys}
+
+    # Largest sizes first so the slowest encodes start early.
+    ordered = sorted(keys, key=lambda key: key[1], reverse=True)
+    with SharedImages() as shared:
+        handles = {side: shared.put(level) for side, level in levels.items()}
+        backdrop_handles = {side: shared.put(level) for side, level in backdrop.items()} if backdrop else None
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(handles, backdrop_handles, options, stage_trace.enabled()),
+        ) as pool:
+            rendered = {}
+            for r, events in pool.map(_render_in_worker, ordered):
+                rendered[r[0]] = r
+                stage_trace.merge(events)
+            return rendered
+
+
+@stage_trace.traced()
+def export_targets(
+    master: Image.Image,
+    targets: Sequence[ExportTarget],
+    workers: Optional[int] = None,
+    options: EncodeOptions = EncodeOptions(),
+    backdrop: Optional[Image.Image] = None,
+) -> List[ExportResult]:
+    """Write every target; backdrop (master-sized) fills the bleed of maskable icons."""
+    keys = sorted({(t.kind, t.size) for t in targets})
+    if backdrop is None and any(kind == "maskable" for kind, _ in keys):
+        raise ValueError("maskable icon targets need a backdrop image")
+    # Only .ico frames read the reduced levels; without them the pyramid is just the master.
+    frames = [s for kind, size in keys if kind == "ico" for s in _frame_sizes(kind, size)]
+    levels = build_pyramid(master, min(frames)) if frames else {master.width: master}
+    maskable = [size for kind, size in keys if kind == "maskable"]
+    backdrops = build_pyramid(backdrop, min(maskable)) if backdrop is not None and maskable else None
+    rendered = _render_all(levels, backdrops, keys, workers or default_workers(len(keys)), options)
+
+    results: List[ExportResult] = []
+    seen: set[RenditionKey] = set()
+    for target in targets:
+        key = (target.kind, target.size)
+        _, data, seconds, strategy, over = rendered[key]
+        with stage_trace.span("write", "io", path=str(target.path), bytes=len(data), reused=key in seen):
+            write_atomic(target.path, data)
+        results.append(ExportResult(target, seconds, len(data), key in seen, strategy, over))
+        seen.add(key)
+    return results
+
+
+def format_report(results: Sequence[ExportResult], root: Path) -> str:
+    lines = []
+    for r in results:
+        try:
+            name = r.target.path.relative_to(root)
+        except ValueError:
+            name = r.target.path
+        note = " (reused)" if r.reused else ""
+        if r.over_budget:
+            note += "  OVER BUDGET"
+        lines.append(
+            f"  {r.target.size:>5}px {r.target.kind:<8} {r.seconds * 1000:8.1f} ms {r.bytes_written:>9} B"
+            f" {r.strategy:<10} {name}{note}"
+        )
+    unique = {(r.target.kind, r.target.size): r.seconds for r in results}
+    lines.append(
+        f"  {len(results)} files, {len(unique)} unique renditions, {sum(unique.values()) * 1000:.1f} ms render time"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,139 @@
+"""
+Derive icon export targets from the platform projects instead of hardcoded tables.
+
+- Xcode asset catalogs (iOS and macOS AppIcon.appiconset) are read from their
+  Contents.json: pixel size = point size x scale.
+- Android launcher icons follow the mipmap density buckets (48dp baseline).
+- Web icons are the ones web/manifest.json lists (maskable by "purpose"),
+  plus the favicon that web/index.html links.
+- The Windows icon is the ICON resource named in windows/runner/Runner.rc.
+
+Every function returns the targets plus a list of human-readable issues
+(missing files, PNGs nobody references, conflicting sizes) so stale assets are
+reported instead of silently shipped.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from icon_export import ICO_SIZES, ExportTarget
+
+ANDROID_LAUNCHER_DP = 48
+ANDROID_DENSITIES: Dict[str, float] = {
+    "mdpi": 1.0,
+    "hdpi": 1.5,
+    "xhdpi": 2.0,
+    "xxhdpi": 3.0,
+    "xxxhdpi": 4.0,
+}
+ANDROID_LAUNCHER_NAME = "ic_launcher.png"
+# Browsers scale the favicon down for tabs; 32px stays sharp on high-DPI screens.
+WEB_FAVICON_SIZE = 32
+
+_FAVICON_LINK = re.compile(r"<link\b[^>]*\brel=[\"']icon[\"'][^>]*>", re.IGNORECASE)
+_HREF = re.compile(r"\bhref=[\"']([^\"']+)[\"']", re.IGNORECASE)
+_RC_ICON = re.compile(r'^\s*\w+\s+ICON\s+"([^"]+)"', re.MULTILINE)
+
+
+def _pixel_size(entry: Dict[str, str]) -> int:
+    points = float(entry["size"].split("x")[0])
+    scale = float(entry.get("scale", "1x").rstrip("x"))
+    return int(round(points * scale))
+
+
+def appiconset_targets(directory: Path) -> Tuple[List[ExportTarget], List[str]]:
+    contents = directory / "Contents.json"
+    issues: List[str] = []
+    if not contents.exists():
+        return [], [f"missing catalog: {contents}"]
+
+    images = json.loads(contents.read_text(encoding="utf-8")).get("images", [])
+    sizes: Dict[str, int] = {}
+    for entry in images:
+        name = entry.get("filename")
+        if not name:
+            issues.append(f"unassigned slot in {contents.name}: {entry.get('idiom')} {entry.get('size')}@{entry.get('scale')}")
+            continue
+        size = _pixel_size(entry)
+        if sizes.setdefault(name, size) != size:
+            issues.append(f"conflicting sizes for {directory / name}: {sizes[name]}px and {size}px")
+
+    targets = [ExportTarget(directory / name, size) for name, size in sizes.items()]
+    issues.extend(_missing_and_orphaned(directory.glob("*.png"), targets))
+    return targets, issues
+
+
+def android_targets(res_dir: Path) -> Tuple[List[ExportTarget], List[str]]:
+    targets = [
+        ExportTarget(res_dir / f"mipmap-{density}" / ANDROID_LAUNCHER_NAME, int(round(ANDROID_LAUNCHER_DP * scale)))
+        for density, scale in ANDROID_DENSITIES.items()
+    ]
+    issues = _missing_and_orphaned(res_dir.glob("mipmap-*/*.png"), targets)
+    for d in sorted(res_dir.glob("mipmap-*")):
+        if d.is_dir() and d.name.split("-", 1)[1] not in ANDROID_DENSITIES:
+            issues.append(f"unknown density bucket: {d}")
+    return targets, issues
+
+
+def _web_icon(web_dir: Path, entry: Dict[str, str]) -> Tuple[List[ExportTarget], List[str]]:
+    src, sizes = entry.get("src", ""), entry.get("sizes", "")
+    if not src.endswith(".png"):
+        return [], [f"unsupported web icon (only PNG is generated): {src or entry}"]
+    try:
+        w, h = (int(v) for v in sizes.split("x"))
+    except ValueError:
+        return [], [f"web icon {src} has unparseable sizes {sizes!r}"]
+    if w != h:
+        return [], [f"web icon {src} is not square: {sizes}"]
+    kind = "maskable" if "maskable" in entry.get("purpose", "any").split() else "png"
+    return [ExportTarget(web_dir / src, w, kind)], []
+
+
+def web_targets(web_dir: Path) -> Tuple[List[ExportTarget], List[str]]:
+    manifest = web_dir / "manifest.json"
+    if not manifest.exists():
+        return [], [f"missing web manifest: {manifest}"]
+    targets: List[ExportTarget] = []
+    issues: List[str] = []
+    for entry in json.loads(manifest.read_text(encoding="utf-8")).get("icons", []):
+        found, problems = _web_icon(web_dir, entry)
+        targets.extend(found)
+        issues.extend(problems)
+
+    index = web_dir / "index.html"
+    link = _FAVICON_LINK.search(index.read_text(encoding="utf-8")) if index.exists() else None
+    href = _HREF.search(link.group(0)) if link else None
+    if href and href.group(1).endswith(".png"):
+        targets.append(ExportTarget(web_dir / href.group(1), WEB_FAVICON_SIZE))
+    else:
+        issues.append(f"no PNG favicon linked from {index}")
+    issues.extend(_missing_and_orphaned(web_dir.glob("icons/*.png"), targets))
+    return targets, issues
+
+
+def windows_targets(runner_dir: Path) -> Tuple[List[ExportTarget], List[str]]:
+    rc = runner_dir / "Runner.rc"
+    if not rc.exists():
+        return [], [f"missing resource script: {rc}"]
+    # Resource scripts escape backslashes: "resources\\app_icon.ico".
+    text = rc.read_text(encoding="utf-8", errors="replace")
+    names = [m.group(1).replace("\\\\", "/") for m in _RC_ICON.finditer(text)]
+    if not names:
+        return [], [f"no ICON resource in {rc}"]
+    targets = [ExportTarget(runner_dir / name, max(ICO_SIZES), "ico") for name in names]
+    return targets, [f"missing: {t.path}" for t in targets if not t.path.exists()]
+
+
+def _missing_and_orphaned(existing: Iterable[Path], targets: Sequence[ExportTarget]) -> List[str]:
+    expected = {t.path for t in targets}
+    issues = [f"missing: {t.path}" for t in targets if not t.path.exists()]
+    issues.extend(f"orphaned (not referenced): {p}" for p in sorted(existing) if p not in expected)
+    return issues
+
+
+def unique_sizes(targets: Sequence[ExportTarget]) -> List[int]:
+    return sorted({t.size for t in targets})
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory of the untiled and tiled image pipelines.
+
+Each (task, image, mode) runs in a freshly spawned process, because peak RSS
+is a per-process high-water mark. The report lists the peak RSS and the peak
+above the post-import baseline for both modes, side by side. Tasks:
+- icon:   prep_source + blend_edge_canvas (generate_app_icons.py)
+- screen: status bar crop + cover fit into the portrait phone screen
+          (screen_ingest.py)
+
+Without image arguments an 8K (7680x4320) synthetic master is generated, so the
+report also runs on CI machines that have no marketing assets.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+import generate_app_icons
+import screen_ingest
+import tiled
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage.
+    resource = None
+
+TASKS = ("icon", "screen")
+# Screen area of the portrait mockup phone (1020x2180 body, 50px bezel).
+SCREEN_SIZE = (920, 2080)
+PROC_STATUS = Path("/proc/self/status")
+
+
+def _proc_status_bytes(field: str) -> Optional[int]:
+    if PROC_STATUS.exists():
+        for line in PROC_STATUS.read_text().splitlines():
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def reset_peak_rss() -> Optional[int]:
+    """Restart the peak at the current RSS (Linux) and return that RSS; None where unsupported."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        return None
+    return _proc_status_bytes("VmRSS")
+
+
+def peak_rss_bytes() -> int:
+    # Linux keeps ru_maxrss across exec, so a spawned child would report its
+    # parent's peak; VmHWM belongs to the current address space only.
+    peak = _proc_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    assert resource is not None, "peak RSS needs /proc or the resource module"
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB on Linux.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure(task: str, path: Path, strip_rows: Optional[int]) -> Tuple[int, int, float]:
+    baseline = peak_rss_bytes()
+    start = time.perf_counter()
+    if task == "icon":
+        src = generate_app_icons.prep_source(path, strip_rows)
+        generate_app_icons.blend_edge_canvas(src, generate_app_icons.make_gradient(1024), strip_rows=strip_rows)
+    else:
+        screen_ingest.fit_screen(Image.open(path), SCREEN_SIZE, strip_rows)
+    return peak_rss_bytes(), baseline, time.perf_counter() - start
+
+
+def in_clean_process(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def measure(task: str, path: Path, strip_rows: Optional[int]) -> Tuple[int, int, float]:
+    """(peak RSS, baseline RSS, seconds) of one run in a clean process."""
+    return in_clean_process(_measure, task, path, strip_rows)
+
+
+def synthetic_master(size: Tuple[int, int], directory: Path) -> Path:
+    # Gradient plus noise so the resampling filters do real work.
+    w, h = size
+    img = Image.merge(
+        "RGB",
+        (
+            Image.linear_gradient("L").resize(size),
+            Image.linear_gradient("L").rotate(90).resize(size),
+            Image.effect_noise(size, 64),
+        ),
+    )
+    path = directory / f"synthetic_{w}x{h}.png"
+    img.save(path, compress_level=1)
+    return path
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1 << 20):8.1f} MiB"
+
+
+def format_report(rows: List[Tuple[str, Path, Tuple[int, int, float], Tuple[int, int, float]]]) -> str:
+    lines = [f"  {'task':<7} {'untiled peak':>14} {'(+work)':>14} {'tiled peak':>14} {'(+work)':>14}  image"]
+    for task, path, (u_peak, u_base, u_s), (t_peak, t_base, t_s) in rows:
+        lines.append(
+            f"  {task:<7} {_mib(u_peak):>14} {_mib(u_peak - u_base):>14}"
+            f" {_mib(t_peak):>14} {_mib(t_peak - t_base):>14}  {path.name}"
+            f"  ({u_s:.2f}s / {t_s:.2f}s)"
+        )
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report peak RSS of untiled vs tiled image processing.")
+    parser.add_argument("images", nargs="*", type=Path, help="Source images (default: a synthetic 8K master).")
+    parser.add_argument("--task", choices=TASKS, action="append", help="Task to measure (repeatable; default: all).")
+    parser.add_argument(
+        "--synthetic",
+        default="7680x4320",
+        metavar="WxH",
+        help="Size of the generated master when no images are given (default: 7680x4320).",
+    )
+    parser.add_argument(
+        "--strip-rows",
+        type=int,
+        default=tiled.DEFAULT_STRIP_ROWS,
+        help=f"Output rows per strip for the tiled runs (default: {tiled.DEFAULT_STRIP_ROWS}).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if resource is None and not PROC_STATUS.exists():
+        sys.exit("Peak RSS reporting needs /proc or the resource module (macOS/Linux).")
+    with tempfile.TemporaryDirectory() as tmp:
+        images = args.images
+        if not images:
+            w, h = (int(v) for v in args.synthetic.lower().split("x"))
+            # Built in a child so this process stays small for the measurements.
+            images = [in_clean_process(synthetic_master, (w, h), Path(tmp))]
+        rows = []
+        for path in images:
+            for task in args.task or TASKS:
+                rows.append((task, path, measure(task, path, None), measure(task, path, args.strip_rows)))
+    print(f"Peak RSS, untiled vs tiled ({args.strip_rows} rows per strip); +work is above the post-import baseline:")
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Font registry for mockup text rendering.
+
+Each font file is resolved once per process (font cache, system font dirs)
+and FreeTypeFont instances are memoized by (family, size) in a bounded LRU.
+A family carries its variation axes, so the key is effectively
+(file, size, axes) and set_variation_by_axes runs once per instance instead
+of on every text-fitting step.
+
+Rendering never downloads. scripts/fetch_mockup_fonts.py fills the font cache
+(in parallel, or from a local directory/archive) and pins every file's
+sha256 in mockup_fonts.lock.json. Every FONT_URLS font is required: one that
+is missing from the cache, has no checksum in the lockfile, or does not
+match its pinned checksum raises MissingFontError instead of silently
+falling back to another face. The fallback faces (and Pillow's default
+bitmap font) are only used after configure(allow_fallback=True), for rough
+previews.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+import stage_trace
+from build_cache import file_sha256
+
+ROOT = Path(__file__).resolve().parents[1]
+FONT_CACHE_DIR = ROOT / ".cache" / "mockup_fonts"
+FONT_LOCK = Path(__file__).resolve().with_name("mockup_fonts.lock.json")
+FETCH_HINT = "run scripts/fetch_mockup_fonts.py (add --from DIR_OR_ARCHIVE on offline machines)"
+
+FREDOKA_VAR_NAME = "Fredoka-Var.ttf"
+NUNITO_VAR_NAME = "Nunito-Var.ttf"
+
+# Google Fonts raw (open-source). Fetched into .cache by fetch_mockup_fonts.py; the
+# URLs track the main branch, so the lockfile's checksums are what pin the files.
+FONT_URLS = {
+    # Variable fonts (supported by Pillow / FreeType on macOS).
+    FREDOKA_VAR_NAME: "https://raw.githubusercontent.com/google/fonts/main/ofl/fredoka/Fredoka%5Bwdth,wght%5D.ttf",
+    NUNITO_VAR_NAME: "https://raw.githubusercontent.com/google/fonts/main/ofl/nunito/Nunito%5Bwght%5D.ttf",
+}
+
+SYSTEM_FONT_DIRS = (
+    Path("/System/Library/Fonts"),
+    Path("/System/Library/Fonts/Supplemental"),
+    Path("/Library/Fonts"),
+    Path.home() / "Library" / "Fonts",
+)
+
+# Sizes probed while fitting text x a few families; plenty for a batch run.
+FONT_CACHE_SIZE = 128
+
+_allow_fallback = False
+
+
+@dataclass(frozen=True)
+class FontFamily:
+    name: str
+    axes: Tuple[int, ...] = ()
+    fallbacks: Tuple[str, ...] = ()
+
+
+# Title font (Fredoka) with a bold weight. axes: Weight (300..700), Width (75..125)
+TITLE = FontFamily(
+    FREDOKA_VAR_NAME,
+    axes=(700, 100),
+    fallbacks=(
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+    ),
+)
+# Subtitle font (Nunito) with a semibold-ish weight. axis: Weight (200..1000)
+BODY = FontFamily(
+    NUNITO_VAR_NAME,
+    axes=(650,),
+    fallbacks=("/System/Library/Fonts/Supplemental/Arial.ttf",),
+)
+
+
+class MissingFontError(FileNotFoundError):
+    """A required font is missing from the font cache or does not match its pinned checksum."""
+
+
+def configure(allow_fallback: bool) -> None:
+    """Allow fallback faces for missing fonts (previews only); also called from pool initializers."""
+    global _allow_fallback
+    if allow_fallback != _allow_fallback:
+        _allow_fallback = allow_fallback
+        clear_cache()
+
+
+def load_lock(path: Path = FONT_LOCK) -> Dict[str, Dict[str, Any]]:
+    """name -> {"url", "sha256", "size"}; a null sha256 is a font that still has to be fetched and pinned."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("fonts", {})
+
+
+@lru_cache(maxsize=1)
+def _pins() -> Dict[str, Dict[str, Any]]:
+    return load_lock()
+
+
+def font_problem(name: str) -> Optional[str]:
+    path = FONT_CACHE_DIR / name
+    if not path.exists():
+        return f"{name} is missing from {FONT_CACHE_DIR}"
+    pin = _pins().get(name, {})
+    if not pin.get("sha256"):
+        # main-branch URLs are mutable; an unpinned file could be any revision.
+        return f"{name} has no sha256 in {FONT_LOCK.name}; commit the lockfile the fetch writes"
+    if path.stat().st_size != pin.get("size") or file_sha256(path) != pin["sha256"]:
+        return f"{path} does not match the sha256 pinned in {FONT_LOCK.name}"
+    return None
+
+
+def check_fonts() -> List[str]:
+    """Problems with the required fonts; callers fail fast on any before rendering."""
+    return [p for p in (font_problem(name) for name in FONT_URLS) if p is not None]
+
+
+@lru_cache(maxsize=None)
+def resolve_font_path(candidate: str) -> Path | None:
+    """Resolve a font file once per process; misses are cached too. Never touches the network."""
+    with stage_trace.span("resolve_font_path", "font", candidate=candidate) as info:
+        path = _resolve_font_path(candidate)
+        info["path"] = str(path)
+        return path
+
+
+def _resolve_font_path(candidate: str) -> Path | None:
+    # Absolute path.
+    p = Path(candidate)
+    if p.is_absolute() and p.exists():
+        return p
+
+    # Required fonts must come from the cache, verified.
+    if candidate in FONT_URLS:
+        problem = font_problem(candidate)
+        if problem is None:
+            return FONT_CACHE_DIR / candidate
+        if not _allow_fallback:
+            raise MissingFontError(f"{problem}; {FETCH_HINT}.")
+        return None
+
+    # Cache.
+    cached = FONT_CACHE_DIR / candidate
+    if cached.exists():
+        return cached
+
+    # Try common font dirs (in case user has it installed).
+    for base in SYSTEM_FONT_DIRS:
+        hit = next(base.glob(f"*{candidate.replace('.ttf','')}*"), None)
+        if hit and hit.exists():
+            return hit
+    return None
+
+
+@lru_cache(maxsize=None)
+def _warn_fallback(name: str) -> None:
+    print(f"Warning: font {name} not found, using a fallback face; {FETCH_HINT}.", file=sys.stderr)
+
+
+def _open_primary(family: FontFamily, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    path = resolve_font_path(family.name)
+    if path is None:
+        _warn_fallback(family.name)
+        return None
+    try:
+        font = ImageFont.truetype(str(path), size=size)
+        if family.axes and hasattr(font, "set_variation_by_axes"):
+            font.set_variation_by_axes(list(family.axes))
+        return font
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def get_font(family: FontFamily, size: int) -> ImageFont.ImageFont:
+    # Only cache misses get here, so each span is one font load.
+    with stage_trace.span("load_font", "font", family=family.name, size=size):
+        return _load_font(family, size)
+
+
+def _load_font(family: FontFamily, size: int) -> ImageFont.ImageFont:
+    font = _open_primary(family, size)
+    if font is not None:
+        return font
+    if not _allow_fallback:
+        raise MissingFontError(f"{family.name} could not be loaded; {FETCH_HINT}.")
+    for cand in family.fallbacks:
+        path = resolve_font_path(cand)
+        if path is not None:
+            return ImageFont.truetype(str(path), size=size)
+    return ImageFont.load_default()
+
+
+def clear_cache() -> None:
+    get_font.cache_clear()
+    resolve_font_path.cache_clear()
+    _pins.cache_clear()
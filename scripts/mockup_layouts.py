@@ -0,0 +1,144 @@
+"""
+Resolution-independent mockup layouts and App Store device sizes.
+
+Each layout is described once, in pixels of the canvas it was designed on
+(the 6.9" iPhone, 1290x2796, or its landscape twin). place() maps it onto
+any device canvas:
+- positions (glow centers, the phone's center) scale per axis, so elements
+  stay where they were relative to the canvas;
+- lengths (caption offsets and sizes, glow radii and blurs, corner, bezel,
+  the chrome's shadow and strokes) scale by the geometric mean of both
+  axes, which keeps their area share;
+- the phone body keeps its area share but takes the device's aspect ratio,
+  so a tablet screenshot fills a tablet-shaped frame.
+
+On the reference device every number is unchanged, so the layout itself
+adds no difference there; pixels still move by up to BLUR_TOLERANCE levels
+where mockup_templates blurs glows at reduced resolution. The same mapping
+renders drafts: place_on(..., scale=0.25)
+is the device canvas at a quarter of its size. Placements are memoized, so
+every locale and screen of a device shares one computation.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from mockup_templates import Box, Color, Glow
+
+Size = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Device:
+    name: str
+    # Portrait canvas; landscape layouts use it transposed.
+    size: Size
+    # Tablet bodies have tighter corners relative to their size than phones.
+    corner_scale: float = 1.0
+
+
+# App Store Connect screenshot sizes (portrait).
+DEVICES: Dict[str, Device] = {
+    d.name: d
+    for d in (
+        Device("iphone-6.9", (1290, 2796)),
+        Device("iphone-6.5", (1242, 2688)),
+        Device("ipad-13", (2064, 2752), corner_scale=0.45),
+    )
+}
+REFERENCE_DEVICE = "iphone-6.9"
+
+
+@dataclass(frozen=True)
+class Caption:
+    y: int
+    size: int
+    color: Color
+    min_size: int = 44
+
+
+@dataclass(frozen=True)
+class MockupLayout:
+    """A layout in pixels of the reference canvas (transposed when landscape)."""
+
+    landscape: bool
+    top: Color
+    bottom: Color
+    glows: Tuple[Glow, ...]
+    title: Caption
+    subtitle: Caption
+    phone: Box
+    corner: int
+    bezel: int
+
+
+@dataclass(frozen=True)
+class Placement:
+    """A layout resolved to pixels of one canvas."""
+
+    size: Size
+    top: Color
+    bottom: Color
+    glows: Tuple[Glow, ...]
+    title: Caption
+    subtitle: Caption
+    phone: Box
+    corner: int
+    bezel: int
+    # Size of the phone relative to the reference layout; scales the chrome's shadow and strokes.
+    scale: float = 1.0
+
+
+def canvas_size(layout: MockupLayout, device: Device) -> Size:
+    w, h = device.size
+    return (h, w) if layout.landscape else (w, h)
+
+
+def _caption(c: Caption, g: float) -> Caption:
+    return Caption(round(c.y * g), round(c.size * g), c.color, round(c.min_size * g))
+
+
+@lru_cache(maxsize=64)
+def place(layout: MockupLayout, size: Size, corner_scale: float = 1.0) -> Placement:
+    ref = canvas_size(layout, DEVICES[REFERENCE_DEVICE])
+    sx, sy = size[0] / ref[0], size[1] / ref[1]
+    g = math.sqrt(sx * sy)
+
+    x0, y0, x1, y1 = layout.phone
+    bw, bh = x1 - x0, y1 - y0
+    # The body follows the device's aspect change in its own orientation: on a
+    # wider canvas a portrait phone gets wider, a landscape phone gets taller.
+    aspect = sx / sy if (bw >= bh) == (ref[0] >= ref[1]) else sy / sx
+    w, h = bw * g * math.sqrt(aspect), bh * g / math.sqrt(aspect)
+    fit = min(1.0, size[0] / w, size[1] / h)
+    w, h = w * fit, h * fit
+    left = round((x0 + x1) / 2 * sx - w / 2)
+    top = round((y0 + y1) / 2 * sy - h / 2)
+    k = g * fit
+
+    return Placement(
+        size=tuple(size),
+        top=layout.top,
+        bottom=layout.bottom,
+        glows=tuple(
+            Glow((round(gl.center[0] * sx), round(gl.center[1] * sy)), round(gl.radius * g), gl.color, gl.blur * g)
+            for gl in layout.glows
+        ),
+        title=_caption(layout.title, g),
+        subtitle=_caption(layout.subtitle, g),
+        phone=(left, top, left + round(w), top + round(h)),
+        corner=round(layout.corner * k * corner_scale),
+        bezel=round(layout.bezel * k),
+        scale=k,
+    )
+
+
+def place_on(layout: MockupLayout, device: Optional[str], scale: float = 1.0) -> Placement:
+    """The layout on a device canvas, or on that canvas scaled down by scale (drafts)."""
+    d = DEVICES[device or REFERENCE_DEVICE]
+    w, h = canvas_size(layout, d)
+    return place(layout, (round(w * scale), round(h * scale)), d.corner_scale)
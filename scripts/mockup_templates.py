@@ -0,0 +1,294 @@
+"""
+Template layers for App Store mockups.
+
+Every mockup of a layout shares the same gradient background, soft glows and
+phone chrome (shadow, body, rim). These layers are rendered once per
+parameter set, kept in memory and, optionally, on disk under
+.cache/mockup_templates, so a mockup only pays for its text, one screenshot
+resize and a paste. Pool workers get the layers from the parent through
+shared memory instead (preload(), see shared_image.py).
+
+The phone chrome is stored cropped to its padded bounding box and composited
+at an offset. That is pixel-identical to drawing it on the canvas directly, because
+the body is opaque and the shadow/rim are composited the same way.
+
+Blurred shapes (glows, shadow, rim) are painted and blurred only inside their
+bounding box plus the Gaussian halo, then composited at an offset, instead of
+blurring a full-canvas layer. Large blurs (the glows) also run at reduced
+resolution; see BLUR_TOLERANCE.
+
+Every parameter set gets its own file, so trim_cache() keeps the directory
+under TEMPLATE_CACHE_MAX_BYTES by evicting the least recently used layers.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+import stage_trace
+from build_cache import BuildCache, files_fingerprint
+from gradients import linear_gradient
+from tiled import blur_halo
+
+ROOT = Path(__file__).resolve().parents[1]
+TEMPLATE_CACHE_DIR = ROOT / ".cache" / "mockup_templates"
+# A full device x layout matrix needs a few MB; old layouts and code versions age out.
+TEMPLATE_CACHE_MAX_BYTES = 64 << 20
+
+Color = Tuple[int, int, int]
+Box = Tuple[int, int, int, int]
+LayerKey = Tuple[object, ...]
+
+GLOW_BLUR_RADIUS = 80
+# Blurs whose radius stays >= this after downscaling run at 1/2 or 1/4
+# resolution and are upsampled. On the mockup glows that changes at most
+# BLUR_TOLERANCE levels per channel compared with a full-resolution blur
+# (checked by check_blend_engines.py).
+MIN_REDUCED_BLUR_RADIUS = 16
+BLUR_TOLERANCE = 3
+
+_disk: Optional[BuildCache] = None
+_code: Optional[str] = None
+# Layers handed over by the parent process (read-only shared memory views).
+_preloaded: Dict[LayerKey, Image.Image] = {}
+
+
+@dataclass(frozen=True)
+class Glow:
+    center: Tuple[int, int]
+    radius: int
+    color: Tuple[int, int, int, int]
+    blur: float = GLOW_BLUR_RADIUS
+
+
+def configure(disk_dir: Optional[Path]) -> None:
+    """Enable (or disable with None) the on-disk layer cache; also used as a pool initializer."""
+    global _disk
+    _disk = BuildCache(disk_dir) if disk_dir is not None else None
+
+
+def trim_cache() -> None:
+    """Evict least recently used layers from the disk cache; call once a run has finished."""
+    if _disk is not None:
+        _disk.trim(TEMPLATE_CACHE_MAX_BYTES)
+
+
+def _disk_key(*parts: object) -> str:
+    global _code
+    if _code is None:
+        here = Path(__file__).resolve().parent
+        _code = files_fingerprint(here / "mockup_templates.py", here / "gradients.py", here / "tiled.py")
+    assert _disk is not None
+    return _disk.key(_code, *parts)
+
+
+def _reduction(radius: float) -> int:
+    for factor in (4, 2):
+        if radius / factor >= MIN_REDUCED_BLUR_RADIUS:
+            return factor
+    return 1
+
+
+def gaussian_blur(layer: Image.Image, radius: float, exact: bool = False) -> Image.Image:
+    factor = 1 if exact else _reduction(radius)
+    if factor == 1:
+        return layer.filter(ImageFilter.GaussianBlur(radius=radius))
+    w, h = layer.size
+    small = layer.reduce(factor).filter(ImageFilter.GaussianBlur(radius=radius / factor))
+    # The box keeps the upsampled grid aligned when w/h are not multiples of factor.
+    return small.resize((w, h), Image.Resampling.BICUBIC, box=(0, 0, w / factor, h / factor))
+
+
+def composite_blurred(
+    canvas: Image.Image,
+    bbox: Box,
+    paint: Callable[[ImageDraw.ImageDraw, int, int], None],
+    radius: float,
+    exact: bool = False,
+) -> None:
+    """Paint a shape into a layer covering bbox plus the blur halo, blur it and composite it at its offset.
+
+    paint(draw, dx, dy) must shift its canvas coordinates by (dx, dy). With
+    exact=True the result is identical to blurring a full-canvas layer; the
+    region is clipped to the canvas so edge handling matches too.
+    """
+    pad = blur_halo(radius)
+    w, h = canvas.size
+    x0, y0 = max(0, bbox[0] - pad), max(0, bbox[1] - pad)
+    x1, y1 = min(w, bbox[2] + pad + 1), min(h, bbox[3] + pad + 1)
+    if x0 >= x1 or y0 >= y1:
+        return
+    with stage_trace.span("composite_blurred", "blur", radius=radius, pixels=(x1 - x0) * (y1 - y0)):
+        layer = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        paint(ImageDraw.Draw(layer), -x0, -y0)
+        canvas.alpha_composite(gaussian_blur(layer, radius, exact), dest=(x0, y0))
+
+
+def add_soft_glow(
+    base: Image.Image,
+    xy: Tuple[int, int],
+    radius: int,
+    color: Tuple[int, int, int, int],
+    exact: bool = False,
+    blur: float = GLOW_BLUR_RADIUS,
+) -> None:
+    x, y = xy
+    box = (x - radius, y - radius, x + radius, y + radius)
+
+    def paint(draw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        draw.ellipse((box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy), fill=color)
+
+    composite_blurred(base, box, paint, blur, exact)
+
+
+def _shadow_offset(scale: float) -> Tuple[int, int]:
+    return round(8 * scale), round(16 * scale)
+
+
+def draw_phone_chrome(
+    canvas: Image.Image, body_box: Box, corner: int, exact: bool = False, scale: float = 1.0
+) -> None:
+    # scale sizes the shadow, strokes and rim along with the phone body.
+    x0, y0, x1, y1 = body_box
+    ox, oy = _shadow_offset(scale)
+    stroke = max(1, round(2 * scale))
+    rim = round(6 * scale)
+
+    shadow_box = (x0 + ox, y0 + oy, x1 + ox, y1 + oy)
+
+    def paint_shadow(draw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        draw.rounded_rectangle(
+            (shadow_box[0] + dx, shadow_box[1] + dy, shadow_box[2] + dx, shadow_box[3] + dy),
+            radius=corner,
+            fill=(0, 0, 0, 95),
+        )
+
+    composite_blurred(canvas, shadow_box, paint_shadow, 18 * scale, exact)
+
+    draw = ImageDraw.Draw(canvas)
+    # iPhone-ish front render (modern flat sides + Dynamic Island).
+    # Not a real iPhone 17 CAD, but matches the current "iPhone" visual language.
+    draw.rounded_rectangle((x0, y0, x1, y1), radius=corner, fill=(16, 18, 22))
+    draw.rounded_rectangle(
+        (x0 + stroke, y0 + stroke, x1 - stroke, y1 - stroke),
+        radius=corner - stroke,
+        outline=(96, 102, 112),
+        width=stroke,
+    )
+
+    # Subtle rim highlight.
+    def paint_rim(draw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        draw.rounded_rectangle(
+            (x0 + rim + dx, y0 + rim + dy, x1 - rim + dx, y1 - rim + dy),
+            radius=corner - rim,
+            outline=(255, 255, 255, 28),
+            width=stroke,
+        )
+
+    composite_blurred(canvas, body_box, paint_rim, scale, exact)
+
+
+def _render_background(
+    size: Tuple[int, int], top: Color, bottom: Color, glows: Tuple[Glow, ...], exact: bool = False
+) -> Image.Image:
+    bg = linear_gradient(size, (top, bottom)).convert("RGBA")
+    for glow in glows:
+        add_soft_glow(bg, glow.center, glow.radius, glow.color, exact, glow.blur)
+    return bg
+
+
+@lru_cache(maxsize=8)
+def _background(size: Tuple[int, int], top: Color, bottom: Color, glows: Tuple[Glow, ...]) -> Image.Image:
+    if _disk is None:
+        return _render_background(size, top, bottom, glows)
+    key = _disk_key("background", size, top, bottom, glows)
+    img = _disk.load_image("bg", key)
+    if img is None:
+        img = _render_background(size, top, bottom, glows)
+        _disk.store_image("bg", key, img, replace=False)
+    return img
+
+
+def background_key(size: Tuple[int, int], top: Color, bottom: Color, glows: Tuple[Glow, ...]) -> LayerKey:
+    return ("bg", tuple(size), tuple(top), tuple(bottom), tuple(glows))
+
+
+def background(size: Tuple[int, int], top: Color, bottom: Color, glows: Tuple[Glow, ...]) -> Image.Image:
+    """Gradient plus glows; a fresh copy the caller may draw on."""
+    with stage_trace.span("background", size=tuple(size)) as info:
+        key = background_key(size, top, bottom, glows)
+        img = _preloaded.get(key)
+        info["preloaded"] = img is not None
+        if img is None:
+            hits = _background.cache_info().hits
+            img = _background(*key[1:])
+            info["memory_hit"] = _background.cache_info().hits > hits
+        return img.copy()
+
+
+def chrome_region(canvas_size: Tuple[int, int], body_box: Box, scale: float = 1.0) -> Box:
+    # Shadow is offset by (8, 16) and blurred with radius 18, times scale.
+    pad = blur_halo(18 * scale)
+    dx, dy = _shadow_offset(scale)
+    x0, y0, x1, y1 = body_box
+    w, h = canvas_size
+    return (max(0, x0 - pad), max(0, y0 - pad), min(w, x1 + dx + pad), min(h, y1 + dy + pad))
+
+
+def _render_chrome(canvas_size: Tuple[int, int], body_box: Box, corner: int, scale: float) -> Image.Image:
+    rx0, ry0, rx1, ry1 = chrome_region(canvas_size, body_box, scale)
+    layer = Image.new("RGBA", (rx1 - rx0, ry1 - ry0), (0, 0, 0, 0))
+    x0, y0, x1, y1 = body_box
+    draw_phone_chrome(layer, (x0 - rx0, y0 - ry0, x1 - rx0, y1 - ry0), corner, scale=scale)
+    return layer
+
+
+@lru_cache(maxsize=8)
+def _chrome(canvas_size: Tuple[int, int], body_box: Box, corner: int, scale: float) -> Image.Image:
+    if _disk is None:
+        return _render_chrome(canvas_size, body_box, corner, scale)
+    key = _disk_key("chrome", canvas_size, body_box, corner, scale)
+    img = _disk.load_image("chrome", key)
+    if img is None:
+        img = _render_chrome(canvas_size, body_box, corner, scale)
+        _disk.store_image("chrome", key, img, replace=False)
+    return img
+
+
+def chrome_key(canvas_size: Tuple[int, int], body_box: Box, corner: int, scale: float = 1.0) -> LayerKey:
+    return ("chrome", tuple(canvas_size), tuple(body_box), corner, scale)
+
+
+def composite_phone_chrome(canvas: Image.Image, body_box: Box, corner: int, scale: float = 1.0) -> None:
+    """Same pixels as draw_phone_chrome(canvas, ...), from the cached layer."""
+    with stage_trace.span("composite_phone_chrome", body_box=tuple(body_box)) as info:
+        key = chrome_key(canvas.size, body_box, corner, scale)
+        layer = _preloaded.get(key)
+        info["preloaded"] = layer is not None
+        if layer is None:
+            hits = _chrome.cache_info().hits
+            layer = _chrome(*key[1:])
+            info["memory_hit"] = _chrome.cache_info().hits > hits
+        region = chrome_region(canvas.size, body_box, scale)
+        canvas.alpha_composite(layer, dest=region[:2])
+
+
+def cached_layer(key: LayerKey) -> Image.Image:
+    """The cached layer for a background_key() or chrome_key(); rendered or loaded on first use."""
+    return (_background if key[0] == "bg" else _chrome)(*key[1:])
+
+
+def preload(layers: Dict[LayerKey, Image.Image]) -> None:
+    """Use these layers instead of rendering or loading them (pool workers; see shared_image)."""
+    _preloaded.update(layers)
+
+
+def clear_cache() -> None:
+    _preloaded.clear()
+    _background.cache_clear()
+    _chrome.cache_clear()
@@ -0,0 +1,151 @@
+"""
+Text layout for mockup captions.
+
+Word advance widths are measured once per font and reused, so wrapping a
+caption is linear in its word count instead of re-measuring the growing line
+for every word. Fitting binary-searches the largest font size that keeps the
+caption within a line count (and optionally a height), and returns a
+TextLayout that can be drawn any number of times.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from PIL import ImageDraw, ImageFont
+
+FontLoader = Callable[[int], ImageFont.ImageFont]
+
+
+class WordWidths:
+    """Advance widths of words for one font; whitespace between words is one space advance."""
+
+    def __init__(self, font: ImageFont.ImageFont) -> None:
+        self.font = font
+        self.space = font.getlength(" ")
+        self._widths: Dict[str, float] = {}
+
+    def __call__(self, word: str) -> float:
+        width = self._widths.get(word)
+        if width is None:
+            width = self._widths[word] = self.font.getlength(word)
+        return width
+
+
+_MEASURERS: "WeakKeyDictionary[ImageFont.ImageFont, WordWidths]" = WeakKeyDictionary()
+
+
+def word_widths(font: ImageFont.ImageFont) -> WordWidths:
+    measurer = _MEASURERS.get(font)
+    if measurer is None:
+        measurer = _MEASURERS[font] = WordWidths(font)
+    return measurer
+
+
+def wrap_words(text: str, font: ImageFont.ImageFont, max_width: float) -> List[str]:
+    words = text.split()
+    if not words:
+        return [text]
+    measure = word_widths(font)
+    lines: List[str] = []
+    current: List[str] = []
+    current_w = 0.0
+    for w in words:
+        ww = measure(w)
+        candidate_w = current_w + measure.space + ww if current else ww
+        if candidate_w <= max_width or not current:
+            current.append(w)
+            current_w = candidate_w
+            continue
+        lines.append(" ".join(current))
+        current = [w]
+        current_w = ww
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    lines: Tuple[str, ...]
+    # Top-left of each line relative to the layout origin (x already centered in the box width).
+    positions: Tuple[Tuple[int, int], ...]
+    size: int
+    line_height: int
+    font: ImageFont.ImageFont
+
+    @property
+    def height(self) -> int:
+        return self.line_height * len(self.lines)
+
+    def draw(
+        self,
+        draw: ImageDraw.ImageDraw,
+        origin: Tuple[int, int],
+        fill: Tuple[int, ...],
+        shadow: Optional[Tuple[int, ...]] = (0, 0, 0, 40),
+        shadow_offset: int = 2,
+    ) -> None:
+        ox, oy = origin
+        for line, (x, y) in zip(self.lines, self.positions):
+            if shadow is not None:
+                # Subtle shadow for legibility on gradients.
+                draw.text((ox + x, oy + y + shadow_offset), line, font=self.font, fill=shadow)
+            draw.text((ox + x, oy + y), line, font=self.font, fill=fill)
+
+
+def _fits(lines: List[str], size: int, line_spacing: float, max_lines: int, max_height: Optional[int]) -> bool:
+    if len(lines) > max_lines:
+        return False
+    return max_height is None or int(size * line_spacing) * len(lines) <= max_height
+
+
+@lru_cache(maxsize=256)
+def fit_text(
+    text: str,
+    load_font: FontLoader,
+    max_size: int,
+    box_width: int,
+    *,
+    max_width: Optional[int] = None,
+    max_lines: int = 2,
+    min_size: int = 44,
+    line_spacing: float = 1.15,
+    max_height: Optional[int] = None,
+) -> TextLayout:
+    """Largest size in [min_size, max_size] whose wrapped text fits; min_size (truncated to max_lines) otherwise."""
+    wrap_w = box_width if max_width is None else max_width
+    min_size = min(min_size, max_size)
+
+    def wrapped(size: int) -> List[str]:
+        return wrap_words(text, load_font(size), wrap_w)
+
+    size, lines = max_size, wrapped(max_size)
+    if not _fits(lines, size, line_spacing, max_lines, max_height):
+        lo, hi = min_size, max_size - 1
+        size, lines = min_size, wrapped(min_size)
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            candidate = wrapped(mid)
+            if _fits(candidate, mid, line_spacing, max_lines, max_height):
+                size, lines = mid, candidate
+                lo = mid + 1
+            else:
+                hi = mid - 1
+
+    font = load_font(size)
+    line_h = int(size * line_spacing)
+    lines = lines[:max_lines]
+    positions = []
+    for i, line in enumerate(lines):
+        box = font.getbbox(line)
+        positions.append(((box_width - (box[2] - box[0])) // 2, i * line_h))
+    return TextLayout(tuple(lines), tuple(positions), size, line_h, font)
+
+
+def clear_cache() -> None:
+    fit_text.cache_clear()
+    _MEASURERS.clear()
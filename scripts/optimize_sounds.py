@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Shrink the game's WAV sound effects (assets/sounds) for bundle size and preload time.
+
+SoundService preloads every clip at start-up, and a WAV's size is exactly
+the PCM the device has to hold, so every byte saved here is also decode
+work and memory saved on low-end phones. Each clip is analyzed (sample
+rate, channels, leading/trailing silence, peak level) and rewritten as
+16-bit PCM with:
+- leading and trailing silence below --silence-db trimmed, keeping a short
+  pad so attacks and tails are not clipped;
+- identical channels folded to mono (any stereo clip with --mono);
+- with --max-bytes, the highest sample rate from RATES (down to
+  --min-rate) that fits the budget, falling back to mono first. --rate
+  caps the rate regardless of the budget.
+
+Sizes follow from frame counts, so the plan is chosen before anything is
+resampled. Resampling is band-limited (FFT) and needs numpy; without it
+clips keep their rate. --compress also encodes an AAC (.m4a) copy with a
+local ffmpeg, for comparison or for web builds. Nothing leaves the machine.
+
+By default only the before/after report is printed; --write replaces the
+clips in place and --out DIR writes them elsewhere.
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import stage_trace
+from asset_io import write_atomic
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it clips are trimmed and folded but keep their rate.
+    np = None
+
+ROOT = Path(__file__).resolve().parents[1]
+SOUNDS_DIR = ROOT / "assets" / "sounds"
+
+# Sample rates tried, highest first, when a clip is over its byte budget.
+RATES = (48000, 44100, 32000, 24000, 22050, 16000, 11025, 8000)
+DEFAULT_MIN_RATE = 16000
+DEFAULT_SILENCE_DB = -60.0
+# Silence kept before the first and after the last audible sample.
+TRIM_PAD_MS = 10
+WAV_HEADER_BYTES = 44
+OUT_WIDTH = 2
+FULL_SCALE = 32768
+AAC_BITRATE = "64k"
+
+# One list of 16-bit samples per channel.
+Channels = List[List[int]]
+
+
+@dataclass(frozen=True)
+class Clip:
+    rate: int
+    channels: Channels
+    # Sample width of the source file; the output is always 16-bit.
+    source_width: int = OUT_WIDTH
+
+    @property
+    def frames(self) -> int:
+        return len(self.channels[0]) if self.channels else 0
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.rate
+
+
+@dataclass(frozen=True)
+class Analysis:
+    rate: int
+    channels: int
+    width: int
+    frames: int
+    peak_db: float
+    # Frames before the first and after the last sample above the silence threshold.
+    lead: int
+    trail: int
+    identical_channels: bool
+
+    @property
+    def silent(self) -> bool:
+        return self.lead == self.frames
+
+
+@dataclass(frozen=True)
+class Plan:
+    start: int
+    end: int
+    mono: bool
+    rate: int
+
+
+@dataclass(frozen=True)
+class SoundResult:
+    path: Path
+    before_bytes: int
+    before_seconds: float
+    after_bytes: int
+    after_seconds: float
+    analysis: Analysis
+    plan: Plan
+    seconds: float
+    over_budget: bool
+    compressed_bytes: Optional[int] = None
+
+
+def wav_size(frames: int, channels: int) -> int:
+    return WAV_HEADER_BYTES + frames * channels * OUT_WIDTH
+
+
+def _to_16bit(data: bytes, width: int) -> array.array:
+    if width == 1:
+        # 8-bit WAV is unsigned.
+        return array.array("h", ((b - 128) << 8 for b in data))
+    if width == 2:
+        samples = array.array("h", data)
+    elif width == 3:
+        # Keep the top two bytes of each little-endian 24-bit sample.
+        top = (data[i + 1 : i + 3] for i in range(0, len(data), 3))
+        samples = array.array("h", (int.from_bytes(b, "little", signed=True) for b in top))
+    elif width == 4:
+        samples = array.array("i", data)
+        samples = array.array("h", (s >> 16 for s in samples))
+    else:
+        raise ValueError(f"unsupported sample width {width * 8} bit")
+    if sys.byteorder == "big" and width in (2, 4):
+        samples.byteswap()
+    return samples
+
+
+@stage_trace.traced()
+def read_wav(path: Path) -> Clip:
+    with wave.open(str(path), "rb") as w:
+        if w.getcomptype() != "NONE":
+            raise ValueError(f"{path.name}: compressed WAV ({w.getcompname()}) is not supported")
+        n, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        samples = _to_16bit(w.readframes(w.getnframes()), width)
+    return Clip(rate, [list(samples[c::n]) for c in range(n)], width)
+
+
+def encode_wav(clip: Clip) -> bytes:
+    interleaved = array.array("h", [0]) * (clip.frames * len(clip.channels))
+    for c, samples in enumerate(clip.channels):
+        interleaved[c :: len(clip.channels)] = array.array("h", samples)
+    if sys.byteorder == "big":
+        interleaved.byteswap()
+    buf = BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(len(clip.channels))
+        w.setsampwidth(OUT_WIDTH)
+        w.setframerate(clip.rate)
+        w.writeframes(interleaved.tobytes())
+    return buf.getvalue()
+
+
+def _db(amplitude: float) -> float:
+    return 20 * math.log10(amplitude / FULL_SCALE) if amplitude > 0 else -math.inf
+
+
+@stage_trace.traced()
+def analyze(clip: Clip, silence_db: float = DEFAULT_SILENCE_DB) -> Analysis:
+    threshold = FULL_SCALE * 10 ** (silence_db / 20)
+    loud = [max(abs(c[i]) for c in clip.channels) > threshold for i in range(clip.frames)]
+    first = next((i for i, on in enumerate(loud) if on), clip.frames)
+    last = next((i for i in range(clip.frames - 1, -1, -1) if loud[i]), clip.frames - 1)
+    peak = max((max(map(abs, c), default=0) for c in clip.channels), default=0)
+    return Analysis(
+        rate=clip.rate,
+        channels=len(clip.channels),
+        width=clip.source_width,
+        frames=clip.frames,
+        peak_db=_db(peak),
+        lead=first,
+        trail=clip.frames - 1 - last,
+        identical_channels=all(c == clip.channels[0] for c in clip.channels[1:]),
+    )
+
+
+def _resampled_frames(frames: int, src: int, dst: int) -> int:
+    return round(frames * dst / src)
+
+
+def plan_clip(
+    a: Analysis,
+    trim: bool = True,
+    mono: bool = False,
+    max_rate: Optional[int] = None,
+    min_rate: int = DEFAULT_MIN_RATE,
+    max_bytes: Optional[int] = None,
+) -> Tuple[Plan, bool]:
+    """(plan, over budget): the least destructive output that fits max_bytes."""
+    start, end = 0, a.frames
+    if trim and not a.silent:
+        pad = round(a.rate * TRIM_PAD_MS / 1000)
+        start, end = max(0, a.lead - pad), min(a.frames, a.frames - a.trail + pad)
+    frames = end - start
+    fold = a.channels > 1 and (mono or a.identical_channels)
+    # Without numpy nothing is resampled.
+    rate = min(a.rate, max_rate or a.rate) if np is not None else a.rate
+    rates = [rate] + ([r for r in RATES if min_rate <= r < rate] if np is not None else [])
+    channel_steps = [fold] if fold or a.channels == 1 else [False, True]
+
+    def fits(folded: bool, r: int) -> bool:
+        size = wav_size(_resampled_frames(frames, a.rate, r), 1 if folded else a.channels)
+        return max_bytes is None or size <= max_bytes
+
+    # Folding to mono costs less than lowering the rate, so it is tried first at each rate.
+    for r in rates:
+        for folded in channel_steps:
+            if fits(folded, r):
+                return Plan(start, end, folded, r), False
+    return Plan(start, end, channel_steps[-1], rates[-1]), True
+
+
+def resample(samples: List[int], src: int, dst: int) -> List[int]:
+    """Band-limited resampling of one channel (numpy FFT); frames scale by dst / src."""
+    n = len(samples)
+    m = _resampled_frames(n, src, dst)
+    if n == 0 or src == dst:
+        return list(samples)
+    # Zero padding keeps the FFT's wrap-around from leaking the end of the clip into its start.
+    padded = n + max(64, n // 16)
+    spectrum = np.fft.rfft(np.asarray(samples, dtype=np.float64), padded)
+    out_len = _resampled_frames(padded, src, dst)
+    bins = out_len // 2 + 1
+    if bins > len(spectrum):
+        spectrum = np.concatenate([spectrum, np.zeros(bins - len(spectrum), dtype=spectrum.dtype)])
+    out = np.fft.irfft(spectrum[:bins], out_len) * (out_len / padded)
+    return np.clip(np.rint(out[:m]), -FULL_SCALE, FULL_SCALE - 1).astype(np.int16).tolist()
+
+
+@stage_trace.traced()
+def apply_plan(clip: Clip, plan: Plan) -> Clip:
+    channels = [c[plan.start : plan.end] for c in clip.channels]
+    if plan.mono and len(channels) > 1:
+        channels = [[round(sum(frame) / len(frame)) for frame in zip(*channels)]]
+    if plan.rate != clip.rate:
+        channels = [resample(c, clip.rate, plan.rate) for c in channels]
+    return Clip(plan.rate, channels)
+
+
+def compress_aac(data: bytes, ffmpeg: str) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = Path(tmp) / "in.wav", Path(tmp) / "out.m4a"
+        src.write_bytes(data)
+        with stage_trace.span("ffmpeg", "encode", bytes=len(data)):
+            codec = ["-c:a", "aac", "-b:a", AAC_BITRATE, "-map_metadata", "-1", "-fflags", "+bitexact"]
+            subprocess.run([ffmpeg, "-v", "error", "-y", "-i", str(src), *codec, str(dst)], check=True)
+        return dst.read_bytes()
+
+
+@dataclass(frozen=True)
+class Options:
+    trim: bool = True
+    mono: bool = False
+    max_rate: Optional[int] = None
+    min_rate: int = DEFAULT_MIN_RATE
+    max_bytes: Optional[int] = None
+    silence_db: float = DEFAULT_SILENCE_DB
+
+
+def optimize_file(path: Path, out: Optional[Path], options: Options, ffmpeg: Optional[str] = None) -> SoundResult:
+    start = time.perf_counter()
+    with stage_trace.span("optimize_file", path=str(path)) as info:
+        before = path.stat().st_size
+        clip = read_wav(path)
+        a = analyze(clip, options.silence_db)
+        plan, over = plan_clip(a, options.trim, options.mono, options.max_rate, options.min_rate, options.max_bytes)
+        result = apply_plan(clip, plan)
+        data = encode_wav(result)
+        compressed = compress_aac(data, ffmpeg) if ffmpeg else None
+        if out is not None:
+            write_atomic(out, data)
+            if compressed is not None:
+                write_atomic(out.with_suffix(".m4a"), compressed)
+        info.update(bytes=len(data), over_budget=over)
+    return SoundResult(
+        path=path,
+        before_bytes=before,
+        before_seconds=clip.duration,
+        after_bytes=len(data),
+        after_seconds=result.duration,
+        analysis=a,
+        plan=plan,
+        seconds=time.perf_counter() - start,
+        over_budget=over,
+        compressed_bytes=None if compressed is None else len(compressed),
+    )
+
+
+def _steps(r: SoundResult) -> str:
+    a, p = r.analysis, r.plan
+    steps = []
+    if p.start or p.end != a.frames:
+        steps.append(f"trim {p.start / a.rate * 1000:.0f}+{(a.frames - p.end) / a.rate * 1000:.0f} ms")
+    if p.mono and a.channels > 1:
+        steps.append("mono")
+    if p.rate != a.rate:
+        steps.append(f"{a.rate}->{p.rate} Hz")
+    if a.width != OUT_WIDTH:
+        steps.append(f"{a.width * 8}->16 bit")
+    return ", ".join(steps) or "unchanged"
+
+
+def format_report(results: Sequence[SoundResult], root: Path) -> str:
+    lines = []
+    for r in results:
+        try:
+            name = r.path.relative_to(root)
+        except ValueError:
+            name = r.path
+        a = r.analysis
+        aac = "" if r.compressed_bytes is None else f"  aac {r.compressed_bytes} B"
+        flag = "  OVER BUDGET" if r.over_budget else ""
+        lines.append(
+            f"  {r.before_bytes:>9} B -> {r.after_bytes:>9} B  {r.before_seconds:6.2f} s -> {r.after_seconds:6.2f} s"
+            f"  {a.rate} Hz x{a.channels} {a.width * 8}-bit, peak {a.peak_db:6.1f} dBFS"
+            f"  [{_steps(r)}]{aac}  {name}{flag}"
+        )
+    before = sum(r.before_bytes for r in results)
+    after = sum(r.after_bytes for r in results)
+    lines.append(f"  {len(results)} clips, {before} B -> {after} B ({before - after:+d} B saved)")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Trim, fold and resample the game's WAV sounds to fit size budgets.")
+    parser.add_argument(
+        "files",
+        nargs="*",
+        type=Path,
+        help=f"WAV files to optimize (default: every *.wav in {SOUNDS_DIR.relative_to(ROOT)}).",
+    )
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--write", action="store_true", help="Replace the clips in place.")
+    where.add_argument("--out", type=Path, help="Write the optimized clips to this folder instead.")
+    parser.add_argument("--max-bytes", type=int, help="Per-file byte budget; lowers the sample rate until it fits.")
+    parser.add_argument("--rate", type=int, help="Maximum sample rate, whatever the budget.")
+    parser.add_argument(
+        "--min-rate",
+        type=int,
+        default=DEFAULT_MIN_RATE,
+        help=f"Lowest rate a budget may pick (default: {DEFAULT_MIN_RATE}).",
+    )
+    parser.add_argument("--mono", action="store_true", help="Fold stereo clips to mono even if the channels differ.")
+    parser.add_argument("--no-trim", action="store_true", help="Keep leading and trailing silence.")
+    parser.add_argument(
+        "--silence-db",
+        type=float,
+        default=DEFAULT_SILENCE_DB,
+        help=f"Level below which leading/trailing audio counts as silence (default: {DEFAULT_SILENCE_DB:g} dBFS).",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help=f"Also encode an AAC .m4a copy at {AAC_BITRATE}bps with a local ffmpeg (reported; written with the WAV).",
+    )
+    stage_trace.add_arguments(parser, "optimize_sounds")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    with stage_trace.session(args, "optimize_sounds"):
+        run(args)
+
+
+def run(args: argparse.Namespace) -> None:
+    files = args.files or sorted(SOUNDS_DIR.glob("*.wav"))
+    if not files:
+        sys.exit("No WAV files found.")
+    ffmpeg = None
+    if args.compress:
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            sys.exit("--compress needs ffmpeg on PATH.")
+    if np is None and (args.rate or args.max_bytes):
+        print("numpy is not installed; clips keep their sample rate.", file=sys.stderr)
+    options = Options(
+        trim=not args.no_trim,
+        mono=args.mono,
+        max_rate=args.rate,
+        min_rate=args.min_rate,
+        max_bytes=args.max_bytes,
+        silence_db=args.silence_db,
+    )
+
+    results = []
+    for path in files:
+        out = path if args.write else args.out / path.name if args.out else None
+        results.append(optimize_file(path, out, options, ffmpeg))
+    print(format_report(results, ROOT))
+    if not (args.write or args.out):
+        print("Dry run; use --write to replace the clips or --out DIR to write them elsewhere.")
+    if any(r.over_budget for r in results):
+        sys.exit(f"Some clips exceed --max-bytes={args.max_bytes} even at {args.min_rate} Hz mono.")
+
+
+if __name__ == "__main__":
+    main()
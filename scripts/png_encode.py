@@ -0,0 +1,157 @@
+"""
+PNG encode stage shared by the icon and mockup generators.
+
+Strategies, from fastest to smallest:
+- fast:    zlib level 1, for local iteration
+- default: optimize=True (what both scripts always did)
+- max:     lossless reductions first (drop an all-opaque alpha channel, exact
+           palette when the image has <= 256 colors), then optimize=True
+- palette: lossy quantization to 256 colors, for release builds
+
+With a byte budget, an output that is still too large is re-encoded with the
+next stronger strategy (and finally fewer palette colors). The smallest
+result is kept and flagged when it still misses the budget.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+import stage_trace
+from asset_io import write_atomic
+
+STRATEGIES = ("fast", "default", "max", "palette")
+# Fallback color counts tried after "palette" when a budget is still exceeded.
+PALETTE_STEPS = (256, 128, 64)
+
+
+@dataclass(frozen=True)
+class EncodeOptions:
+    strategy: str = "default"
+    max_bytes: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown PNG strategy {self.strategy!r}; expected one of {', '.join(STRATEGIES)}.")
+
+
+@dataclass(frozen=True)
+class EncodeResult:
+    path: Path
+    bytes_written: int
+    previous_bytes: Optional[int]
+    seconds: float
+    strategy: str
+    over_budget: bool
+
+    @property
+    def saved(self) -> Optional[int]:
+        return None if self.previous_bytes is None else self.previous_bytes - self.bytes_written
+
+
+def _lossless_reduce(img: Image.Image) -> Image.Image:
+    if img.mode == "RGBA" and img.getchannel("A").getextrema() == (255, 255):
+        img = img.convert("RGB")
+    if img.mode == "RGB" and img.getcolors(256) is not None:
+        img = img.quantize(colors=256, method=Image.Quantize.MAXCOVERAGE, dither=Image.Dither.NONE)
+    return img
+
+
+def _quantize(img: Image.Image, colors: int) -> Image.Image:
+    # FASTOCTREE is the only quantizer that keeps alpha.
+    method = Image.Quantize.FASTOCTREE if img.mode == "RGBA" else Image.Quantize.MEDIANCUT
+    return img.quantize(colors=colors, method=method, dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def encode_png(img: Image.Image, strategy: str = "default", colors: int = 256) -> bytes:
+    with stage_trace.span("encode_png", "encode", strategy=strategy, colors=colors, pixels=img.width * img.height) as info:
+        data = _encode_png(img, strategy, colors)
+        info["bytes"] = len(data)
+    return data
+
+
+def _encode_png(img: Image.Image, strategy: str, colors: int) -> bytes:
+    buf = BytesIO()
+    if strategy == "fast":
+        img.save(buf, format="PNG", compress_level=1)
+    elif strategy == "default":
+        img.save(buf, format="PNG", optimize=True)
+    elif strategy == "max":
+        _lossless_reduce(img).save(buf, format="PNG", optimize=True)
+    elif strategy == "palette":
+        _quantize(img, colors).save(buf, format="PNG", optimize=True)
+    else:
+        raise ValueError(f"Unknown PNG strategy {strategy!r}.")
+    return buf.getvalue()
+
+
+def _attempts(strategy: str) -> List[Tuple[str, int]]:
+    stronger = [(s, 256) for s in STRATEGIES[STRATEGIES.index(strategy):] if s != "palette"]
+    return stronger + [("palette", c) for c in PALETTE_STEPS]
+
+
+def encode_within_budget(img: Image.Image, options: EncodeOptions) -> Tuple[bytes, str, bool]:
+    """Return (png bytes, strategy used, over budget)."""
+    data = encode_png(img, options.strategy)
+    if options.max_bytes is None or len(data) <= options.max_bytes:
+        return data, options.strategy, False
+
+    best, best_strategy = data, options.strategy
+    for strategy, colors in _attempts(options.strategy)[1:]:
+        data = encode_png(img, strategy, colors)
+        label = strategy if colors == 256 else f"{strategy}{colors}"
+        if len(data) < len(best):
+            best, best_strategy = data, label
+        if len(data) <= options.max_bytes:
+            return data, label, False
+    return best, best_strategy, True
+
+
+def encode_file(path: Path, img: Image.Image, options: EncodeOptions) -> EncodeResult:
+    previous = path.stat().st_size if path.exists() else None
+    start = time.perf_counter()
+    data, strategy, over = encode_within_budget(img, options)
+    seconds = time.perf_counter() - start
+    with stage_trace.span("write", "io", path=str(path), bytes=len(data), strategy=strategy, over_budget=over):
+        write_atomic(path, data)
+    return EncodeResult(path, len(data), previous, seconds, strategy, over)
+
+
+def format_report(results: Sequence[EncodeResult], root: Path) -> str:
+    lines = []
+    total_saved = 0
+    for r in results:
+        try:
+            name = r.path.relative_to(root)
+        except ValueError:
+            name = r.path
+        saved = "" if r.saved is None else f" saved {r.saved:+d} B"
+        total_saved += r.saved or 0
+        flag = "  OVER BUDGET" if r.over_budget else ""
+        lines.append(f"  {r.bytes_written:>9} B {r.seconds * 1000:8.1f} ms {r.strategy:<10}{saved}  {name}{flag}")
+    lines.append(f"  {len(results)} files, {sum(r.bytes_written for r in results)} B written, {total_saved:+d} B saved")
+    return "\n".join(lines)
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument(
+        "--png",
+        choices=STRATEGIES,
+        default="default",
+        help="PNG encode strategy: fast for iteration, max/palette for release (default: optimize=True).",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Per-file byte budget; oversized outputs are re-encoded with stronger strategies.",
+    )
+
+
+def options_from_args(args) -> EncodeOptions:
+    return EncodeOptions(strategy=args.png, max_bytes=args.max_bytes)
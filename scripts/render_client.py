@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Thin client for render_server.py.
+
+    render_client.py mockups --only 02_kategorien_1290x2796.png
+    render_client.py icons --png fast
+    render_client.py status | stop
+
+Everything after the tool name is passed to generate_app_store_mockups.py
+or generate_app_icons.py unchanged and runs in a warm server worker, with
+this directory as the working directory and this environment. The client prints the job's output
+and exits with its status. It only imports the standard library, so it
+starts in milliseconds. When no server is running the tool runs locally,
+unless --require-server is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from render_server import TOKEN_HEADER, TOOLS, add_arguments, token_path
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(str(self._path))
+
+
+def read_token(args: argparse.Namespace) -> str:
+    """The running server's token; a missing file means no server (see render_server.token_path)."""
+    path = token_path(args)
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(exc.errno, "no render server token", str(path)) from None
+
+
+def request(
+    args: argparse.Namespace, method: str, path: str, payload: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    if args.port is not None:
+        conn: http.client.HTTPConnection = http.client.HTTPConnection("127.0.0.1", args.port, timeout=args.timeout)
+    else:
+        conn = UnixHTTPConnection(args.socket, timeout=args.timeout)
+    try:
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json", TOKEN_HEADER: read_token(args)}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+    if response.status != 200:
+        sys.exit(f"render server: {data.get('error', response.reason)}")
+    return data
+
+
+def run_locally(tool: str, argv: list) -> None:
+    script = Path(__file__).resolve().with_name(f"{TOOLS[tool]}.py")
+    os.execv(sys.executable, [sys.executable, str(script), *argv])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Send a render job to render_server.py.")
+    add_arguments(parser)
+    parser.add_argument("--timeout", type=float, help="Seconds to wait for the job (default: no limit).")
+    parser.add_argument(
+        "--require-server",
+        action="store_true",
+        help="Fail instead of running the tool locally when no server is reachable.",
+    )
+    parser.add_argument("command", choices=[*TOOLS, "status", "stop"])
+    parser.add_argument("argv", nargs=argparse.REMAINDER, help="Arguments for the tool.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        if args.command == "status":
+            print(json.dumps(request(args, "GET", "/status"), indent=2))
+            return
+        if args.command == "stop":
+            request(args, "POST", "/shutdown")
+            print("Render server stopping.")
+            return
+        job = {"tool": args.command, "argv": args.argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        result = request(args, "POST", "/jobs", job)
+    except (ConnectionRefusedError, FileNotFoundError) as exc:
+        if args.command in TOOLS and not args.require_server:
+            print(f"render server not reachable ({exc.strerror}); running locally.", file=sys.stderr)
+            run_locally(args.command, args.argv)
+        sys.exit(f"render server not reachable: {exc}")
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    sys.exit(result["exit"])
+
+
+if __name__ == "__main__":
+    main()
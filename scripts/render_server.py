@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Long-lived render server for the asset generators.
+
+A cold generate_app_icons.py or generate_app_store_mockups.py run spends
+most of a single-asset job importing Pillow, loading fonts and rebuilding
+gradients and template layers. This server keeps a pool of warm worker
+processes that have done all of that once. Jobs are the generators' own
+command lines, sent by render_client.py over a Unix socket (default
+.cache/render_server.sock) or localhost HTTP (--port). They wait in a
+bounded queue and run one per worker with --workers 1, so the in-memory
+caches of each worker are reused across jobs.
+
+Workers import the generators themselves. When a file in scripts/ or a
+cached font changes, the next job starts a fresh pool, so a running server
+never renders with stale code. A crashed worker breaks the whole pool and
+every job running on it; those jobs are retried once on a fresh pool, so
+only a job that crashes its worker again fails.
+
+Endpoints: POST /jobs {"tool", "argv", "cwd", "env"}, GET /status, POST /shutdown.
+A job runs in the client's working directory and environment (so ~ and
+$HOME mean the client's); defaults the generators compute at import, such
+as ~/Downloads, come from the server's environment.
+
+Jobs run arbitrary generator command lines, so every request must carry
+the server's random token (X-Render-Token). The server writes the token to
+a 0600 file next to the socket, where only this user's render_client.py can
+read it. Requests with an Origin header, a Host other than localhost, or
+(for POST) a body that is not application/json are refused, so a web page
+cannot drive an HTTP (--port) server with cross-site requests.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import io
+import json
+import multiprocessing
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = Path(__file__).resolve().parent
+FONT_CACHE_DIR = ROOT / ".cache" / "mockup_fonts"
+DEFAULT_SOCKET = ROOT / ".cache" / "render_server.sock"
+TOOLS = {"icons": "generate_app_icons", "mockups": "generate_app_store_mockups"}
+DEFAULT_MAX_QUEUE = 32
+TOKEN_HEADER = "X-Render-Token"
+LOCAL_HOSTS = ("localhost", "127.0.0.1")
+
+
+def code_stamp() -> int:
+    """Newest mtime of the scripts and cached fonts; a change restarts the pool."""
+    stamp = 0
+    for directory in (SCRIPTS_DIR, FONT_CACHE_DIR):
+        if directory.is_dir():
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stamp = max(stamp, entry.stat().st_mtime_ns)
+    return stamp
+
+
+def _warm() -> None:
+    """Pool initializer: import the generators and build the shared resources once."""
+    try:
+        import generate_app_icons
+        import generate_app_store_mockups as mockups
+        import mockup_fonts
+        import mockup_templates
+        import screen_ingest
+        from mockup_layouts import place_on
+
+        generate_app_icons.make_gradient(1024)
+        mockups.configure(mockup_templates.TEMPLATE_CACHE_DIR, screen_dir=screen_ingest.SCREEN_CACHE_DIR)
+        fonts_ready = not mockup_fonts.check_fonts()
+        for layout in mockups.LAYOUTS.values():
+            p = place_on(layout, None)
+            bg = mockup_templates.background(p.size, p.top, p.bottom, p.glows)
+            mockup_templates.composite_phone_chrome(bg, p.phone, p.corner, p.scale)
+            if fonts_ready:
+                mockups.load_font_bold(p.title.size)
+                mockups.load_font_regular(p.subtitle.size)
+    except Exception:
+        # Warming is an optimization; jobs report real errors themselves.
+        traceback.print_exc()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def run_job(tool: str, argv: Sequence[str], cwd: str, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Run one generator command line in this (warm) worker and capture its output."""
+    import importlib
+
+    module = importlib.import_module(TOOLS[tool])
+    argv = list(argv)
+    if "--workers" not in argv:
+        # The parallelism is the server's pool; a nested pool would start cold.
+        argv += ["--workers", "1"]
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    start = time.perf_counter()
+    os.chdir(cwd)
+    # Usage and error messages name the tool, not this server.
+    sys.argv = [f"{TOOLS[tool]}.py", *argv]
+    worker_env = dict(os.environ)
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            module.main(argv)
+        except SystemExit as exc:
+            if isinstance(exc.code, str):
+                print(exc.code, file=sys.stderr)
+            code = exc.code if isinstance(exc.code, int) else 0 if exc.code is None else 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os.environ.clear()
+            os.environ.update(worker_env)
+    return {
+        "exit": code,
+        "stdout": out.getvalue(),
+        "stderr": err.getvalue(),
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+
+
+class QueueFull(Exception):
+    pass
+
+
+class RenderService:
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.started = time.time()
+        self.done = 0
+        self.failed = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._active = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stamp: Optional[int] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            stamp = code_stamp()
+            if self._pool is None or stamp != self._stamp:
+                if self._pool is not None:
+                    # Jobs already running finish on the old pool.
+                    self._pool.shutdown(wait=False)
+                    self.restarts += 1
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm,
+                )
+                self._stamp = stamp
+            return self._pool
+
+    def warm_up(self) -> None:
+        """Start and warm the workers now instead of on the first jobs."""
+        pool = self._executor()
+        for f in [pool.submit(_ping) for _ in range(self.workers)]:
+            f.result()
+
+    def _run(self, tool: str, argv: Sequence[str], cwd: str, env: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """Run the job, retrying once on a fresh pool if a worker crash broke the pool under it."""
+        for _ in range(2):
+            pool = self._executor()
+            try:
+                return pool.submit(run_job, tool, list(argv), cwd, env).result()
+            except BrokenProcessPool:
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                        self.restarts += 1
+        return {"exit": 1, "stdout": "", "stderr": "render worker crashed twice running this job\n"}
+
+    def submit(
+        self, tool: str, argv: Sequence[str], cwd: str, env: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(f"{self.workers + self.max_queue} jobs already queued or running")
+        queued = time.perf_counter()
+        try:
+            with self._lock:
+                self._active += 1
+            result = self._run(tool, argv, cwd, env)
+            result["queued_seconds"] = time.perf_counter() - queued - result.get("seconds", 0.0)
+            with self._lock:
+                self.done += 1
+                self.failed += result["exit"] != 0
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "done": self.done,
+                "failed": self.failed,
+                "pool_restarts": self.restarts,
+                "uptime_seconds": round(time.time() - self.started, 1),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+def token_path(args: argparse.Namespace) -> Path:
+    """Where the server leaves its token for the client: next to the socket, or per port."""
+    if args.port is not None:
+        return args.socket.with_name(f"render_server-{args.port}.token")
+    return args.socket.with_name(f"{args.socket.name}.token")
+
+
+def write_token(path: Path) -> str:
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    # O_EXCL with 0600: the file never exists with wider permissions.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "render_server/1"
+    service: RenderService
+    token = ""
+    verbose = False
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refusal(self) -> Optional[str]:
+        """Why the request is refused (403), or None."""
+        if "Origin" in self.headers:
+            return "cross-origin requests are not accepted"
+        host = (self.headers.get("Host") or "").split(":", 1)[0]
+        if host not in LOCAL_HOSTS:
+            return f"unexpected Host header {host!r}"
+        if not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), self.token):
+            return f"missing or wrong {TOKEN_HEADER}"
+        return None
+
+    def do_GET(self) -> None:
+        refusal = self._refusal()
+        if refusal is not None:
+            self._reply(403, {"error": refusal})
+        elif self.path == "/status":
+            self._reply(200, self.service.status())
+        else:
+            self._reply(404, {"error": f"no such endpoint {self.path}"})
+
+    def do_POST(self) -> None:
+        refusal = self._refusal()
+        if refusal is not None:
+            self._reply(403, {"error": refusal})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reply(415, {"error": "requests must be application/json"})
+            return
+        if self.path == "/shutdown":
+            self._reply(200, {"stopping": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/jobs":
+            self._reply(404, {"error": f"no such endpoint {self.path}"})
+            return
+        try:
+            job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            tool, argv, cwd, env = job["tool"], job.get("argv", []), job.get("cwd", str(ROOT)), job.get("env")
+            if tool not in TOOLS or not all(isinstance(a, str) for a in argv):
+                raise ValueError(f"tool must be one of {', '.join(TOOLS)} and argv a list of strings")
+            if env is not None and not (
+                isinstance(env, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in env.items())
+            ):
+                raise ValueError("env must map strings to strings")
+        except (ValueError, KeyError, TypeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        try:
+            result = self.service.submit(tool, argv, cwd, env)
+        except QueueFull as exc:
+            self._reply(503, {"error": str(exc)})
+            return
+        if self.verbose:
+            print(f"{tool} {' '.join(argv)}: exit {result['exit']} in {result.get('seconds', 0) * 1000:.0f} ms")
+        self._reply(200, result)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _claim_socket(path: Path) -> None:
+    """Remove a stale socket file; refuse if a server is still listening on it."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+        return
+    finally:
+        probe.close()
+    sys.exit(f"A render server is already listening on {path}.")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Transport flags shared by the server and render_client.py."""
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=DEFAULT_SOCKET,
+        help=f"Unix socket path (default: {DEFAULT_SOCKET.relative_to(ROOT)}).",
+    )
+    parser.add_argument("--port", type=int, help="Use HTTP on 127.0.0.1:PORT instead of the Unix socket.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve icon and mockup render jobs from warm worker processes.")
+    add_arguments(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, min(os.cpu_count() or 1, 4)),
+        help="Warm worker processes (default: CPU count, at most 4).",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=DEFAULT_MAX_QUEUE,
+        help=f"Jobs that may wait for a worker before requests are refused (default: {DEFAULT_MAX_QUEUE}).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log every request and job.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.port is None and not hasattr(socket, "AF_UNIX"):
+        sys.exit("Unix sockets are not available here; use --port.")
+    service = RenderService(args.workers, args.max_queue)
+    Handler.service = service
+    Handler.verbose = args.verbose
+    token_file = token_path(args)
+    Handler.token = write_token(token_file)
+    if args.port is not None:
+        server: socketserver.BaseServer = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+        where = f"http://127.0.0.1:{args.port}"
+    else:
+        _claim_socket(args.socket)
+        server = UnixHTTPServer(str(args.socket), Handler)
+        where = str(args.socket)
+    start = time.perf_counter()
+    service.warm_up()
+    print(f"Render server on {where}: {args.workers} workers warmed in {time.perf_counter() - start:.1f}s", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        token_file.unlink(missing_ok=True)
+        if args.port is None:
+            args.socket.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Screenshot ingestion for the mockup generator.
+
+Decoded screenshots are kept for the last two files only, which is enough
+because the mockup generator renders all devices of a screenshot one after
+another: each screenshot is decoded once per process. A JPEG is decoded at
+reduced size with draft mode when the phone screen is much smaller; other
+formats (the PNG captures in the manifests) are decoded at full size. The
+status bar crop and the cover fit are one boxed resize from the decoded
+source (with reducing_gap for large downscales). The fitted screen is
+cached in memory and in .cache/mockup_screens, keyed by (file sha256,
+target size, crop ratio, resize mode). Layouts and locales that reuse a
+screenshot at the same size never decode it again. Re-captured screenshots
+get new keys, so trim_cache() evicts the least recently used screens once
+the directory exceeds SCREEN_CACHE_MAX_BYTES.
+
+fast=True (draft previews) trades quality for speed: JPEGs are drafted
+down to the screen size itself, and the fit is a box reduce plus BILINEAR
+instead of LANCZOS.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+import stage_trace
+import tiled
+from build_cache import BuildCache, file_sha256, files_fingerprint
+
+ROOT = Path(__file__).resolve().parents[1]
+SCREEN_CACHE_DIR = ROOT / ".cache" / "mockup_screens"
+# Room for every screenshot of a few locales at every device size.
+SCREEN_CACHE_MAX_BYTES = 256 << 20
+
+# Remove iOS status bar area (time, signal, battery) from portrait screenshots.
+# Ratio is conservative to avoid cutting useful UI content.
+STATUS_BAR_CROP_RATIO = 0.055
+
+# Sources at least this many times larger than the screen (per axis) take the
+# reduced paths: JPEG draft decoding and a reduce() pre-pass before LANCZOS.
+REDUCE_THRESHOLD = 2.0
+# Pillow's guidance: a gap of 3 is indistinguishable from a plain LANCZOS resize.
+REDUCING_GAP = 3.0
+# Draft previews: reduce() does most of a large downscale, BILINEAR the rest.
+FAST_REDUCING_GAP = 1.5
+
+Box = Tuple[float, float, float, float]
+
+_disk: Optional[BuildCache] = None
+_code: Optional[str] = None
+
+
+def configure(disk_dir: Optional[Path]) -> None:
+    """Enable (or disable with None) the on-disk screen cache; called from pool initializers."""
+    global _disk
+    _disk = BuildCache(disk_dir) if disk_dir is not None else None
+
+
+def trim_cache() -> None:
+    """Evict least recently used screens from the disk cache; call once a run has finished."""
+    if _disk is not None:
+        _disk.trim(SCREEN_CACHE_MAX_BYTES)
+
+
+def cover_geometry(src_size: Tuple[int, int], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """(new_w, new_h, left, top): scale to cover size, then center-crop."""
+    src_w, src_h = src_size
+    dst_w, dst_h = size
+    src_ratio = src_w / src_h
+    dst_ratio = dst_w / dst_h
+    if src_ratio > dst_ratio:
+        new_h = dst_h
+        new_w = int(new_h * src_ratio)
+    else:
+        new_w = dst_w
+        new_h = int(new_w / src_ratio)
+    return new_w, new_h, (new_w - dst_w) // 2, (new_h - dst_h) // 2
+
+
+def fit_cover(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    new_w, new_h, left, top = cover_geometry(img.size, size)
+    resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+    return resized.crop((left, top, left + size[0], top + size[1]))
+
+
+def status_bar_rows(size: Tuple[int, int]) -> int:
+    w, h = size
+    if h <= w:
+        return 0
+    crop_px = int(h * STATUS_BAR_CROP_RATIO)
+    if crop_px <= 0 or crop_px >= h - 8:
+        return 0
+    return crop_px
+
+
+def preprocess_screenshot(img: Image.Image) -> Image.Image:
+    """Strip status bar from portrait screenshots before framing."""
+    crop_px = status_bar_rows(img.size)
+    if crop_px == 0:
+        return img
+    w, h = img.size
+    return img.crop((0, crop_px, w, h))
+
+
+def source_box(src_size: Tuple[int, int], size: Tuple[int, int]) -> Box:
+    """Region of the source that the status bar crop + cover fit maps onto size."""
+    crop_px = status_bar_rows(src_size)
+    cropped = (src_size[0], src_size[1] - crop_px)
+    new_w, new_h, left, top = cover_geometry(cropped, size)
+    sx, sy = cropped[0] / new_w, cropped[1] / new_h
+    return (left * sx, crop_px + top * sy, (left + size[0]) * sx, crop_px + (top + size[1]) * sy)
+
+
+def fit_screen(screenshot: Image.Image, size: Tuple[int, int], strip_rows: Optional[int] = None) -> Image.Image:
+    """Status bar crop + fit_cover, in RGB; strip_rows resizes straight from the source in strips."""
+    with stage_trace.span(
+        "fit_screen",
+        src_pixels=screenshot.width * screenshot.height,
+        pixels=size[0] * size[1],
+        tiled=strip_rows is not None,
+    ):
+        if strip_rows is None:
+            return fit_cover(preprocess_screenshot(screenshot.convert("RGB")), size)
+        # The crop and cover steps collapse into one source box, so no full-size
+        # converted, cropped or resized copy of the screenshot is made.
+        box = source_box(screenshot.size, size)
+        return tiled.resize(screenshot, size, box=box, mode="RGB", rows=strip_rows)
+
+
+def _reduction(box: Box, size: Tuple[int, int]) -> float:
+    return min((box[2] - box[0]) / size[0], (box[3] - box[1]) / size[1])
+
+
+@lru_cache(maxsize=2)
+def _decoded(path: str, sha: str, draft: Optional[Tuple[int, int]]) -> Tuple[Image.Image, Tuple[int, int]]:
+    """(decoded image, original size); sha keys the entry to the file's content."""
+    with stage_trace.span("decode_screenshot", path=path, draft=draft) as info:
+        img = Image.open(path)
+        full = img.size
+        if draft is not None and img.format == "JPEG":
+            img.draft("RGB", draft)
+        img.load()
+        info["pixels"] = img.width * img.height
+        return img, full
+
+
+def _draft_request(src_size: Tuple[int, int], size: Tuple[int, int], fast: bool) -> Optional[Tuple[int, int]]:
+    factor = _reduction(source_box(src_size, size), size)
+    if factor < REDUCE_THRESHOLD:
+        return None
+    # Keep REDUCE_THRESHOLD x the screen resolution so LANCZOS still has headroom; drafts need none.
+    keep = (1.0 if fast else REDUCE_THRESHOLD) / factor
+    return math.ceil(src_size[0] * keep), math.ceil(src_size[1] * keep)
+
+
+def _fit_from_file(
+    path: Path, sha: str, size: Tuple[int, int], strip_rows: Optional[int], fast: bool
+) -> Image.Image:
+    with Image.open(path) as probe:
+        src_size, is_jpeg = probe.size, probe.format == "JPEG"
+    draft = _draft_request(src_size, size, fast) if is_jpeg else None
+    img, full = _decoded(str(path), sha, draft)
+    sx, sy = img.width / full[0], img.height / full[1]
+    x0, y0, x1, y1 = source_box(full, size)
+    box = (x0 * sx, y0 * sy, x1 * sx, y1 * sy)
+    if strip_rows is not None:
+        return tiled.resize(img, size, box=box, mode="RGB", rows=strip_rows)
+    rgb = img if img.mode == "RGB" else img.convert("RGB")
+    if fast:
+        return rgb.resize(size, Image.Resampling.BILINEAR, box=box, reducing_gap=FAST_REDUCING_GAP)
+    gap = REDUCING_GAP if _reduction(box, size) >= REDUCE_THRESHOLD else None
+    return rgb.resize(size, Image.Resampling.LANCZOS, box=box, reducing_gap=gap)
+
+
+def _disk_key(sha: str, size: Tuple[int, int], tiled_fit: bool, fast: bool) -> str:
+    global _code
+    if _code is None:
+        here = Path(__file__).resolve().parent
+        _code = files_fingerprint(here / "screen_ingest.py", here / "tiled.py")
+    assert _disk is not None
+    resize = ("fast", FAST_REDUCING_GAP) if fast else (REDUCE_THRESHOLD, REDUCING_GAP, tiled_fit)
+    return _disk.key(_code, sha, size, STATUS_BAR_CROP_RATIO, *resize)
+
+
+@lru_cache(maxsize=16)
+def _fitted(path: str, sha: str, size: Tuple[int, int], strip_rows: Optional[int], fast: bool) -> Image.Image:
+    key = _disk_key(sha, size, strip_rows is not None, fast) if _disk is not None else None
+    if key is not None:
+        img = _disk.load_image("screen", key)
+        if img is not None:
+            return img
+    img = _fit_from_file(Path(path), sha, size, strip_rows, fast)
+    if key is not None:
+        _disk.store_image("screen", key, img, replace=False)
+    return img
+
+
+@lru_cache(maxsize=64)
+def _sha(path: str, mtime_ns: int, size: int) -> str:
+    return file_sha256(Path(path))
+
+
+def load_screen(
+    path: Path, size: Tuple[int, int], strip_rows: Optional[int] = None, fast: bool = False
+) -> Image.Image:
+    """Cropped, cover-fitted RGB screen for a screenshot file; shared, so treat it as read-only."""
+    with stage_trace.span("load_screen", path=str(path), pixels=size[0] * size[1]) as info:
+        st = path.stat()
+        sha = _sha(str(path), st.st_mtime_ns, st.st_size)
+        hits = _fitted.cache_info().hits
+        img = _fitted(str(path), sha, tuple(size), None if fast else strip_rows, fast)
+        info["memory_hit"] = _fitted.cache_info().hits > hits
+        return img
+
+
+def clear_cache() -> None:
+    _fitted.cache_clear()
+    _decoded.cache_clear()
+    _sha.cache_clear()
@@ -0,0 +1,97 @@
+"""
+Zero-copy image handoff to pool workers through shared memory.
+
+Pickling an image into a pool (as initargs or job arguments) copies it
+once per worker, or once per job. Instead, the parent puts each image into
+a multiprocessing.shared_memory segment once and passes a small SharedImage
+handle. Workers map the segment and wrap it with Image.frombuffer, so
+every worker reads the same physical pages. Memory and IPC time then stay
+flat as the worker count grows.
+
+The views are read-only. Pillow operations that produce new images
+(resize, copy, convert, alpha_composite onto another canvas) work as
+usual. RGB is stored as RGBX, which is Pillow's in-memory layout, because
+only 1- and 4-byte pixel modes can be mapped. unpadded() turns such an
+RGBX result back into RGB before encoding.
+
+Only the parent owns segments: SharedImages unlinks them on exit, even
+when a worker crashed or the run was interrupted. If the parent itself is
+killed, multiprocessing's resource tracker unlinks what is left.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+# Modes that map directly; RGB is stored padded to RGBX.
+_MAPPED = {"L": "L", "RGBA": "RGBA", "RGB": "RGBX"}
+
+# Segments this process has attached to, kept open while any view may be alive.
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+@dataclass(frozen=True)
+class SharedImage:
+    """Picklable handle to an image in shared memory."""
+
+    name: str
+    mode: str
+    size: Tuple[int, int]
+
+    @property
+    def raw_mode(self) -> str:
+        return _MAPPED[self.mode]
+
+
+def shareable(img: Image.Image) -> bool:
+    return img.mode in _MAPPED
+
+
+class SharedImages:
+    """Owner of the segments of one pool run: `with SharedImages() as shared: handle = shared.put(img)`."""
+
+    def __init__(self) -> None:
+        self._segments: List[shared_memory.SharedMemory] = []
+
+    def put(self, img: Image.Image) -> SharedImage:
+        if not shareable(img):
+            raise ValueError(f"cannot share a {img.mode} image (expected one of {', '.join(_MAPPED)})")
+        raw = img if _MAPPED[img.mode] == img.mode else img.convert(_MAPPED[img.mode])
+        data = raw.tobytes()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        self._segments.append(shm)
+        shm.buf[: len(data)] = data
+        return SharedImage(shm.name, img.mode, img.size)
+
+    def close(self) -> None:
+        while self._segments:
+            shm = self._segments.pop()
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "SharedImages":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def open_shared(handle: SharedImage) -> Image.Image:
+    """Read-only view of a shared image; no pixels are copied."""
+    shm = _attached.get(handle.name)
+    if shm is None:
+        shm = _attached[handle.name] = shared_memory.SharedMemory(name=handle.name)
+    raw = handle.raw_mode
+    return Image.frombuffer(raw, handle.size, shm.buf, "raw", raw, 0, 1)
+
+
+def unpadded(img: Image.Image) -> Image.Image:
+    """RGB for an RGBX view (or an image derived from one); anything else unchanged."""
+    return img.convert("RGB") if img.mode == "RGBX" else img
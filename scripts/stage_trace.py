@@ -0,0 +1,186 @@
+"""
+Stage tracing and profiling for the asset generators (--profile, --cprofile).
+
+Spans are recorded as Chrome trace events ("X" complete events with
+timings and args such as pixel counts, bytes written and cache hits), and
+the file opens in chrome://tracing or https://ui.perfetto.dev. Worker
+processes record into their own buffer; job wrappers hand it back with
+drain() and the parent merges it, so one trace covers the whole pool.
+
+When tracing is off, span() and traced() cost one global check.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from asset_io import write_atomic
+
+ROOT = Path(__file__).resolve().parents[1]
+PROFILE_DIR = ROOT / ".cache" / "profiles"
+DEFAULT_HOTSPOTS = 30
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_events: Optional[List[Dict[str, Any]]] = None
+
+
+def enable(on: bool = True) -> None:
+    """Start (or stop) recording in this process; also used by pool initializers."""
+    global _events
+    _events = [] if on else None
+
+
+def enabled() -> bool:
+    return _events is not None
+
+
+def _now_us() -> float:
+    # perf_counter is system-wide monotonic on macOS and Linux, so worker
+    # timestamps line up with the parent's.
+    return time.perf_counter_ns() / 1000
+
+
+@contextmanager
+def span(name: str, cat: str = "stage", **args: Any) -> Iterator[Dict[str, Any]]:
+    """Time a block; the yielded dict becomes the event's args (fill in results)."""
+    if _events is None:
+        yield args
+        return
+    start = _now_us()
+    try:
+        yield args
+    finally:
+        _events.append(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": start,
+                "dur": _now_us() - start,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": args,
+            }
+        )
+
+
+def traced(name: Optional[str] = None, cat: str = "stage") -> Callable[[F], F]:
+    """Record every call of a stage function as a span named after it."""
+
+    def decorate(fn: F) -> F:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            if _events is None:
+                return fn(*a, **kw)
+            with span(label, cat):
+                return fn(*a, **kw)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def instant(name: str, cat: str = "cache", **args: Any) -> None:
+    if _events is None:
+        return
+    _events.append(
+        {
+            "name": name,
+            "cat": cat,
+            "ph": "i",
+            "s": "t",
+            "ts": _now_us(),
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+    )
+
+
+def drain() -> List[Dict[str, Any]]:
+    """Hand this process's events to the caller (a worker returning them with its result)."""
+    global _events
+    if _events is None:
+        return []
+    events, _events = _events, []
+    return events
+
+
+def merge(events: List[Dict[str, Any]]) -> None:
+    if _events is not None:
+        _events.extend(events)
+
+
+def write(path: Path, process_name: str) -> int:
+    events = drain()
+    main = os.getpid()
+    names = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {"name": process_name if pid == main else f"{process_name} worker {pid}"},
+        }
+        for pid in sorted({e["pid"] for e in events})
+    ]
+    payload = {"traceEvents": names + events, "displayTimeUnit": "ms"}
+    write_atomic(path, json.dumps(payload, default=str).encode("utf-8"))
+    return len(events)
+
+
+@contextmanager
+def session(args: Any, name: str) -> Iterator[None]:
+    """Trace and/or cProfile a whole run as requested by add_arguments() flags."""
+    trace_path: Optional[Path] = args.profile
+    hotspots: Optional[int] = args.cprofile
+    profiler = cProfile.Profile() if hotspots else None
+    enable(trace_path is not None)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with span(name, "run"):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            prof_path = PROFILE_DIR / f"{name}.prof"
+            prof_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(prof_path)
+            print(f"cProfile hot spots (cumulative, top {hotspots}); full stats: {prof_path}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(hotspots)
+        if trace_path is not None:
+            count = write(trace_path, name)
+            print(f"Trace: {trace_path} ({count} events; open in chrome://tracing or ui.perfetto.dev)")
+        enable(False)
+
+
+def add_arguments(parser, name: str) -> None:
+    default = PROFILE_DIR / f"{name}.trace.json"
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=Path,
+        const=default,
+        metavar="TRACE_JSON",
+        help=f"Write a Chrome trace of every stage and output (default: {default.relative_to(ROOT)}).",
+    )
+    parser.add_argument(
+        "--cprofile",
+        nargs="?",
+        type=int,
+        const=DEFAULT_HOTSPOTS,
+        metavar="N",
+        help=f"Print the top N cProfile hot spots (default {DEFAULT_HOTSPOTS}); runs without worker processes.",
+    )
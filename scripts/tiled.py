@@ -0,0 +1,143 @@
+"""
+Strip-wise image processing with bounded peak memory.
+
+The icon and mockup pipelines used to run each step on a whole image, so
+converting, resizing, cropping and filtering an 8K master kept several
+full-size copies alive at once. The helpers here produce their output in
+horizontal strips instead. Each strip reads only the source rows it needs,
+plus a halo wide enough for the resampling filter or blur kernel. Peak
+memory is then the decoded source, the output and one strip.
+
+Halos are sized so every strip sees exactly the pixels the whole-image
+operation would, and real image edges stay image edges. Results match the
+untiled path (resizes can differ by float rounding of the box coordinates).
+Contrast is global (it blends towards the mean gray), so its mean comes from
+strip histograms, computed before any strip is blended.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Callable, Iterator, Optional, Tuple
+
+from PIL import Image, ImageEnhance, ImageStat
+
+DEFAULT_STRIP_ROWS = 256
+
+# Filter support radius in source pixels at scale 1 (Pillow's resample filters).
+_SUPPORT = {
+    Image.Resampling.NEAREST: 0.5,
+    Image.Resampling.BOX: 0.5,
+    Image.Resampling.BILINEAR: 1.0,
+    Image.Resampling.HAMMING: 1.0,
+    Image.Resampling.BICUBIC: 2.0,
+    Image.Resampling.LANCZOS: 3.0,
+}
+
+Box = Tuple[float, float, float, float]
+
+
+def blur_halo(radius: float) -> int:
+    # Pillow's GaussianBlur runs three box passes of at most radius + 1 px each.
+    return 3 * (int(radius) + 1) + 2
+
+
+def strips(height: int, rows: int = DEFAULT_STRIP_ROWS) -> Iterator[Tuple[int, int]]:
+    for y0 in range(0, height, max(1, rows)):
+        yield y0, min(height, y0 + rows)
+
+
+def _span(lo: float, hi: float, scale: float, support: float, limit: int) -> Tuple[int, int]:
+    pad = support * max(scale, 1.0) + 2
+    return max(0, math.floor(lo - pad)), min(limit, math.ceil(hi + pad))
+
+
+def resize(
+    img: Image.Image,
+    size: Tuple[int, int],
+    resample: Image.Resampling = Image.Resampling.LANCZOS,
+    box: Optional[Box] = None,
+    mode: Optional[str] = None,
+    rows: int = DEFAULT_STRIP_ROWS,
+) -> Image.Image:
+    """img.convert(mode).resize(size, resample, box), built strip by strip.
+
+    Each strip crops the source rows and columns under its filter window, so
+    the converted copy of the whole source is never made.
+    """
+    w, h = size
+    bx0, by0, bx1, by1 = box if box is not None else (0, 0, *img.size)
+    sx, sy = (bx1 - bx0) / w, (by1 - by0) / h
+    support = _SUPPORT[resample]
+    left, right = _span(bx0, bx1, sx, support, img.width)
+    out = Image.new(mode or img.mode, size)
+    for y0, y1 in strips(h, rows):
+        top_f, bottom_f = by0 + y0 * sy, by0 + y1 * sy
+        top, bottom = _span(top_f, bottom_f, sy, support, img.height)
+        band = img.crop((left, top, right, bottom))
+        if mode is not None and band.mode != mode:
+            band = band.convert(mode)
+        part = band.resize((w, y1 - y0), resample, box=(bx0 - left, top_f - top, bx1 - left, bottom_f - top))
+        out.paste(part, (0, y0))
+    return out
+
+
+def apply(
+    img: Image.Image,
+    fn: Callable[[Image.Image], Image.Image],
+    halo: int = 0,
+    rows: int = DEFAULT_STRIP_ROWS,
+) -> Image.Image:
+    """fn(img) for a size-preserving filter whose vertical reach is at most halo rows.
+
+    Valid for point operations (halo 0) and Pillow's kernel filters, which
+    clamp at the image edge; a strip's halo rows stand in for the rest.
+    """
+    out: Optional[Image.Image] = None
+    for y0, y1 in strips(img.height, rows):
+        top, bottom = max(0, y0 - halo), min(img.height, y1 + halo)
+        part = fn(img.crop((0, top, img.width, bottom)))
+        if out is None:
+            out = Image.new(part.mode, img.size)
+        out.paste(part.crop((0, y0 - top, img.width, y1 - top)), (0, y0))
+    assert out is not None, "cannot tile an empty image"
+    return out
+
+
+def contrast(img: Image.Image, factor: float, rows: int = DEFAULT_STRIP_ROWS) -> Image.Image:
+    """ImageEnhance.Contrast(img).enhance(factor) for modes without alpha."""
+    hist = [0] * 256
+    for y0, y1 in strips(img.height, rows):
+        for i, n in enumerate(img.crop((0, y0, img.width, y1)).convert("L").histogram()):
+            hist[i] += n
+    mean = int(ImageStat.Stat(hist).mean[0] + 0.5)
+
+    def blend(band: Image.Image) -> Image.Image:
+        degenerate = Image.new("L", band.size, mean)
+        if degenerate.mode != band.mode:
+            degenerate = degenerate.convert(band.mode)
+        return Image.blend(degenerate, band, factor)
+
+    return apply(img, blend, rows=rows)
+
+
+def color(img: Image.Image, factor: float, rows: int = DEFAULT_STRIP_ROWS) -> Image.Image:
+    return apply(img, lambda band: ImageEnhance.Color(band).enhance(factor), rows=rows)
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument(
+        "--tiled",
+        action="store_true",
+        help="Process large images in horizontal strips to bound peak memory.",
+    )
+    parser.add_argument(
+        "--strip-rows",
+        type=int,
+        default=DEFAULT_STRIP_ROWS,
+        help=f"Output rows per strip with --tiled (default: {DEFAULT_STRIP_ROWS}).",
+    )
+
+
+def rows_from_args(args) -> Optional[int]:
+    return args.strip_rows if args.tiled else None
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Verify generated icons and mockups against golden images.
+
+By default every image tracked under the icon and mockup output folders is
+compared with its blob at a git revision (--ref, default HEAD): regenerate
+the assets, then run this to prove an optimization did not change them.
+With --golden DIR, the images under DIR are compared with the same
+relative paths under the given candidate folder instead.
+
+Files whose bytes match the golden blob are skipped without decoding. For
+the rest the report lists the per-channel max error, the mean error, PSNR
+and SSIM (luma, 7x7 window; needs numpy), and --heatmaps writes a diff
+heatmap per changed image. The exit status is non-zero if any image is
+missing, changed size, or exceeds its tolerance.
+
+Tolerances depend on the kind of image (see TOLERANCES). Icons are plain
+LANCZOS resizes of the master and should only move by a rounding level
+(tiled strip resizes). Mockups may differ by a few levels where blurred
+glows and shadows run at reduced resolution and where text is
+anti-aliased. A file is a mockup if it lies in one of MOCKUP_PATHS; with
+--golden, pass --kind if the candidate folder is outside them.
+--max-error / --min-psnr / --min-ssim override the limits for every kind.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import math
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageChops, ImageOps, ImageStat
+
+from asset_io import default_workers
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; everything but SSIM works without it.
+    np = None
+
+ROOT = Path(__file__).resolve().parents[1]
+# What generate_app_icons.py and generate_app_store_mockups.py write.
+ICON_PATHS = (
+    ROOT / "assets/images/App_Icon.png",
+    ROOT / "ios/Runner/Assets.xcassets/AppIcon.appiconset",
+    ROOT / "android/app/src/main/res",
+    ROOT / "macos/Runner/Assets.xcassets/AppIcon.appiconset",
+    ROOT / "web",
+    ROOT / "windows/runner/resources",
+)
+MOCKUP_PATHS = (
+    ROOT / "docs/app_store_mockups",
+    ROOT / "App_store_Mockups",
+)
+DEFAULT_PATHS = ICON_PATHS + MOCKUP_PATHS
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg", "*.ico")
+
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+# Heatmaps multiply the absolute error so that 1-2 level changes are visible.
+HEATMAP_GAIN = 16
+
+# Golden image: raw file bytes (a git blob) or a path.
+Source = Union[bytes, Path]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    status: str  # same, ok, DIFF, SIZE, MISSING
+    max_error: Tuple[int, ...] = ()
+    mean_error: float = 0.0
+    psnr: float = math.inf
+    ssim: Optional[float] = None
+    detail: str = ""
+
+    @property
+    def failed(self) -> bool:
+        return self.status not in ("same", "ok")
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    max_error: int
+    min_psnr: Optional[float] = None
+    min_ssim: Optional[float] = None
+
+
+KINDS = ("icon", "mockup")
+TOLERANCES: Dict[str, Tolerance] = {
+    # Whole-image and strip-wise LANCZOS may round a few pixels differently.
+    "icon": Tolerance(max_error=1, min_ssim=0.999),
+    # Reduced-resolution glow/shadow blurs and text anti-aliasing.
+    "mockup": Tolerance(max_error=3, min_ssim=0.995),
+}
+
+
+def kind_of(path: Path) -> str:
+    resolved = path.resolve()
+    return "mockup" if any(resolved.is_relative_to(p) for p in MOCKUP_PATHS) else "icon"
+
+
+def tolerance_for(kind: str, overrides: Dict[str, Optional[float]]) -> Tolerance:
+    """The kind's tolerance with the command-line limits that were given."""
+    base = TOLERANCES[kind]
+    return Tolerance(
+        max_error=base.max_error if overrides.get("max_error") is None else int(overrides["max_error"]),
+        min_psnr=base.min_psnr if overrides.get("min_psnr") is None else overrides["min_psnr"],
+        min_ssim=base.min_ssim if overrides.get("min_ssim") is None else overrides["min_ssim"],
+    )
+
+
+def is_image(path: str) -> bool:
+    name = path.lower()
+    return any(fnmatch.fnmatch(name, p) for p in IMAGE_PATTERNS)
+
+
+def git_blob_id(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _git(*args: str, stdin: Optional[bytes] = None) -> bytes:
+    return subprocess.run(["git", *args], cwd=ROOT, input=stdin, capture_output=True, check=True).stdout
+
+
+def tracked_images(ref: str, paths: Sequence[Path]) -> Dict[str, str]:
+    """{repo-relative path: blob id} of the images under paths at ref."""
+    rel = [str(p.resolve().relative_to(ROOT)) for p in paths]
+    out = _git("ls-tree", "-r", "-z", ref, "--", *rel)
+    blobs = {}
+    for record in out.split(b"\0"):
+        if not record:
+            continue
+        meta, name = record.decode("utf-8").split("\t", 1)
+        if meta.split()[1] == "blob" and is_image(name):
+            blobs[name] = meta.split()[2]
+    return blobs
+
+
+def read_blobs(ids: Sequence[str]) -> Dict[str, bytes]:
+    """Many blobs through one git cat-file process."""
+    if not ids:
+        return {}
+    out = _git("cat-file", "--batch", stdin="".join(f"{i}\n" for i in ids).encode("ascii"))
+    blobs, pos = {}, 0
+    for oid in ids:
+        header_end = out.index(b"\n", pos)
+        size = int(out[pos:header_end].split()[2])
+        blobs[oid] = out[header_end + 1 : header_end + 1 + size]
+        pos = header_end + 1 + size + 1
+    return blobs
+
+
+def _open(source: Source) -> Image.Image:
+    img = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    img.load()
+    return img
+
+
+def _common_mode(a: Image.Image, b: Image.Image) -> str:
+    alpha = any(im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info for im in (a, b))
+    return "RGBA" if alpha else "RGB"
+
+
+def _luma(img: Image.Image) -> Image.Image:
+    if img.mode == "RGBA":
+        # Transparent pixels may hold any color; compare what is actually visible.
+        img = Image.alpha_composite(Image.new("RGBA", img.size, (0, 0, 0, 255)), img)
+    return img.convert("L")
+
+
+def _window_means(a: "np.ndarray") -> "np.ndarray":
+    # Box filter through a summed-area table: O(1) per pixel for any window.
+    c = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    w = SSIM_WINDOW
+    return (c[w:, w:] - c[:-w, w:] - c[w:, :-w] + c[:-w, :-w]) / (w * w)
+
+
+def ssim(a: Image.Image, b: Image.Image) -> Optional[float]:
+    """Mean SSIM of the luma planes; None without numpy or for images smaller than the window."""
+    if np is None or min(a.size) < SSIM_WINDOW:
+        return None
+    x = np.asarray(_luma(a), dtype=np.float64)
+    y = np.asarray(_luma(b), dtype=np.float64)
+    mx, my = _window_means(x), _window_means(y)
+    vx = _window_means(x * x) - mx * mx
+    vy = _window_means(y * y) - my * my
+    cov = _window_means(x * y) - mx * my
+    s = ((2 * mx * my + SSIM_C1) * (2 * cov + SSIM_C2)) / ((mx * mx + my * my + SSIM_C1) * (vx + vy + SSIM_C2))
+    return float(s.mean())
+
+
+def heatmap(diff: Image.Image) -> Image.Image:
+    """Largest channel error per pixel, amplified: black (equal) through red to yellow."""
+    worst = diff.getchannel(0)
+    for band in range(1, len(diff.getbands())):
+        worst = ImageChops.lighter(worst, diff.getchannel(band))
+    worst = worst.point(lambda v: min(255, v * HEATMAP_GAIN))
+    return ImageOps.colorize(worst, black=(0, 0, 0), mid=(220, 30, 30), white=(255, 240, 80))
+
+
+def compare(
+    name: str,
+    golden: Source,
+    candidate: Path,
+    tolerance: Tolerance,
+    heatmap_path: Optional[Path] = None,
+) -> Comparison:
+    if not candidate.exists():
+        return Comparison(name, "MISSING", detail=f"no {candidate}")
+    a, b = _open(golden), _open(candidate)
+    if a.size != b.size:
+        return Comparison(name, "SIZE", detail=f"{b.width}x{b.height}, golden is {a.width}x{a.height}")
+    mode = _common_mode(a, b)
+    a, b = a.convert(mode), b.convert(mode)
+
+    diff = ImageChops.difference(a, b)
+    max_error = tuple(hi for _, hi in diff.getextrema())
+    stat = ImageStat.Stat(diff)
+    mean_error = sum(stat.mean) / len(stat.mean)
+    mse = sum(stat.sum2) / (a.width * a.height * len(stat.sum2))
+    psnr = math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+    score = 1.0 if mse == 0 else ssim(a, b)
+
+    over = max(max_error) > tolerance.max_error
+    if tolerance.min_psnr is not None and psnr < tolerance.min_psnr:
+        over = True
+    if tolerance.min_ssim is not None and score is not None and score < tolerance.min_ssim:
+        over = True
+    if heatmap_path is not None and mse > 0:
+        heatmap_path.parent.mkdir(parents=True, exist_ok=True)
+        heatmap(diff).save(heatmap_path, compress_level=1)
+    return Comparison(name, "DIFF" if over else "ok", max_error, mean_error, psnr, score)
+
+
+def _compare_job(job: Tuple[str, Source, Path, Tolerance, Optional[Path]]) -> Comparison:
+    try:
+        return compare(*job)
+    except Exception as exc:
+        return Comparison(job[0], "DIFF", detail=f"{type(exc).__name__}: {exc}")
+
+
+def git_pairs(ref: str, paths: Sequence[Path]) -> Tuple[List[Comparison], List[Tuple[str, Source, Path]]]:
+    """(byte-identical or missing files, pairs that need decoding) against ref."""
+    settled, pending = [], []
+    for name, oid in sorted(tracked_images(ref, paths).items()):
+        path = ROOT / name
+        if not path.exists():
+            settled.append(Comparison(name, "MISSING", detail="deleted from the working tree"))
+        elif git_blob_id(path.read_bytes()) == oid:
+            settled.append(Comparison(name, "same"))
+        else:
+            pending.append((name, oid, path))
+    blobs = read_blobs([oid for _, oid, _ in pending])
+    return settled, [(name, blobs[oid], path) for name, oid, path in pending]
+
+
+def dir_pairs(golden: Path, candidate: Path) -> Tuple[List[Comparison], List[Tuple[str, Source, Path]]]:
+    settled, pending = [], []
+    for g in sorted(p for p in golden.rglob("*") if p.is_file() and is_image(p.name)):
+        name = g.relative_to(golden).as_posix()
+        c = candidate / name
+        if c.exists() and c.stat().st_size == g.stat().st_size and c.read_bytes() == g.read_bytes():
+            settled.append(Comparison(name, "same"))
+        else:
+            pending.append((name, g, c))
+    return settled, pending
+
+
+def verify(
+    settled: List[Comparison],
+    pending: List[Tuple[str, Source, Path]],
+    overrides: Dict[str, Optional[float]],
+    heatmap_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    kind: Optional[str] = None,
+) -> List[Comparison]:
+    """Compare the pending pairs; each uses its kind's tolerance (kind=None: by path)."""
+    jobs = [
+        (
+            name,
+            golden,
+            path,
+            tolerance_for(kind or kind_of(path), overrides),
+            heatmap_dir / f"{name}.diff.png" if heatmap_dir else None,
+        )
+        for name, golden, path in pending
+    ]
+    workers = workers or default_workers(len(jobs))
+    if workers <= 1 or len(jobs) <= 1:
+        compared = [_compare_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            compared = list(pool.map(_compare_job, jobs))
+    return sorted(settled + compared, key=lambda c: c.name)
+
+
+def format_report(results: Sequence[Comparison]) -> str:
+    lines = []
+    for r in results:
+        if r.status == "same":
+            continue
+        if r.detail:
+            lines.append(f"  {r.status:<7} {r.detail}  {r.name}")
+            continue
+        channels = ",".join(str(v) for v in r.max_error)
+        ssim_text = "   n/a " if r.ssim is None else f"{r.ssim:.5f}"
+        psnr_text = "   inf" if math.isinf(r.psnr) else f"{r.psnr:6.2f}"
+        lines.append(
+            f"  {r.status:<7} max {channels:<15} mean {r.mean_error:7.4f}"
+            f"  psnr {psnr_text} dB  ssim {ssim_text}  {r.name}"
+        )
+    same = sum(1 for r in results if r.status == "same")
+    failed = sum(1 for r in results if r.failed)
+    within = len(results) - same - failed
+    lines.append(f"  {len(results)} images: {same} byte-identical, {within} within tolerance, {failed} failed")
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare generated icons and mockups with golden images.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help="Files or folders to verify (default: icon sets, App_Icon.png and the mockup folders); "
+        "with --golden, the one candidate folder.",
+    )
+    parser.add_argument("--ref", default="HEAD", help="Git revision holding the golden images (default: HEAD).")
+    parser.add_argument("--golden", type=Path, metavar="DIR", help="Compare against the images in DIR instead of git.")
+    defaults = ", ".join(f"{k} {t.max_error}" for k, t in TOLERANCES.items())
+    parser.add_argument(
+        "--max-error",
+        type=int,
+        help=f"Largest allowed per-channel error in levels, for every kind (default: {defaults}).",
+    )
+    parser.add_argument("--min-psnr", type=float, help="Smallest allowed PSNR in dB (default: not checked).")
+    ssim_defaults = ", ".join(f"{k} {t.min_ssim}" for k, t in TOLERANCES.items())
+    parser.add_argument(
+        "--min-ssim",
+        type=float,
+        help=f"Smallest allowed SSIM, for every kind (default: {ssim_defaults}; needs numpy).",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=KINDS,
+        help="Treat every image as this kind (default: mockup inside the mockup folders, icon elsewhere).",
+    )
+    parser.add_argument("--heatmaps", type=Path, metavar="DIR", help="Write a diff heatmap per changed image to DIR.")
+    parser.add_argument("--workers", type=int, help="Worker processes for comparing (defaults to the CPU count).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    overrides = {"max_error": args.max_error, "min_psnr": args.min_psnr, "min_ssim": args.min_ssim}
+    start = time.perf_counter()
+    if args.golden is not None:
+        if len(args.paths) != 1 or not args.paths[0].is_dir():
+            sys.exit("--golden needs exactly one candidate folder.")
+        settled, pending = dir_pairs(args.golden, args.paths[0])
+        source = str(args.golden)
+    else:
+        settled, pending = git_pairs(args.ref, args.paths or DEFAULT_PATHS)
+        source = args.ref
+    results = verify(settled, pending, overrides, args.heatmaps, args.workers, args.kind)
+    print(f"Compared with {source} in {time.perf_counter() - start:.2f}s:")
+    print(format_report(results))
+    if np is None:
+        print("  (SSIM skipped: numpy is not installed)")
+    if args.heatmaps and pending:
+        print(f"Heatmaps: {args.heatmaps}")
+    if any(r.failed for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()